@@ -0,0 +1,139 @@
+"""
+async_crawler.py
+
+Concurrent crawl mode for scrap_static_details.py.
+
+The fetchers in scrap_static_details are blocking (requests), so each call runs
+in a worker thread while asyncio schedules them. A fixed number of listings is
+in flight at once (--concurrency) and every request waits on a per-host rate
+limiter (--rate) so we stay polite to magicbricks.com.
+
+Once a detail page is parsed, the locality-ratings call and the gallery call run
+in parallel; the price-trend call follows the gallery because it needs the
+psmid taken from the project photo URLs.
+
+Usage:
+    python scrap_static_details.py --async --concurrency 32 --rate 8
+"""
+
+import asyncio
+import time
+import traceback
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from crawl_state import content_hash
+from scrap_static_details import (
+    build_property_details,
+    clean_property_data,
+    extract_psmid,
+    fetch_gallery_photos,
+    fetch_investment_data,
+    fetch_locality_ratings,
+    fetch_property_page,
+    parse_property_page,
+)
+
+API_HOST = "www.magicbricks.com"
+
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least 1/rate seconds apart."""
+
+    def __init__(self, rate_per_host):
+        self.interval = 1.0 / rate_per_host if rate_per_host and rate_per_host > 0 else 0.0
+        self._next_slot = defaultdict(float)
+        self._locks = defaultdict(asyncio.Lock)
+
+    async def wait(self, host):
+        if not self.interval:
+            return
+        async with self._locks[host]:
+            now = time.monotonic()
+            slot = max(now, self._next_slot[host])
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AsyncCrawler:
+    def __init__(self, concurrency=16, rate_per_host=4.0, state=None, failed=None):
+        self.concurrency = max(1, concurrency)
+        self.limiter = HostRateLimiter(rate_per_host)
+        self.state = state
+        self.failed = failed if failed is not None else set()
+
+    async def _call(self, host, fn, *args):
+        await self.limiter.wait(host)
+        return await asyncio.to_thread(fn, *args)
+
+    async def _photos_and_investment(self, page):
+        property_id = page["property_id"]
+        if property_id:
+            photos = await self._call(API_HOST, fetch_gallery_photos, property_id)
+        else:
+            photos = ([], [], [])
+        psmid = extract_psmid(photos[1], photos[0])
+        investment = await self._call(
+            API_HOST, fetch_investment_data,
+            psmid, page["property_type_code"], page["locality_id"], page["locality"],
+        )
+        return photos, investment
+
+    async def crawl_property(self, url):
+        html = await self._call(urlsplit(url).netloc, fetch_property_page, url, self.state)
+        if html is None:
+            return None
+        details, page = parse_property_page(html, url)
+        if self.state is not None and self.state.unchanged(url, content_hash([details, page])):
+            return None
+
+        (photos, investment), locality_ratings = await asyncio.gather(
+            self._photos_and_investment(page),
+            self._call(API_HOST, fetch_locality_ratings, page["locality_id"]),
+        )
+        details = build_property_details(details, page, photos, investment, locality_ratings)
+        details = clean_property_data(details)
+        details["Property URL"] = url
+        return details
+
+    async def _worker(self, queue, results):
+        while True:
+            item = await queue.get()
+            if item is None:
+                queue.task_done()
+                return
+            index, url = item
+            try:
+                results[index] = await self.crawl_property(url)
+                print(f"Scraped details for {url}" if results[index] is not None else f"Unchanged: {url}")
+            except Exception as e:
+                print(f"Failed to scrape {url}: {e}")
+                traceback.print_exc()
+                if self.state is not None:
+                    self.state.discard(url)
+                self.failed.add(url)
+            finally:
+                queue.task_done()
+
+    async def crawl(self, links):
+        """Crawl every link and return the scraped records in input order (failures and unchanged pages are dropped)."""
+        # every listing can have up to two API calls in flight at once
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=self.concurrency * 2)
+        )
+        results = [None] * len(links)
+        queue = asyncio.Queue()
+        for item in enumerate(links):
+            queue.put_nowait(item)
+        workers = [asyncio.create_task(self._worker(queue, results)) for _ in range(self.concurrency)]
+        for _ in workers:
+            queue.put_nowait(None)
+        await asyncio.gather(*workers)
+        return [r for r in results if r is not None]
+
+
+def run_crawl(links, concurrency=16, rate_per_host=4.0, state=None, failed=None):
+    crawler = AsyncCrawler(concurrency=concurrency, rate_per_host=rate_per_host, state=state, failed=failed)
+    return asyncio.run(crawler.crawl(links))
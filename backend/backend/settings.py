@@ -121,3 +121,7 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Price estimator artifact, written by `manage.py train_price_model`
+
+PRICE_MODEL_PATH = BASE_DIR / 'price_model.npz'
@@ -1,5 +1,5 @@
 from django.contrib import admin
 from .models import *
 # Register your models here.
-for model in [Property, HistoricalPrice, LocalityRating, PropertyPhoto, LocalityPhoto, SavedProperty]:
+for model in [Locality, Property, HistoricalPrice, LocalityRating, LocalityStats, PropertyPhoto, LocalityPhoto, SavedProperty, DatasetVersion]:
     admin.site.register(model)
\ No newline at end of file
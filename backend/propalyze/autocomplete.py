@@ -0,0 +1,159 @@
+"""
+In-memory autocomplete for cities (Property.region) and localities.
+
+Names are normalized and inserted into a character trie, once per word start,
+so "bopal" finds "Ambli Bopal Road". Every trie node keeps the TOP_K entries
+below it ordered by listing count, so a prefix lookup is a walk of len(q)
+nodes plus a copy of a short list.
+
+Typos are handled by walking the trie with an optimal-string-alignment
+edit-distance row per node (adjacent transpositions count as one edit) and
+pruning any branch whose row minimum exceeds the allowed number of edits; a
+node whose last cell is within the budget contributes its top entries, i.e.
+the query matches some prefix of those names with at most that many edits
+("Gotta" -> "Gota").
+
+Cities and the localities of each region have their own tries, so the
+dependent Locality dropdown ranks within the chosen city. The index is built
+from the database and rebuilt when the properties DatasetVersion moves.
+"""
+
+import re
+
+from django.db.models import Count
+
+from .dataset_cache import DatasetCache
+from .models import Locality, Property
+
+TOP_K = 10
+NON_WORD_RE = re.compile(r"[^\w\s]+")
+SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text):
+    return SPACE_RE.sub(" ", NON_WORD_RE.sub(" ", text.lower())).strip()
+
+
+def max_edits(query):
+    """Typos tolerated for a query of this length."""
+    if len(query) < 4:
+        return 0
+    return 1 if len(query) <= 6 else 2
+
+
+class _Node:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.top = []
+
+
+class Trie:
+    def __init__(self, entries):
+        """entries: [(name, region, count)]; ranked by count, then name."""
+        self.entries = sorted(entries, key=lambda e: (-e[2], e[0]))
+        self.root = _Node()
+        for i, (name, _, _) in enumerate(self.entries):
+            key = normalize(name)
+            starts = [0] + [m.end() for m in re.finditer(" ", key)]
+            for start in starts:
+                node = self.root
+                for ch in key[start:]:
+                    node = node.children.setdefault(ch, _Node())
+                    # entries arrive in rank order, so the first TOP_K are the best
+                    if len(node.top) < TOP_K and (not node.top or node.top[-1] != i):
+                        node.top.append(i)
+
+    def prefix(self, query):
+        node = self.root
+        for ch in query:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return list(node.top)
+
+    def fuzzy(self, query, edits):
+        """{entry: distance} for entries with a prefix within `edits` edits of query."""
+        found = {}
+        first = list(range(len(query) + 1))
+        for ch, child in self.root.children.items():
+            self._walk(child, ch, query, edits, first, None, None, found)
+        return found
+
+    def _walk(self, node, ch, query, edits, prev, prev2, prev_ch, found):
+        d = prev[0] + 1
+        row = [d]
+        best = d
+        for j in range(1, len(query) + 1):
+            # min of insert (d + 1), delete (prev[j] + 1) and substitute / match
+            q = query[j - 1]
+            d = min(d + 1, prev[j] + 1, prev[j - 1] + (q != ch))
+            if prev2 is not None and j > 1 and q == prev_ch and query[j - 2] == ch and prev2[j - 2] + 1 < d:
+                d = prev2[j - 2] + 1
+            row.append(d)
+            if d < best:
+                best = d
+        if d <= edits:
+            for i in node.top:
+                if d < found.get(i, edits + 1):
+                    found[i] = d
+            return
+        if best > edits:
+            return
+        for next_ch, child in node.children.items():
+            self._walk(child, next_ch, query, edits, row, prev, ch, found)
+
+    def search(self, query, limit=TOP_K):
+        """[(name, region, count)]: prefix matches by count, then typo matches by distance and count."""
+        query = normalize(query)
+        if not query:
+            return self.entries[:limit]
+        hits = self.prefix(query)[:limit]
+        if len(hits) < limit and max_edits(query):
+            seen = set(hits)
+            fuzzy = sorted((d, i) for i, d in self.fuzzy(query, max_edits(query)).items() if i not in seen)
+            hits += [i for _, i in fuzzy[:limit - len(hits)]]
+        return [self.entries[i] for i in hits]
+
+
+class AutocompleteIndex:
+    def __init__(self, cities, localities):
+        """cities: [(name, count)]; localities: [(name, region, count)]."""
+        self.cities = Trie([(name, None, count) for name, count in cities])
+        self.localities = Trie(localities)
+        by_region = {}
+        for name, region, count in localities:
+            by_region.setdefault(normalize(region or ""), []).append((name, region, count))
+        self.localities_in = {region: Trie(entries) for region, entries in by_region.items()}
+
+    @classmethod
+    def from_db(cls):
+        cities = (
+            Property.objects.exclude(region=None).exclude(region="")
+            .values_list("region").annotate(n=Count("pk")).order_by()
+        )
+        localities = (
+            Locality.objects.exclude(name=None).exclude(name="")
+            .annotate(n=Count("properties")).filter(n__gt=0)
+            .values_list("name", "region", "n")
+        )
+        return cls(list(cities), list(localities))
+
+    def search(self, kind, query, region=None, limit=TOP_K):
+        if kind == "city":
+            trie = self.cities
+        elif region:
+            trie = self.localities_in.get(normalize(region))
+            if trie is None:
+                return []
+        else:
+            trie = self.localities
+        return trie.search(query, limit)
+
+
+_index = DatasetCache(AutocompleteIndex.from_db)
+
+
+def get_index():
+    return _index.get()
@@ -0,0 +1,27 @@
+import threading
+
+from .models import DatasetVersion
+
+
+class DatasetCache:
+    """
+    A process-wide value built from the database (an index, a lookup table)
+    and rebuilt on first use after its DatasetVersion moved. Checking costs one
+    single-row query; the loader bumps the version in every chunk it writes.
+    """
+
+    def __init__(self, build, name=DatasetVersion.PROPERTIES):
+        self.build = build
+        self.name = name
+        self._value = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = DatasetVersion.current(self.name)
+        if self._value is None or self._version != version:
+            with self._lock:
+                if self._value is None or self._version != version:
+                    self._value = self.build()
+                    self._version = version
+        return self._value
@@ -0,0 +1,112 @@
+"""
+In-process spatial index over Property latitude / longitude.
+
+Points are bucketed into CELL_DEG x CELL_DEG grid cells and stored in numpy
+arrays sorted by cell key (row-major: latitude cell, then longitude cell), so
+the cells of one latitude row that a query touches form one contiguous slice.
+A radius query gathers those few slices and computes exact haversine
+distances on just that candidate set; k-nearest widens the radius until it
+holds k matches.
+
+The index is built from the database on first use and rebuilt when the
+properties DatasetVersion moves (the loader bumps it), so every worker process
+keeps its own copy and only pays one small query per lookup to stay fresh.
+Longitudes are not wrapped at the antimeridian.
+"""
+
+import math
+
+import numpy as np
+
+from .dataset_cache import DatasetCache
+from .models import Property
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEG = 0.01  # ~1.1 km of latitude
+MAX_RADIUS_KM = 200.0
+LON_CELLS = int(round(360 / CELL_DEG)) + 1
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance; scalars or numpy arrays."""
+    lat1, lon1, lat2, lon2 = np.radians(lat1), np.radians(lon1), np.radians(lat2), np.radians(lon2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _cell(lat, lon):
+    return np.floor(lat / CELL_DEG).astype(np.int64), np.floor((lon + 180) / CELL_DEG).astype(np.int64)
+
+
+class SpatialIndex:
+    def __init__(self, ids, lat, lon, bhk=None, property_type=None):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        row, col = _cell(lat, lon)
+        key = row * LON_CELLS + col
+        order = np.argsort(key, kind="stable")
+        self.key = key[order]
+        self.lat = lat[order]
+        self.lon = lon[order]
+        self.ids = np.asarray(ids, dtype=object)[order]
+        n = len(order)
+        self.bhk = np.asarray([-1 if b is None else b for b in bhk] if bhk is not None else [-1] * n, dtype=np.int64)[order]
+        self.property_type = np.asarray(property_type if property_type is not None else [None] * n, dtype=object)[order]
+
+    def __len__(self):
+        return len(self.key)
+
+    @classmethod
+    def from_db(cls):
+        rows = list(
+            Property.objects.filter(latitude__isnull=False, longitude__isnull=False)
+            .values_list("property_id", "latitude", "longitude", "bhk", "property_type")
+        )
+        columns = list(zip(*rows)) if rows else [[], [], [], [], []]
+        return cls(*columns)
+
+    def _candidates(self, lat, lon, radius_km):
+        """Positions of the points in the grid cells covering the circle's bounding box."""
+        dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        cos_lat = math.cos(math.radians(min(abs(lat) + dlat, 89.9)))
+        dlon = min(dlat / cos_lat, 180.0)
+        row0, col0 = _cell(np.float64(lat - dlat), np.float64(lon - dlon))
+        row1, col1 = _cell(np.float64(lat + dlat), np.float64(lon + dlon))
+        starts = np.arange(row0, row1 + 1) * LON_CELLS
+        lo = np.searchsorted(self.key, starts + col0, side="left")
+        hi = np.searchsorted(self.key, starts + col1, side="right")
+        spans = [np.arange(a, b) for a, b in zip(lo, hi) if b > a]
+        return np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+
+    def within(self, lat, lon, radius_km, bhk=None, property_type=None, exclude=None, limit=None):
+        """[(property_id, distance_km)] within radius_km, nearest first."""
+        idx = self._candidates(lat, lon, radius_km)
+        if bhk is not None:
+            idx = idx[np.isin(self.bhk[idx], bhk)]
+        if property_type is not None:
+            idx = idx[np.isin(self.property_type[idx], property_type)]
+        if exclude is not None:
+            idx = idx[self.ids[idx] != exclude]
+        dist = haversine_km(lat, lon, self.lat[idx], self.lon[idx])
+        keep = dist <= radius_km
+        idx, dist = idx[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")[:limit]
+        return [(self.ids[i], float(d)) for i, d in zip(idx[order], dist[order])]
+
+    def nearest(self, lat, lon, k, max_km=MAX_RADIUS_KM, **filters):
+        """The k nearest [(property_id, distance_km)] within max_km; the radius doubles until k are found."""
+        radius = CELL_DEG * 111.0
+        while True:
+            radius = min(radius, max_km)
+            results = self.within(lat, lon, radius, limit=k, **filters)
+            if len(results) >= k or radius >= max_km:
+                return results
+            radius *= 2
+
+
+_index = DatasetCache(SpatialIndex.from_db)
+
+
+def get_index():
+    """The process-wide index, rebuilt when the properties dataset version changed."""
+    return _index.get()
@@ -0,0 +1,262 @@
+"""
+Batched loading of cleaned property records into the database.
+
+Records are read one at a time from a JSON array or JSONL file
+(schema.iter_json_values), grouped into chunks, and every chunk is written
+with bulk_create inside a single transaction: one INSERT per batch_size rows
+per table instead of one round-trip and commit per row. Records are decoded and validated through
+schema.PropertyRecord, the same schema clean_data.py writes.
+
+Locality ratings, photos and price trends are stored once per Locality:
+sync_localities creates the chunk's missing localities and replaces their data
+only where the chunk carries something different.
+
+Every chunk that changes properties bumps the "properties" DatasetVersion in
+the same transaction, which tells in-process indexes (geo.get_index) to rebuild.
+
+upsert_chunk applies a chunk to a database that may already hold some of its
+properties (e.g. the nightly crawl): changed properties are updated in place
+and their photo rows are replaced only when they differ.
+"""
+
+from itertools import islice
+
+from django.db import transaction
+
+from .models import DatasetVersion, Locality, Property, HistoricalPrice, LocalityRating, PropertyPhoto, LocalityPhoto
+from .schema import RATING_FIELDS, PropertyRecord, locality_key
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHUNK_SIZE = 5000
+
+UPDATE_FIELDS = [f.attname for f in Property._meta.concrete_fields if not f.primary_key]
+LOCALITY_FIELD = UPDATE_FIELDS.index("locality_ref_id")
+
+
+def decode_records(items):
+    """Validated PropertyRecords for a chunk of cleaned JSON records; raises SchemaError (a ValueError)."""
+    return [PropertyRecord.from_dict(item) for item in items]
+
+
+def _batches(values, size):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+# ---------- Localities ----------
+def _locality_updates(records):
+    """
+    Locality data carried by a chunk, per locality key. Records of the same
+    locality repeat the same data; the last non-empty value wins, so a listing
+    whose locality calls failed does not wipe what others brought.
+    """
+    updates = {}
+    for record in records:
+        key = record.locality_key()
+        if key is None:
+            continue
+        update = updates.get(key)
+        if update is None:
+            update = updates[key] = {"record": record, "rating": None, "photos": None, "prices": {}}
+        rating = record.rating_kwargs()
+        if rating is not None:
+            update["rating"] = tuple(rating[f] for f in RATING_FIELDS)
+        if record.locality_photos:
+            update["photos"] = record.locality_photos
+        points = record.price_points()
+        if points:
+            update["prices"][record.property_type] = points
+    return updates
+
+
+def _locality_ids(keys, batch_size):
+    ids = {}
+    for batch in _batches(keys, batch_size):
+        ids.update(Locality.objects.filter(key__in=batch).values_list("key", "id"))
+    return ids
+
+
+def _adopt_name_keyed(updates, ids, batch_size):
+    """
+    Localities stored without a magicbricks id (migration 0003, older cleaned
+    files) are keyed by name. The first record that brings the id upgrades
+    that row's key instead of creating a second Locality, so its rating,
+    photos and price history stay attached. Adds the adopted keys to ids.
+    """
+    by_name_key = {}
+    for key, u in updates.items():
+        record = u["record"]
+        if key not in ids and record.locality_id:
+            name_key = locality_key(None, record.region, record.locality)
+            if name_key is not None:
+                by_name_key.setdefault(name_key, key)
+    adopted = []
+    for batch in _batches(list(by_name_key), batch_size):
+        adopted.extend(Locality.objects.filter(key__in=batch, magicbricks_id__isnull=True))
+    for locality in adopted:
+        key = by_name_key[locality.key]
+        locality.key = key
+        locality.magicbricks_id = updates[key]["record"].locality_id
+        ids[key] = locality.pk
+    Locality.objects.bulk_update(adopted, ["key", "magicbricks_id"], batch_size=batch_size)
+
+
+def _locality_state(ids, batch_size):
+    """Stored (rating, photos, {property type: price points}) per locality id."""
+    state = {pk: [None, [], {}] for pk in ids}
+    for batch in _batches(ids, batch_size):
+        for row in LocalityRating.objects.filter(locality_id__in=batch).values_list("locality_id", *RATING_FIELDS):
+            state[row[0]][0] = tuple(row[1:])
+        for pk, url in LocalityPhoto.objects.filter(locality_id__in=batch).order_by("id").values_list("locality_id", "image_url"):
+            state[pk][1].append(url)
+        for pk, property_type, month, price in (HistoricalPrice.objects.filter(locality_id__in=batch).order_by("id")
+                                                 .values_list("locality_id", "property_type", "month", "price")):
+            state[pk][2].setdefault(property_type, []).append((month, price))
+    return state
+
+
+def sync_localities(records, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Create the localities a chunk refers to and bring their rating, photos and
+    price trends up to date, deleting and re-inserting only what differs.
+    Must run inside the chunk's transaction. Returns {locality key: id}.
+    """
+    updates = _locality_updates(records)
+    ids = _locality_ids(list(updates), batch_size)
+    _adopt_name_keyed(updates, ids, batch_size)
+    new = [
+        Locality(key=key, magicbricks_id=u["record"].locality_id, name=u["record"].locality, region=u["record"].region)
+        for key, u in updates.items() if key not in ids
+    ]
+    if new:
+        Locality.objects.bulk_create(new, batch_size=batch_size)
+        ids.update(_locality_ids([loc.key for loc in new], batch_size))
+
+    state = _locality_state([ids[key] for key in updates], batch_size)
+    ratings, photos, prices = [], [], []
+    stale_ratings, stale_photos, stale_prices = [], [], {}
+    for key, u in updates.items():
+        pk = ids[key]
+        rating, urls, series = state[pk]
+        if u["rating"] is not None and u["rating"] != rating:
+            if rating is not None:
+                stale_ratings.append(pk)
+            ratings.append(LocalityRating(locality_id=pk, **dict(zip(RATING_FIELDS, u["rating"]))))
+        if u["photos"] is not None and u["photos"] != urls:
+            stale_photos.append(pk)
+            photos.extend(LocalityPhoto(locality_id=pk, image_url=url) for url in u["photos"])
+        for property_type, points in u["prices"].items():
+            if points != series.get(property_type):
+                stale_prices.setdefault(property_type, []).append(pk)
+                prices.extend(HistoricalPrice(locality_id=pk, property_type=property_type, month=month, price=price)
+                              for month, price in points)
+
+    for batch in _batches(stale_ratings, batch_size):
+        LocalityRating.objects.filter(locality_id__in=batch).delete()
+    for batch in _batches(stale_photos, batch_size):
+        LocalityPhoto.objects.filter(locality_id__in=batch).delete()
+    for property_type, pks in stale_prices.items():
+        for batch in _batches(pks, batch_size):
+            HistoricalPrice.objects.filter(locality_id__in=batch, property_type=property_type).delete()
+    LocalityRating.objects.bulk_create(ratings, batch_size=batch_size)
+    LocalityPhoto.objects.bulk_create(photos, batch_size=batch_size)
+    HistoricalPrice.objects.bulk_create(prices, batch_size=batch_size)
+    return ids
+
+
+# ---------- Properties ----------
+def build_property(record, localities):
+    property_obj = Property(**record.to_model_kwargs())
+    property_obj.locality_ref_id = localities.get(record.locality_key())
+    return property_obj
+
+
+def photo_rows(record):
+    return [PropertyPhoto(property_id=record.property_id, image_url=url) for url in record.photos]
+
+
+def load_chunk(items, batch_size=DEFAULT_BATCH_SIZE, touched=None):
+    """
+    Insert one chunk of records and all their child rows in a single transaction; returns the property count.
+    The ids of the localities involved are added to `touched` (for stats.refresh_locality_stats).
+    """
+    records = decode_records(items)
+    with transaction.atomic():
+        localities = sync_localities(records, batch_size)
+        if touched is not None:
+            touched.update(localities.values())
+        properties = [build_property(record, localities) for record in records]
+        Property.objects.bulk_create(properties, batch_size=batch_size)
+        PropertyPhoto.objects.bulk_create([p for record in records for p in photo_rows(record)], batch_size=batch_size)
+        DatasetVersion.bump()
+    return len(properties)
+
+
+def iter_chunks(items, chunk_size=DEFAULT_CHUNK_SIZE):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _existing_state(ids, batch_size):
+    """Current field values and photo urls of the given property ids, keyed by property_id."""
+    names = ["property_id"] + UPDATE_FIELDS
+    fields, photos = {}, {}
+    for batch in _batches(ids, batch_size):
+        for row in Property.objects.filter(pk__in=batch).values_list(*names):
+            fields[row[0]] = row[1:]
+            photos[row[0]] = []
+        for pid, url in PropertyPhoto.objects.filter(property_id__in=batch).order_by("id").values_list("property_id", "image_url"):
+            photos[pid].append(url)
+    return fields, photos
+
+
+def upsert_chunk(items, batch_size=DEFAULT_BATCH_SIZE, touched=None):
+    """
+    Insert new properties, update changed ones and leave identical ones alone,
+    in a single transaction. Photo rows are deleted and re-inserted only for
+    properties whose photos differ; locality data goes through sync_localities.
+    Returns (inserted, updated, unchanged); like load_chunk, collects the
+    involved locality ids (old and new) in `touched`.
+    """
+    # the last occurrence of a property_id within the chunk wins
+    latest = {record.property_id: record for record in decode_records(items)}
+    with transaction.atomic():
+        localities = sync_localities(list(latest.values()), batch_size)
+        fields, photos = _existing_state(list(latest), batch_size)
+        if touched is not None:
+            touched.update(localities.values())
+            # a property that moved locality changes its old locality's stats too
+            touched.update(row[LOCALITY_FIELD] for row in fields.values() if row[LOCALITY_FIELD] is not None)
+        write, stale_photos, new_photos = [], [], []
+        inserted = updated = unchanged = 0
+        for pid, record in latest.items():
+            property_obj = build_property(record, localities)
+            if pid not in fields:
+                write.append(property_obj)
+                new_photos.extend(photo_rows(record))
+                inserted += 1
+                continue
+            changed = tuple(getattr(property_obj, f) for f in UPDATE_FIELDS) != fields[pid]
+            if changed:
+                write.append(property_obj)
+            if record.photos != photos[pid]:
+                stale_photos.append(pid)
+                new_photos.extend(photo_rows(record))
+                changed = True
+            if changed:
+                updated += 1
+            else:
+                unchanged += 1
+
+        Property.objects.bulk_create(write, batch_size=batch_size, update_conflicts=True,
+                                     unique_fields=["property_id"], update_fields=UPDATE_FIELDS)
+        for batch in _batches(stale_photos, batch_size):
+            PropertyPhoto.objects.filter(property_id__in=batch).delete()
+        PropertyPhoto.objects.bulk_create(new_photos, batch_size=batch_size)
+        if write:
+            DatasetVersion.bump()
+    return inserted, updated, unchanged
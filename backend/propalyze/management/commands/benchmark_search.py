@@ -0,0 +1,119 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from propalyze.models import Property
+
+REGIONS = ["Ahmedabad", "Surat", "Vadodara", "Rajkot", "Gandhinagar", "Mumbai", "Pune", "Bangalore"]
+PROPERTY_TYPES = ["Apartment", "SingleFamilyResidence", "Villa", "Penthouse", "Studio Apartment"]
+FURNISHING = ["Unfurnished", "Semi-Furnished", "Furnished"]
+LOCALITIES_PER_REGION = 150
+INSERT_BATCH = 10000
+
+
+def query_shapes():
+    """(label, queryset builder) for the filter combinations of the search UI."""
+    def pick(values):
+        return random.choice(values)
+
+    def region():
+        return pick(REGIONS)
+
+    def locality(r):
+        return f"{r} Locality {random.randrange(LOCALITIES_PER_REGION)}"
+
+    def budget():
+        low = random.randrange(20, 200) * 100000
+        return low, low * 2
+
+    return [
+        ("region + budget", lambda: Property.objects.filter(
+            region=region(), price_in_inr__range=budget())),
+        ("region + bhk + budget", lambda: Property.objects.filter(
+            region=region(), bhk=random.randint(1, 5), price_in_inr__range=budget())),
+        ("region + type + bhk + budget", lambda: Property.objects.filter(
+            region=region(), property_type=pick(PROPERTY_TYPES), bhk=random.randint(1, 5), price_in_inr__range=budget())),
+        ("region + type + bhk + furnishing", lambda: Property.objects.filter(
+            region=region(), property_type=pick(PROPERTY_TYPES), bhk=random.randint(1, 5),
+            furnished_status=pick(FURNISHING))),
+        ("locality + bhk + budget", lambda: (lambda r: Property.objects.filter(
+            region=r, locality=locality(r), bhk=random.randint(1, 5), price_in_inr__range=budget()))(region())),
+    ]
+
+
+class Command(BaseCommand):
+    help = ("Time the property search queries against synthetic rows, with and without the search indexes. "
+            "Everything runs in one transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000000, help="Synthetic properties to insert (default: 1000000)")
+        parser.add_argument("--repeat", type=int, default=50, help="Runs per query shape (default: 50)")
+        parser.add_argument("--page-size", type=int, default=20, help="Results fetched per query (default: 20)")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.insert_rows(options["rows"], options["seed"])
+            self.run_shapes("with indexes", options)
+            # plain DROP INDEX: the SQLite schema editor refuses to run inside atomic(), but the DDL rolls back fine
+            with connection.cursor() as cursor:
+                for index in Property._meta.indexes:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(index.name)}")
+            self.run_shapes("without indexes", options)
+            transaction.set_rollback(True)
+
+    def insert_rows(self, rows, seed):
+        rng = random.Random(seed)
+        start = time.time()
+        for offset in range(0, rows, INSERT_BATCH):
+            batch = []
+            for i in range(offset, min(offset + INSERT_BATCH, rows)):
+                region = rng.choice(REGIONS)
+                bhk = rng.randint(1, 5)
+                area = rng.randint(400, 900) * bhk
+                batch.append(Property(
+                    property_id=f"bench-{i}",
+                    name=f"{bhk} BHK synthetic {i}",
+                    bhk=bhk,
+                    property_type=rng.choice(PROPERTY_TYPES),
+                    furnished_status=rng.choice(FURNISHING),
+                    region=region,
+                    locality=f"{region} Locality {rng.randrange(LOCALITIES_PER_REGION)}",
+                    total_area=area,
+                    price_in_inr=float(area * rng.randint(3000, 15000)),
+                ))
+            Property.objects.bulk_create(batch, batch_size=1000)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Property._meta.db_table}")
+        self.stdout.write(f"Inserted {rows} synthetic properties in {time.time() - start:.1f}s")
+
+    @staticmethod
+    def explain(queryset, label):
+        if connection.vendor != "sqlite":
+            return queryset.explain()
+        # sqlite3 caches statements by SQL text and a cached EXPLAIN keeps the plan it was prepared with,
+        # so the second pass would still show the dropped indexes; a per-pass comment avoids the cache
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql} -- {label}", params)
+            return "\n".join(row[-1] for row in cursor.fetchall())
+
+    def run_shapes(self, label, options):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label} =="))
+        random.seed(options["seed"])
+        for name, build in query_shapes():
+            page = build().order_by("price_in_inr")
+            self.stdout.write(self.style.SUCCESS(name))
+            self.stdout.write("  plan: " + self.explain(page, label).replace("\n", "\n        "))
+            times = []
+            for _ in range(options["repeat"]):
+                qs = build().order_by("price_in_inr")
+                t = time.perf_counter()
+                list(qs[:options["page_size"]])
+                qs.count()
+                times.append((time.perf_counter() - t) * 1000)
+            self.stdout.write(f"  first page + count: median {statistics.median(times):.2f} ms, "
+                              f"max {max(times):.2f} ms ({options['repeat']} runs)")
@@ -1,82 +1,75 @@
-import json
-from django.core.management.base import BaseCommand
-from propalyze.models import Property, HistoricalPrice, LocalityRating, PropertyPhoto, LocalityPhoto
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from propalyze.loaders import (
+    DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE, iter_chunks, load_chunk, upsert_chunk,
+)
+from propalyze.schema import SchemaError, iter_json_values
+from propalyze.stats import refresh_locality_stats
 
 
 class Command(BaseCommand):
-    help = "Insert properties from a cleaned JSON file into the database (one-time load)"
+    help = "Insert properties from a cleaned JSON or JSONL file into the database"
 
     def add_arguments(self, parser):
         parser.add_argument("json_file", type=str, help="Path to the JSON file")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f"Rows per INSERT statement (default: {DEFAULT_BATCH_SIZE})")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                            help=f"Records per transaction (default: {DEFAULT_CHUNK_SIZE})")
+        parser.add_argument("--upsert", action="store_true",
+                            help="Update properties that already exist instead of failing on them; "
+                                 "photo and price rows are replaced only when they changed")
 
     def handle(self, *args, **options):
         file_path = options["json_file"]
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            f = open(file_path, "r", encoding="utf-8")
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"Error reading file: {e}"))
             return
 
-        for item in data:
-            # Create property
-            property_obj = Property.objects.create(
-                property_id=item["property_id"],
-                name=item.get("name"),
-                bhk=item.get("bhk"),
-                property_type=item.get("property_type"),
-                developer=item.get("developer"),
-                project=item.get("project"),
-                floor_current=item.get("floor_current"),
-                floor_total=item.get("floor_total"),
-                transaction_type=item.get("transaction_type"),
-                facing=item.get("facing"),
-                furnished_status=item.get("furnished_status"),
-                ownership_type=item.get("ownership_type"),
-                description=item.get("description"),
-                latitude=item.get("latitude"),
-                longitude=item.get("longitude"),
-                locality=item.get("locality"),
-                region=item.get("region"),
-                super_built_up_area=item.get("super_built_up_area"),
-                carpet_area=item.get("carpet_area"),
-                total_area=item.get("total_area"),
-                price_per_sqft=item.get("price_per_sqft"),
-                price_in_inr=item.get("price_in_inr"),
-                property_yield=item.get("property_yield"),
-                status=item.get("status"),
-                parking_count=item.get("parking_count"),
-                parking_type=item.get("parking_type"),
-                property_url=item.get("property_url"),
-            )
-
-            # Historical Prices
-            for hp in item.get("historical_prices", []):
-                HistoricalPrice.objects.create(
-                    property=property_obj,
-                    month=hp["month"],
-                    price=hp["price"]
-                )
-
-            # Locality Rating
-            if "locality_rating" in item:
-                LocalityRating.objects.create(
-                    property=property_obj,
-                    connectivity=item["locality_rating"].get("connectivity"),
-                    safety=item["locality_rating"].get("safety"),
-                    traffic=item["locality_rating"].get("traffic"),
-                    environment=item["locality_rating"].get("environment"),
-                    market=item["locality_rating"].get("market"),
-                    area_description=item["locality_rating"].get("area_description"),
-                )
-
-            # Property Photos
-            for url in item.get("photos", []):
-                PropertyPhoto.objects.create(property=property_obj, image_url=url)
+        start = time.time()
+        total = 0
+        inserted = updated = unchanged = 0
+        touched = set()
+        try:
+            with f:
+                try:
+                    for chunk in iter_chunks(iter_json_values(f), options["chunk_size"]):
+                        try:
+                            if options["upsert"]:
+                                i, u, n = upsert_chunk(chunk, options["batch_size"], touched)
+                                inserted, updated, unchanged = inserted + i, updated + u, unchanged + n
+                            else:
+                                inserted += load_chunk(chunk, options["batch_size"], touched)
+                        except SchemaError as e:
+                            raise CommandError(f"Invalid record among records {total + 1}-{total + len(chunk)}: {e}")
+                        except IntegrityError as e:
+                            raise CommandError(
+                                f"Records {total + 1}-{total + len(chunk)} were rolled back ({e}); "
+                                f"{total} records were applied before them"
+                            )
+                        total += len(chunk)
+                        self.stdout.write(f"{self._summary(inserted, updated, unchanged, options['upsert'])} "
+                                          f"({time.time() - start:.1f}s)")
+                except ValueError as e:
+                    raise CommandError(f"Error reading file after {total} records: {e}")
+        finally:
+            # chunks committed before a failure still changed these localities
+            if touched:
+                refreshed = refresh_locality_stats(touched)
+                self.stdout.write(f"Refreshed stats of {refreshed} localities")
 
-            # Locality Photos
-            for url in item.get("locality_photos", []):
-                LocalityPhoto.objects.create(property=property_obj, image_url=url)
+        self.stdout.write(self.style.SUCCESS(
+            f"{self._summary(inserted, updated, unchanged, options['upsert'])} in {time.time() - start:.1f}s"
+        ))
 
-            self.stdout.write(self.style.SUCCESS(f"Inserted {property_obj.name}"))
+    @staticmethod
+    def _summary(inserted, updated, unchanged, upsert):
+        if not upsert:
+            return f"Inserted {inserted} properties"
+        return f"Inserted {inserted}, updated {updated}, unchanged {unchanged} properties"
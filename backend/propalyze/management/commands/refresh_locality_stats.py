@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from propalyze.stats import refresh_all
+
+
+class Command(BaseCommand):
+    help = "Recompute LocalityStats for every locality (load_properties refreshes only the localities it touched)"
+
+    def handle(self, *args, **options):
+        start = time.time()
+        refreshed = refresh_all()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed stats of {refreshed} localities in {time.time() - start:.1f}s"))
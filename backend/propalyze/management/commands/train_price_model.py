@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from propalyze.pricing import DEFAULT_ALPHA, DEFAULT_FOLDS, DEFAULT_MIN_COUNT, train, training_rows
+
+
+class Command(BaseCommand):
+    help = "Train the price estimator from the properties in the database and write its .npz artifact"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", type=str, default=str(settings.PRICE_MODEL_PATH),
+                            help=f"Artifact path (default: {settings.PRICE_MODEL_PATH})")
+        parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA,
+                            help=f"Ridge penalty (default: {DEFAULT_ALPHA})")
+        parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS,
+                            help=f"Cross-validation folds for the price ranges (default: {DEFAULT_FOLDS})")
+        parser.add_argument("--min-count", type=int, default=DEFAULT_MIN_COUNT,
+                            help=f"Listings a locality, type, etc. needs to get its own weight (default: {DEFAULT_MIN_COUNT})")
+
+    def handle(self, *args, **options):
+        if options["folds"] < 2:
+            raise CommandError("--folds must be at least 2")
+        start = time.time()
+        rows, prices = training_rows()
+        try:
+            model = train(rows, prices, options["alpha"], options["folds"], options["min_count"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        model.save(options["output"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Trained on {model.meta['rows']} properties in {time.time() - start:.1f}s "
+            f"(cross-validated median error {100 * model.meta['cv_median_ape']:.1f}%); wrote {options['output']}"
+        ))
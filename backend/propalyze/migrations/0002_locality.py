@@ -0,0 +1,48 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('propalyze', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Locality',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=320, unique=True)),
+                ('magicbricks_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('name', models.CharField(blank=True, max_length=255, null=True)),
+                ('region', models.CharField(blank=True, max_length=255, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='locality_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='properties', to='propalyze.locality'),
+        ),
+        # nullable until 0003 has moved the rows over
+        migrations.AddField(
+            model_name='historicalprice',
+            name='locality',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='historical_prices', to='propalyze.locality'),
+        ),
+        migrations.AddField(
+            model_name='historicalprice',
+            name='property_type',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='localityrating',
+            name='locality',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rating', to='propalyze.locality'),
+        ),
+        migrations.AddField(
+            model_name='localityphoto',
+            name='locality',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='photos', to='propalyze.locality'),
+        ),
+    ]
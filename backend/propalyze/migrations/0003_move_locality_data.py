@@ -0,0 +1,79 @@
+"""
+Move locality ratings, photos and price trends from every property onto one
+Locality row per locality.
+
+Existing rows carry no magicbricks locality id, so localities are keyed by
+region and name. For each locality (and, for prices, each property type) the
+rows of the first property that has any are kept and re-pointed; the identical
+copies held by the other properties are deleted. Not reversible.
+"""
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def locality_key(region, name):
+    # schema.locality_key without a locality id, frozen as of this migration
+    name = (name or "").strip().lower()
+    if not name:
+        return None
+    return f"{(region or '').strip().lower()}|name:{name}"
+
+
+def move_to_localities(apps, schema_editor):
+    Locality = apps.get_model("propalyze", "Locality")
+    Property = apps.get_model("propalyze", "Property")
+    HistoricalPrice = apps.get_model("propalyze", "HistoricalPrice")
+    LocalityRating = apps.get_model("propalyze", "LocalityRating")
+    LocalityPhoto = apps.get_model("propalyze", "LocalityPhoto")
+
+    localities = {}  # key -> Locality
+    owner = {}  # property_id -> (locality key, property type)
+    properties = []
+    for prop in Property.objects.order_by("pk").only("pk", "locality", "region", "property_type").iterator():
+        key = locality_key(prop.region, prop.locality)
+        if key is None:
+            continue
+        if key not in localities:
+            localities[key] = Locality.objects.create(key=key, name=prop.locality.strip(), region=prop.region)
+        prop.locality_ref = localities[key]
+        properties.append(prop)
+        owner[prop.pk] = (key, prop.property_type)
+    Property.objects.bulk_update(properties, ["locality_ref"], batch_size=BATCH_SIZE)
+
+    # the first property with a rating / photos / price trend is the source for its locality
+    ratings = {}
+    for rating_id, pid in LocalityRating.objects.order_by("property_id").values_list("id", "property_id"):
+        if pid in owner:
+            ratings.setdefault(owner[pid][0], rating_id)
+    for key, rating_id in ratings.items():
+        LocalityRating.objects.filter(pk=rating_id).update(locality=localities[key])
+
+    photo_sources = {}
+    for pid in LocalityPhoto.objects.order_by("property_id").values_list("property_id", flat=True).distinct():
+        if pid in owner:
+            photo_sources.setdefault(owner[pid][0], pid)
+    for key, pid in photo_sources.items():
+        LocalityPhoto.objects.filter(property_id=pid).update(locality=localities[key])
+
+    price_sources = {}
+    for pid in HistoricalPrice.objects.order_by("property_id").values_list("property_id", flat=True).distinct():
+        if pid in owner:
+            price_sources.setdefault(owner[pid], pid)
+    for (key, property_type), pid in price_sources.items():
+        HistoricalPrice.objects.filter(property_id=pid).update(locality=localities[key], property_type=property_type)
+
+    for model in (LocalityRating, LocalityPhoto, HistoricalPrice):
+        model.objects.filter(locality=None).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('propalyze', '0002_locality'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_to_localities),
+    ]
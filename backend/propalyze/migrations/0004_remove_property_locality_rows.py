@@ -0,0 +1,39 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('propalyze', '0003_move_locality_data'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='historicalprice',
+            name='property',
+        ),
+        migrations.RemoveField(
+            model_name='localityrating',
+            name='property',
+        ),
+        migrations.RemoveField(
+            model_name='localityphoto',
+            name='property',
+        ),
+        migrations.AlterField(
+            model_name='historicalprice',
+            name='locality',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historical_prices', to='propalyze.locality'),
+        ),
+        migrations.AlterField(
+            model_name='localityrating',
+            name='locality',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rating', to='propalyze.locality'),
+        ),
+        migrations.AlterField(
+            model_name='localityphoto',
+            name='locality',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='photos', to='propalyze.locality'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('propalyze', '0004_remove_property_locality_rows'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['region', 'price_in_inr'], name='property_region_price'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['region', 'bhk', 'price_in_inr'], name='property_region_bhk_price'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['region', 'property_type', 'bhk', 'price_in_inr'], name='property_region_type_price'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['region', 'locality', 'bhk', 'price_in_inr'], name='property_locality_price'),
+        ),
+    ]
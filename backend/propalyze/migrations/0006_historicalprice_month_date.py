@@ -0,0 +1,86 @@
+"""
+Store HistoricalPrice.month as the first day of the month instead of labels
+like "Aug'24", so the series sorts and range-filters in SQL, and index it per
+(locality, property type). Rows whose label can't be read are dropped.
+"""
+
+import re
+from datetime import date
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# schema.parse_month, frozen as of this migration
+MONTHS = {m: i for i, m in enumerate(["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+MONTH_LABEL_RE = re.compile(r"^\s*([A-Za-z]{3})[A-Za-z]*\W*(\d{4}|\d{2})\s*$")
+
+
+def parse_month(label):
+    m = MONTH_LABEL_RE.match(label or "")
+    if not m or m.group(1).lower() not in MONTHS:
+        return None
+    year = int(m.group(2))
+    return date(year + 2000 if year < 100 else year, MONTHS[m.group(1).lower()], 1)
+
+
+def labels_to_dates(apps, schema_editor):
+    HistoricalPrice = apps.get_model("propalyze", "HistoricalPrice")
+    rows, unreadable = [], []
+    for row in HistoricalPrice.objects.only("id", "month").iterator():
+        row.month_date = parse_month(row.month)
+        if row.month_date is None:
+            unreadable.append(row.id)
+        else:
+            rows.append(row)
+    HistoricalPrice.objects.bulk_update(rows, ["month_date"], batch_size=BATCH_SIZE)
+    for i in range(0, len(unreadable), BATCH_SIZE):
+        HistoricalPrice.objects.filter(id__in=unreadable[i:i + BATCH_SIZE]).delete()
+
+
+def dates_to_labels(apps, schema_editor):
+    HistoricalPrice = apps.get_model("propalyze", "HistoricalPrice")
+    rows = list(HistoricalPrice.objects.only("id", "month_date"))
+    for row in rows:
+        row.month = row.month_date.strftime("%b'%y")
+    HistoricalPrice.objects.bulk_update(rows, ["month"], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('propalyze', '0005_property_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalprice',
+            name='month_date',
+            field=models.DateField(null=True),
+        ),
+        # the old column must accept NULL for the reverse direction
+        migrations.AlterField(
+            model_name='historicalprice',
+            name='month',
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.RunPython(labels_to_dates, dates_to_labels),
+        migrations.RemoveField(
+            model_name='historicalprice',
+            name='month',
+        ),
+        migrations.RenameField(
+            model_name='historicalprice',
+            old_name='month_date',
+            new_name='month',
+        ),
+        migrations.AlterField(
+            model_name='historicalprice',
+            name='month',
+            field=models.DateField(),
+        ),
+        migrations.AddIndex(
+            model_name='historicalprice',
+            index=models.Index(fields=['locality', 'property_type', 'month'], name='price_locality_type_month'),
+        ),
+    ]
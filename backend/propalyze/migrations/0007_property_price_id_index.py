@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('propalyze', '0006_historicalprice_month_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['price_in_inr', 'property_id'], name='property_price_id'),
+        ),
+    ]
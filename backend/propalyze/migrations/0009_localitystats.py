@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('propalyze', '0008_datasetversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocalityStats',
+            fields=[
+                ('locality', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='propalyze.locality')),
+                ('listing_count', models.PositiveIntegerField(default=0)),
+                ('avg_price_per_sqft', models.FloatField(blank=True, null=True)),
+                ('p25_price_per_sqft', models.FloatField(blank=True, null=True)),
+                ('p50_price_per_sqft', models.FloatField(blank=True, null=True)),
+                ('p75_price_per_sqft', models.FloatField(blank=True, null=True)),
+                ('median_price', models.FloatField(blank=True, null=True)),
+                ('avg_yield', models.FloatField(blank=True, null=True)),
+                ('rating_mean', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'locality stats',
+            },
+        ),
+    ]
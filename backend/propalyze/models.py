@@ -4,6 +4,21 @@ from django.db import models
 # app/models.py
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+class Locality(models.Model):
+    """
+    A magicbricks locality. Ratings, photos and the price trend belong to the
+    locality, not to each listing in it.
+    """
+    key = models.CharField(max_length=320, unique=True)  # see schema.locality_key
+    magicbricks_id = models.CharField(max_length=50, null=True, blank=True)
+    name = models.CharField(max_length=255, null=True, blank=True)
+    region = models.CharField(max_length=255, null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.region})"
 
 
 class Property(models.Model):
@@ -26,6 +41,7 @@ class Property(models.Model):
     longitude = models.FloatField(null=True, blank=True)
     locality = models.CharField(max_length=255, null=True, blank=True)
     region = models.CharField(max_length=255, null=True, blank=True)
+    locality_ref = models.ForeignKey(Locality, on_delete=models.SET_NULL, null=True, blank=True, related_name="properties")
 
     # Sizes and Prices
     super_built_up_area = models.FloatField(null=True, blank=True)
@@ -41,21 +57,41 @@ class Property(models.Model):
     parking_type = models.CharField(max_length=50, null=True, blank=True)
     property_url = models.URLField(max_length=500, null=True, blank=True)
 
+    class Meta:
+        # Search filters on city (region) first, then narrows by equality filters and a budget range.
+        # Equality columns lead, price_in_inr comes last so the range and ORDER BY price use the index.
+        # furnished_status has only a handful of values and is applied as a residual filter.
+        indexes = [
+            models.Index(fields=["region", "price_in_inr"], name="property_region_price"),
+            # keyset pagination order of /api/properties when no region is given
+            models.Index(fields=["price_in_inr", "property_id"], name="property_price_id"),
+            models.Index(fields=["region", "bhk", "price_in_inr"], name="property_region_bhk_price"),
+            models.Index(fields=["region", "property_type", "bhk", "price_in_inr"], name="property_region_type_price"),
+            models.Index(fields=["region", "locality", "bhk", "price_in_inr"], name="property_locality_price"),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.locality})"
 
 
 class HistoricalPrice(models.Model):
-    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name="historical_prices")
-    month = models.CharField(max_length=20)  # e.g. "Aug'24"
+    # the locality price trend depends on the property type as well
+    locality = models.ForeignKey(Locality, on_delete=models.CASCADE, related_name="historical_prices")
+    property_type = models.CharField(max_length=100, null=True, blank=True)
+    month = models.DateField()  # first day of the month; "Aug'24" in the scraped data
     price = models.FloatField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["locality", "property_type", "month"], name="price_locality_type_month"),
+        ]
+
     def __str__(self):
-        return f"{self.property.name} - {self.month}"
+        return f"{self.locality.name} - {self.month:%b'%y}"
 
 
 class LocalityRating(models.Model):
-    property = models.OneToOneField(Property, on_delete=models.CASCADE, related_name="locality_rating")
+    locality = models.OneToOneField(Locality, on_delete=models.CASCADE, related_name="rating")
     connectivity = models.FloatField(null=True, blank=True)
     safety = models.FloatField(null=True, blank=True)
     traffic = models.FloatField(null=True, blank=True)
@@ -64,7 +100,30 @@ class LocalityRating(models.Model):
     area_description = models.TextField(null=True, blank=True)
 
     def __str__(self):
-        return f"Locality Rating for {self.property.name}"
+        return f"Locality Rating for {self.locality.name}"
+
+
+class LocalityStats(models.Model):
+    """
+    Market aggregates of a locality's listings, precomputed by stats.refresh_locality_stats
+    for the localities each load touched.
+    """
+    locality = models.OneToOneField(Locality, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    listing_count = models.PositiveIntegerField(default=0)
+    avg_price_per_sqft = models.FloatField(null=True, blank=True)
+    p25_price_per_sqft = models.FloatField(null=True, blank=True)
+    p50_price_per_sqft = models.FloatField(null=True, blank=True)
+    p75_price_per_sqft = models.FloatField(null=True, blank=True)
+    median_price = models.FloatField(null=True, blank=True)
+    avg_yield = models.FloatField(null=True, blank=True)
+    rating_mean = models.FloatField(null=True, blank=True)  # mean of the locality's rating scores
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "locality stats"
+
+    def __str__(self):
+        return f"Stats for {self.locality.name}"
 
 
 class PropertyPhoto(models.Model):
@@ -76,11 +135,11 @@ class PropertyPhoto(models.Model):
 
 
 class LocalityPhoto(models.Model):
-    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name="locality_photos")
+    locality = models.ForeignKey(Locality, on_delete=models.CASCADE, related_name="photos")
     image_url = models.URLField(max_length=500)
 
     def __str__(self):
-        return f"Locality photo of {self.property.locality}"
+        return f"Locality photo of {self.locality.name}"
 
 
 class SavedProperty(models.Model):
@@ -90,3 +149,27 @@ class SavedProperty(models.Model):
 
     def __str__(self):
         return f"{self.user.username} saved {self.property.name}"
+
+
+class DatasetVersion(models.Model):
+    """
+    Change counter for a dataset. The loader bumps "properties" in every chunk
+    transaction; in-process indexes built from the table rebuild when it moves.
+    """
+    PROPERTIES = "properties"
+
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def current(cls, name=PROPERTIES):
+        return cls.objects.filter(name=name).values_list("version", flat=True).first() or 0
+
+    @classmethod
+    def bump(cls, name=PROPERTIES):
+        if not cls.objects.filter(name=name).update(version=models.F("version") + 1, updated_at=timezone.now()):
+            cls.objects.get_or_create(name=name, defaults={"version": 1})
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
@@ -0,0 +1,404 @@
+"""
+Price estimator: ridge regression of log(price_in_inr) on listing features,
+trained offline from Property by `manage.py train_price_model` into one .npz
+artifact and served from numpy arrays.
+
+Features are log area, BHK and floor (standardized; a missing value becomes
+the mean plus a "missing" flag) and one-hot region, locality, property type,
+furnishing and status. Category values seen fewer than min_count times get no
+column, and a value the model does not know contributes nothing, so an
+unlisted locality is priced at its region's level. Weights are kept per
+category vocabulary, so scoring a row is a dot product over the numeric
+columns plus one weight lookup per category.
+
+The range around an estimate comes from quantiles of cross-validated log
+residuals (in-sample residuals are too optimistic). Rows whose locality has a
+column and rows that fall back to their region have separate quantiles.
+
+Every worker loads the artifact on first use and reloads it when the file
+changes; train_price_model replaces the file atomically. The estimates of the
+stored listings are precomputed per worker as well (ListingScores) and redone
+when the model or the properties DatasetVersion moves.
+"""
+
+import math
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+from django.conf import settings
+
+from .models import DatasetVersion, Property
+
+FORMAT_VERSION = 1
+NUMERIC = ("area", "bhk", "floor")
+CATEGORIES = ("region", "locality", "property_type", "furnished_status", "status")
+QUANTILES = (0.1, 0.5, 0.9)  # low, point estimate, high: an 80% range
+BUCKETS = ("locality", "region")  # which residual quantiles apply: locality known or not
+DEFAULT_ALPHA = 1.0
+DEFAULT_FOLDS = 5
+DEFAULT_MIN_COUNT = 3
+MIN_TRAINING_ROWS = 10
+MIN_BUCKET_ROWS = 30  # a bucket with fewer residuals uses the quantiles of all of them
+MAX_FLOOR = 150  # larger floor numbers in the scraped data are areas in the wrong column
+MAX_AREA = 1_000_000  # sq ft
+MAX_BHK = 50
+CHUNK_ROWS = 4096
+
+LISTING_FIELDS = (
+    "bhk", "total_area", "carpet_area", "super_built_up_area", "price_in_inr", "price_per_sqft",
+    "floor_current", "floor_total", "region", "locality", "property_type", "furnished_status", "status",
+)
+
+
+class FeatureError(ValueError):
+    pass
+
+
+class ModelNotTrained(RuntimeError):
+    pass
+
+
+def _label(name, value):
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise FeatureError(f"{name} must be a string")
+    return value.strip().lower() or None
+
+
+def _positive(name, value, maximum, kind=float):
+    if value is None or value == "":
+        return None
+    # no silent coercion: True is not 1 and 2.7 is not 2 BHK
+    if isinstance(value, bool):
+        raise FeatureError(f"{name} must be a number")
+    if kind is int and isinstance(value, float) and not value.is_integer():
+        raise FeatureError(f"{name} must be a whole number")
+    try:
+        value = kind(value)
+    except (TypeError, ValueError, OverflowError):
+        raise FeatureError(f"{name} must be a number") from None
+    if not (math.isfinite(value) and 0 <= value <= maximum):
+        raise FeatureError(f"{name} must be between 0 and {maximum}")
+    return value
+
+
+def features(region=None, locality=None, property_type=None, furnished_status=None, status=None,
+             area=None, bhk=None, floor=None):
+    """Validated feature dict for one listing; area (sq ft) is required."""
+    area = _positive("area", area, MAX_AREA)
+    if not area:
+        raise FeatureError(f"area must be a positive number up to {MAX_AREA}")
+    region = _label("region", region)
+    locality = _label("locality", locality)
+    return {
+        "area": area,
+        "bhk": _positive("bhk", bhk, MAX_BHK, int),
+        "floor": _positive("floor", floor, MAX_FLOOR, int),
+        "region": region,
+        "locality": f"{region or ''}|{locality}" if locality else None,
+        "property_type": _label("property_type", property_type),
+        "furnished_status": _label("furnished_status", furnished_status),
+        "status": _label("status", status),
+    }
+
+
+def listing_features(row):
+    """Feature dict of a Property values() row (LISTING_FIELDS), or None when it has no usable area or BHK is implausible."""
+    area = row["total_area"] or row["carpet_area"] or row["super_built_up_area"]
+    if not area and row["price_in_inr"] and row["price_per_sqft"]:
+        area = row["price_in_inr"] / row["price_per_sqft"]
+    if not area or area <= 0:
+        return None
+    floor = row["floor_current"]
+    if floor is not None and (not 0 <= floor <= MAX_FLOOR or (row["floor_total"] and floor > row["floor_total"])):
+        floor = None
+    try:
+        return features(row["region"], row["locality"], row["property_type"], row["furnished_status"], row["status"],
+                        area, row["bhk"], floor)
+    except FeatureError:
+        return None
+
+
+def _raw_numeric(rows):
+    """(n, len(NUMERIC)) array: log area, bhk, floor; nan where missing."""
+    return np.array([
+        [math.log(r["area"]), np.nan if r["bhk"] is None else r["bhk"], np.nan if r["floor"] is None else r["floor"]]
+        for r in rows
+    ], dtype=np.float64).reshape(len(rows), len(NUMERIC))
+
+
+class PriceModel:
+    def __init__(self, numeric_mean, numeric_scale, numeric_coef, intercept, vocab, weights, baseline, quantiles, meta):
+        self.numeric_mean = numeric_mean
+        self.numeric_scale = numeric_scale
+        self.numeric_coef = numeric_coef  # standardized values, then missing flags
+        self.intercept = float(intercept)
+        self.vocab = vocab  # {category: {value: position}}
+        self.weights = weights  # {category: weights in vocabulary order}
+        # a trailing 0 so unknown values (position -1) index a zero weight
+        self._padded = {c: np.append(weights[c], 0.0) for c in CATEGORIES}
+        self.baseline = baseline  # per category, the mean weight over the training listings
+        self.quantiles = quantiles  # (len(BUCKETS), len(QUANTILES)) log residuals
+        self.meta = meta
+
+    # ---------- Scoring ----------
+    def _encode(self, rows):
+        raw = _raw_numeric(rows)
+        missing = np.isnan(raw)
+        num = np.where(missing, 0.0, (np.nan_to_num(raw) - self.numeric_mean) / self.numeric_scale)
+        idx = np.array([[self.vocab[c].get(r[c], -1) for c in CATEGORIES] for r in rows],
+                       dtype=np.intp).reshape(len(rows), len(CATEGORIES))
+        return np.hstack([num, missing]), idx
+
+    def _log_price(self, num, idx):
+        log_price = num @ self.numeric_coef + self.intercept
+        for j, c in enumerate(CATEGORIES):
+            log_price += self._padded[c][idx[:, j]]
+        return log_price
+
+    def ranges(self, rows):
+        """(n, 4) array of low, estimate, high and confidence (0-1) for feature dicts (see features())."""
+        if not rows:
+            return np.empty((0, 4))
+        num, idx = self._encode(rows)
+        log_price = self._log_price(num, idx)
+        bucket = (idx[:, CATEGORIES.index("locality")] < 0).astype(np.intp)
+        low, mid, high = np.exp(log_price[:, None] + self.quantiles[bucket]).T
+        # the 80% range relative to the estimate: +-10% gives 90
+        confidence = np.clip(1 - (high - low) / (2 * mid), 0, 1)
+        return np.column_stack([low, mid, high, confidence])
+
+    def estimate(self, rows):
+        """[{estimate, low, high, confidence}] for feature dicts."""
+        return [_result(*r) for r in self.ranges(rows).tolist()]
+
+    def factors(self, row):
+        """
+        [(category, effect)] for the categories the model knows: the price
+        relative to an average training listing, e.g. 0.12 for +12%.
+        """
+        _, idx = self._encode([row])
+        return [(c, math.expm1(self.weights[c][i] - self.baseline[j]))
+                for j, (c, i) in enumerate(zip(CATEGORIES, idx[0].tolist())) if i >= 0]
+
+    # ---------- Artifact ----------
+    def save(self, path):
+        arrays = {
+            "format": np.array(FORMAT_VERSION),
+            "numeric_mean": self.numeric_mean, "numeric_scale": self.numeric_scale,
+            "numeric_coef": self.numeric_coef, "intercept": np.array(self.intercept),
+            "baseline": self.baseline, "quantiles": self.quantiles,
+        }
+        for c in CATEGORIES:
+            arrays[f"vocab_{c}"] = np.array(list(self.vocab[c]), dtype=str)
+            arrays[f"weights_{c}"] = self.weights[c]
+        for key, value in self.meta.items():
+            arrays[f"meta_{key}"] = np.array(value)
+        # write next to the target and rename, so workers never read a partial file
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format"]) != FORMAT_VERSION:
+                raise ModelNotTrained(f"{path} has format {int(data['format'])}, expected {FORMAT_VERSION}; retrain it")
+            return cls(
+                data["numeric_mean"], data["numeric_scale"], data["numeric_coef"], data["intercept"],
+                {c: {v: i for i, v in enumerate(data[f"vocab_{c}"].tolist())} for c in CATEGORIES},
+                {c: data[f"weights_{c}"] for c in CATEGORIES},
+                data["baseline"], data["quantiles"],
+                {k[len("meta_"):]: data[k].item() for k in data.files if k.startswith("meta_")},
+            )
+
+
+def _result(low, mid, high, confidence):
+    return {"estimate": round(mid), "low": round(low), "high": round(high), "confidence": round(100 * confidence)}
+
+
+class ListingScores:
+    """
+    The estimates of every stored listing under one model, computed in one
+    vectorized pass, so scoring listings by property_id (Search and Compare
+    badges) needs neither a query nor feature encoding.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        ids, rows, prices = [], [], []
+        for pid, *values in Property.objects.values_list("property_id", *LISTING_FIELDS).iterator(chunk_size=CHUNK_ROWS):
+            row = dict(zip(LISTING_FIELDS, values))
+            feats = listing_features(row)
+            if feats is not None:
+                ids.append(pid)
+                rows.append(feats)
+                prices.append(row["price_in_inr"])
+        self.position = {pid: i for i, pid in enumerate(ids)}
+        self.prices = prices
+        self.ranges = model.ranges(rows)
+
+    def get(self, property_id):
+        """(estimate dict, asking price) of a listing, or None when it is unknown or has no area."""
+        i = self.position.get(property_id)
+        if i is None:
+            return None
+        return _result(*self.ranges[i].tolist()), self.prices[i]
+
+
+# ---------- Training ----------
+def training_rows():
+    """(feature dicts, prices) of the listings with a price and an area."""
+    rows, prices = [], []
+    for row in Property.objects.filter(price_in_inr__gt=0).values(*LISTING_FIELDS).iterator(chunk_size=CHUNK_ROWS):
+        feats = listing_features(row)
+        if feats is not None:
+            rows.append(feats)
+            prices.append(row["price_in_inr"])
+    return rows, np.array(prices, dtype=np.float64)
+
+
+def _design(num, idx, offsets, width):
+    """Dense design matrix: intercept, numeric columns, one-hot categories."""
+    n, k = num.shape
+    X = np.zeros((n, width))
+    X[:, 0] = 1.0
+    X[:, 1:1 + k] = num
+    for j, offset in enumerate(offsets):
+        known = idx[:, j] >= 0
+        X[np.flatnonzero(known), offset + idx[known, j]] = 1.0
+    return X
+
+
+def train(rows, prices, alpha=DEFAULT_ALPHA, folds=DEFAULT_FOLDS, min_count=DEFAULT_MIN_COUNT, seed=0):
+    """Fit a PriceModel to feature dicts and their prices; the meta holds the cross-validated error."""
+    n = len(rows)
+    if n < MIN_TRAINING_ROWS:
+        raise ValueError(f"need at least {MIN_TRAINING_ROWS} listings with a price and an area, found {n}")
+    y = np.log(prices)
+
+    raw = _raw_numeric(rows)
+    present = ~np.isnan(raw)
+    count = np.maximum(present.sum(axis=0), 1)
+    mean = np.where(present, raw, 0.0).sum(axis=0) / count
+    scale = np.sqrt((np.where(present, raw - mean, 0.0) ** 2).sum(axis=0) / count)
+    scale[scale == 0] = 1.0
+    vocab = {}
+    for c in CATEGORIES:
+        counts = Counter(r[c] for r in rows if r[c] is not None)
+        vocab[c] = {v: i for i, v in enumerate(sorted(v for v, count in counts.items() if count >= min_count))}
+    model = PriceModel(mean, scale, np.zeros(2 * len(NUMERIC)), 0.0, vocab,
+                       {c: np.zeros(len(vocab[c])) for c in CATEGORIES}, np.zeros(len(CATEGORIES)),
+                       np.zeros((len(BUCKETS), len(QUANTILES))), {})
+    num, idx = model._encode(rows)
+
+    offsets, width = [], 1 + num.shape[1]
+    for c in CATEGORIES:
+        offsets.append(width)
+        width += len(vocab[c])
+    penalty = alpha * np.eye(width)
+    penalty[0, 0] = 0.0  # the intercept is not shrunk
+
+    # normal equations summed per fold: the fit without fold f is total - fold f
+    folds = min(folds, n)
+    fold = np.random.default_rng(seed).permutation(n) % folds
+    gram = np.zeros((folds, width, width))
+    moment = np.zeros((folds, width))
+    for f in range(folds):
+        rows_f = np.flatnonzero(fold == f)
+        for i in range(0, len(rows_f), CHUNK_ROWS):
+            part = rows_f[i:i + CHUNK_ROWS]
+            X = _design(num[part], idx[part], offsets, width)
+            gram[f] += X.T @ X
+            moment[f] += X.T @ y[part]
+    gram_total, moment_total = gram.sum(axis=0), moment.sum(axis=0)
+
+    residuals = np.empty(n)
+    for f in range(folds):
+        beta = np.linalg.solve(gram_total - gram[f] + penalty, moment_total - moment[f])
+        rows_f = np.flatnonzero(fold == f)
+        for i in range(0, len(rows_f), CHUNK_ROWS):
+            part = rows_f[i:i + CHUNK_ROWS]
+            residuals[part] = y[part] - _design(num[part], idx[part], offsets, width) @ beta
+
+    beta = np.linalg.solve(gram_total + penalty, moment_total)
+    model.intercept = float(beta[0])
+    model.numeric_coef = beta[1:1 + num.shape[1]]
+    for j, (c, offset) in enumerate(zip(CATEGORIES, offsets)):
+        model.weights[c] = beta[offset:offset + len(vocab[c])]
+        model._padded[c] = np.append(model.weights[c], 0.0)
+        model.baseline[j] = model._padded[c][idx[:, j]].mean()
+
+    bucket = (idx[:, CATEGORIES.index("locality")] < 0).astype(np.intp)
+    for b in range(len(BUCKETS)):
+        sample = residuals[bucket == b] if (bucket == b).sum() >= MIN_BUCKET_ROWS else residuals
+        model.quantiles[b] = np.quantile(sample, QUANTILES)
+
+    model.meta = {
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "rows": n,
+        "alpha": alpha,
+        "folds": folds,
+        # median absolute error of the cross-validated estimates, as a fraction of the price
+        "cv_median_ape": float(np.median(np.abs(np.expm1(residuals - model.quantiles[bucket, 1])))),
+    }
+    return model
+
+
+# ---------- Per-process artifact ----------
+class _ModelCache:
+    """The artifact loaded once per process and reloaded when the file's mtime changes (one stat per call)."""
+
+    def __init__(self):
+        self._model = None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        path = settings.PRICE_MODEL_PATH
+        try:
+            stamp = (str(path), os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            raise ModelNotTrained("the price model is not trained; run manage.py train_price_model") from None
+        if self._stamp != stamp:
+            with self._lock:
+                if self._stamp != stamp:
+                    self._model = PriceModel.load(path)
+                    self._stamp = stamp
+        return self._model
+
+
+class _ListingScoresCache:
+    """ListingScores rebuilt when the model or the properties DatasetVersion changes."""
+
+    def __init__(self):
+        self._value = None
+        self._key = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        model = get_model()
+        key = (model, DatasetVersion.current())
+        if self._key != key:
+            with self._lock:
+                if self._key != key:
+                    self._value = ListingScores(model)
+                    self._key = key
+        return self._value
+
+
+_model = _ModelCache()
+_listing_scores = _ListingScoresCache()
+
+
+def get_model():
+    return _model.get()
+
+
+def get_listing_scores():
+    return _listing_scores.get()
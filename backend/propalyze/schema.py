@@ -0,0 +1,314 @@
+"""
+Shared record schema for cleaned property data.
+
+clean_data.py builds every cleaned record through PropertyRecord, and the
+loaders decode cleaned JSON back into it, so both sides agree on one set of
+field names. This module has no Django dependency; clean_data.py imports it by
+putting backend/ on sys.path.
+
+PropertyRecord.from_dict validates and coerces every field, and also accepts
+the names used by older cleaned files (total_area, carpet_area,
+locality_rating, and historical_prices as a list of {month, price}).
+
+iter_json_values is the one streaming reader for raw and cleaned files alike
+(a JSON array, JSONL or concatenated JSON), used by clean_data.py and the
+loaders.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field, fields
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, get_args
+
+MONTHS = {m: i for i, m in enumerate(["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+MONTH_LABEL_RE = re.compile(r"^\s*([A-Za-z]{3})[A-Za-z]*\W*(\d{4}|\d{2})\s*$")
+
+RATING_FIELDS = ("connectivity", "safety", "traffic", "environment", "market", "area_description")
+
+
+class SchemaError(ValueError):
+    pass
+
+
+@dataclass(slots=True)
+class PropertyRecord:
+    property_id: Optional[str] = None
+    name: Optional[str] = None
+    bhk: Optional[int] = None
+    property_type: Optional[str] = None
+    developer: Optional[str] = None
+    project: Optional[str] = None
+    floor_current: Optional[int] = None
+    floor_total: Optional[int] = None
+    transaction_type: Optional[str] = None
+    facing: Optional[str] = None
+    furnished_status: Optional[str] = None
+    ownership_type: Optional[str] = None
+    description: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    locality: Optional[str] = None
+    locality_id: Optional[str] = None
+    region: Optional[str] = None
+    property_url: Optional[str] = None
+    super_built_up_area: Optional[float] = None
+    total_area_sqft: Optional[float] = None
+    carpet_area_sqft: Optional[float] = None
+    price_per_sqft: Optional[float] = None
+    price_in_inr: Optional[float] = None
+    property_yield: Optional[float] = None
+    status: Optional[str] = None
+    parking_count: Optional[int] = None
+    parking_type: Optional[str] = None
+    photos: List[str] = field(default_factory=list)
+    locality_photos: List[str] = field(default_factory=list)
+    locality_ratings: Optional[Dict[str, Any]] = None
+    historical_price_locality: Dict[str, Optional[float]] = field(default_factory=dict)
+    lifts: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict in field order, as written to the cleaned JSON."""
+        return {name: getattr(self, name) for name in FIELD_NAMES}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PropertyRecord":
+        """Validated decode of one cleaned JSON record; raises SchemaError."""
+        if not isinstance(data, dict):
+            raise SchemaError(f"expected a JSON object, got {type(data).__name__}")
+        values = []
+        for name, convert, aliases in _DECODE_PLAN:
+            value = data.get(name, _MISSING)
+            if value is _MISSING:
+                for alias in aliases:
+                    value = data.get(alias, _MISSING)
+                    if value is not _MISSING:
+                        break
+                else:
+                    value = None
+            try:
+                values.append(convert(value))
+            except (TypeError, ValueError) as e:
+                raise SchemaError(f"property {data.get('property_id')!r}: {name}: {e}") from None
+        record = cls(*values)
+        if record.property_id is None:
+            raise SchemaError(f"record without property_id (name: {record.name!r})")
+        return record
+
+    def to_model_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for propalyze.models.Property."""
+        return dict(
+            property_id=self.property_id,
+            name=self.name or "",
+            bhk=self.bhk,
+            property_type=self.property_type,
+            developer=self.developer,
+            project=self.project,
+            floor_current=self.floor_current,
+            floor_total=self.floor_total,
+            transaction_type=self.transaction_type,
+            facing=self.facing,
+            furnished_status=self.furnished_status,
+            ownership_type=self.ownership_type,
+            description=self.description,
+            latitude=self.latitude,
+            longitude=self.longitude,
+            locality=self.locality,
+            region=self.region,
+            super_built_up_area=self.super_built_up_area,
+            carpet_area=self.carpet_area_sqft,
+            total_area=self.total_area_sqft,
+            price_per_sqft=self.price_per_sqft,
+            price_in_inr=self.price_in_inr,
+            property_yield=self.property_yield,
+            status=self.status,
+            parking_count=self.parking_count,
+            parking_type=self.parking_type,
+            property_url=self.property_url,
+        )
+
+    def locality_key(self) -> Optional[str]:
+        return locality_key(self.locality_id, self.region, self.locality)
+
+    def price_points(self) -> List[tuple]:
+        """(first day of month, price) pairs of the locality price history, skipping missing prices and unreadable months."""
+        points = []
+        for label, price in self.historical_price_locality.items():
+            month = parse_month(label)
+            if month is not None and price is not None:
+                points.append((month, price))
+        return points
+
+    def rating_kwargs(self) -> Optional[Dict[str, Any]]:
+        """Keyword arguments for LocalityRating, or None when no rating value is set."""
+        if not self.locality_ratings or all(v is None for v in self.locality_ratings.values()):
+            return None
+        return dict(self.locality_ratings)
+
+
+def parse_month(label) -> Optional[date]:
+    """First day of the month named by a price-trend label such as "Aug'24" or "August 2024"."""
+    m = MONTH_LABEL_RE.match(label or "")
+    if not m or m.group(1).lower() not in MONTHS:
+        return None
+    year = int(m.group(2))
+    return date(year + 2000 if year < 100 else year, MONTHS[m.group(1).lower()], 1)
+
+
+def locality_key(locality_id, region, name) -> Optional[str]:
+    """
+    Identity of a locality: the magicbricks locality id within its region, or
+    the lowercased locality name when the id is unknown (e.g. older files).
+    """
+    region = (region or "").strip().lower()
+    if locality_id:
+        return f"{region}|id:{locality_id}"
+    name = (name or "").strip().lower()
+    if name:
+        return f"{region}|name:{name}"
+    return None
+
+
+FIELD_NAMES = tuple(f.name for f in fields(PropertyRecord))
+
+READ_CHUNK = 1 << 16
+
+
+def iter_json_values(f, chunk_size: int = READ_CHUNK) -> Iterator[Any]:
+    """
+    Incrementally decode a file holding either one JSON array or a stream of JSON
+    values (JSONL / concatenated objects), yielding one top-level element at a time.
+    Only the element being decoded is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(chunk_size)
+    eof = not buf
+    pos = 0
+    in_array = False
+    started = False
+
+    while True:
+        # skip whitespace (and commas between array elements), reading more as needed
+        while True:
+            while pos < len(buf) and (buf[pos].isspace() or (in_array and buf[pos] == ",")):
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            buf, pos = f.read(chunk_size), 0
+            eof = not buf
+        if pos >= len(buf):
+            return
+        if not started:
+            started = True
+            if buf[pos] == "[":
+                in_array = True
+                pos += 1
+                continue
+        if in_array and buf[pos] == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+            # a value ending exactly at the buffer edge (e.g. a number) may continue in the next chunk
+            complete = end < len(buf) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            more = f.read(chunk_size)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+            continue
+        yield value
+        pos = end
+        if pos >= chunk_size:
+            buf, pos = buf[pos:], 0
+
+
+_MISSING = object()
+
+
+# ---------- Field converters ----------
+def _text(v):
+    if v is None or isinstance(v, str):
+        return v
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return str(v)
+    raise TypeError(f"expected text, got {type(v).__name__}")
+
+
+def _int(v):
+    if v is None:
+        return None
+    if isinstance(v, bool):
+        raise TypeError("expected an integer, got bool")
+    if isinstance(v, int):
+        return v
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    raise TypeError(f"expected an integer, got {v!r}")
+
+
+def _float(v):
+    if v is None:
+        return None
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        raise TypeError(f"expected a number, got {v!r}")
+    return float(v)
+
+
+def _text_list(v):
+    if v is None:
+        return []
+    if not isinstance(v, list) or not all(isinstance(x, str) for x in v):
+        raise TypeError("expected a list of strings")
+    return v
+
+
+def _rating(v):
+    if v is None:
+        return None
+    if not isinstance(v, dict):
+        raise TypeError(f"expected an object, got {type(v).__name__}")
+    rating = {k: _float(v.get(k)) for k in RATING_FIELDS[:-1]}
+    rating["area_description"] = _text(v.get("area_description"))
+    return rating
+
+
+def _history(v):
+    if v is None:
+        return {}
+    if isinstance(v, list):
+        # older files: [{"month": "Aug'24", "price": 5400}, ...]
+        try:
+            return {_text(p["month"]): _float(p["price"]) for p in v}
+        except (KeyError, TypeError):
+            raise TypeError("expected a list of {month, price} objects") from None
+    if not isinstance(v, dict):
+        raise TypeError(f"expected an object, got {type(v).__name__}")
+    return {str(k): _float(p) for k, p in v.items()}
+
+
+_CONVERTERS = {
+    int: _int, float: _float, str: _text,
+    "photos": _text_list, "locality_photos": _text_list,
+    "locality_ratings": _rating, "historical_price_locality": _history,
+}
+
+ALIASES = {
+    "total_area_sqft": ("total_area",),
+    "carpet_area_sqft": ("carpet_area",),
+    "locality_ratings": ("locality_rating",),
+    "historical_price_locality": ("historical_prices",),
+}
+
+
+def _converter(f):
+    if f.name in _CONVERTERS:
+        return _CONVERTERS[f.name]
+    # Optional[int] -> int
+    return _CONVERTERS[next(t for t in get_args(f.type) if t is not type(None))]
+
+
+# (field, converter, old names) in field order, resolved once
+_DECODE_PLAN = tuple((f.name, _converter(f), ALIASES.get(f.name, ())) for f in fields(PropertyRecord))
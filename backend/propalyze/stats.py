@@ -0,0 +1,73 @@
+"""
+Precomputed per-locality market aggregates (LocalityStats).
+
+refresh_locality_stats recomputes the rows of the given localities only, from
+their current listings; the loaders collect the localities each chunk touched
+and the load_properties command refreshes them once the load is done, so API
+reads never run the GROUP BY.
+"""
+
+from .models import Locality, LocalityRating, LocalityStats, Property
+from .schema import RATING_FIELDS
+
+DEFAULT_BATCH_SIZE = 500
+
+STATS_FIELDS = [f.name for f in LocalityStats._meta.concrete_fields if not f.primary_key]
+SCORE_FIELDS = RATING_FIELDS[:-1]  # area_description is text
+
+
+def percentile(values, q):
+    """q-th percentile (0-100) of sorted values, interpolating linearly between closest ranks."""
+    if not values:
+        return None
+    pos = (len(values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else None
+
+
+def compute_stats(locality_id, listings, rating=None):
+    """LocalityStats for one locality from its (price_per_sqft, price_in_inr, property_yield) rows."""
+    ppsf = sorted(v for v, _, _ in listings if v is not None)
+    prices = sorted(p for _, p, _ in listings if p is not None)
+    yields = [y for _, _, y in listings if y is not None]
+    scores = [s for s in rating if s is not None] if rating else []
+    return LocalityStats(
+        locality_id=locality_id,
+        listing_count=len(listings),
+        avg_price_per_sqft=_mean(ppsf),
+        p25_price_per_sqft=percentile(ppsf, 25),
+        p50_price_per_sqft=percentile(ppsf, 50),
+        p75_price_per_sqft=percentile(ppsf, 75),
+        median_price=percentile(prices, 50),
+        avg_yield=_mean(yields),
+        rating_mean=_mean(scores),
+    )
+
+
+def refresh_locality_stats(locality_ids, batch_size=DEFAULT_BATCH_SIZE):
+    """Recompute LocalityStats for these localities; localities left without listings lose their row. Returns the count refreshed."""
+    ids = sorted(set(locality_ids))
+    refreshed = 0
+    for i in range(0, len(ids), batch_size):
+        batch = ids[i:i + batch_size]
+        listings = {}
+        for locality_id, *row in (Property.objects.filter(locality_ref_id__in=batch)
+                                  .values_list("locality_ref_id", "price_per_sqft", "price_in_inr", "property_yield")):
+            listings.setdefault(locality_id, []).append(row)
+        ratings = {row[0]: row[1:] for row in
+                   LocalityRating.objects.filter(locality_id__in=batch).values_list("locality_id", *SCORE_FIELDS)}
+        rows = [compute_stats(pk, rows, ratings.get(pk)) for pk, rows in listings.items()]
+        LocalityStats.objects.bulk_create(rows, update_conflicts=True, unique_fields=["locality"],
+                                          update_fields=STATS_FIELDS)
+        LocalityStats.objects.filter(locality_id__in=[pk for pk in batch if pk not in listings]).delete()
+        refreshed += len(rows)
+    return refreshed
+
+
+def refresh_all(batch_size=DEFAULT_BATCH_SIZE):
+    return refresh_locality_stats(Locality.objects.values_list("id", flat=True), batch_size)
@@ -1,3 +1,543 @@
-from django.test import TestCase
+import base64
+import datetime
+import io
+import json
+import os
+import tempfile
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from . import autocomplete, geo, pricing, stats
+from .loaders import load_chunk, upsert_chunk
+from .models import (
+    DatasetVersion, HistoricalPrice, Locality, LocalityPhoto, LocalityRating, LocalityStats, Property, PropertyPhoto,
+)
+from .schema import PropertyRecord, SchemaError, iter_json_values, parse_month
+from .views import decode_cursor, encode_cursor
+
+
+class PropertySearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rows = [
+            ("p1", "Ahmedabad", 2, 5_000_000),
+            ("p2", "Ahmedabad", 3, 7_000_000),
+            ("p3", "Surat", 2, 7_000_000),
+            ("p4", "Ahmedabad", 2, 7_000_000),
+            ("p5", "Ahmedabad", 4, 9_000_000),
+            ("p6", "Surat", 3, 12_000_000),
+            ("p7", "Ahmedabad", 2, None),  # no price: never in search results
+        ]
+        Property.objects.bulk_create([
+            Property(property_id=pid, name=pid, region=region, bhk=bhk, price_in_inr=price)
+            for pid, region, bhk, price in rows
+        ])
+
+    def search(self, **params):
+        return self.client.get(reverse("property-search"), params)
+
+    def pages(self, **params):
+        """property_ids of every page, following the cursors."""
+        pages, cursor = [], None
+        while True:
+            query = dict(params, cursor=cursor) if cursor else params
+            body = self.search(**query).json()
+            pages.append([row["property_id"] for row in body["results"]])
+            cursor = body["next"]
+            if cursor is None:
+                return pages
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(7_000_000.0, "p3")), (7_000_000.0, "p3"))
+
+    def test_pages_follow_price_then_property_id(self):
+        pages = self.pages(limit=2)
+        self.assertEqual(pages, [["p1", "p2"], ["p3", "p4"], ["p5", "p6"]])
+
+    def test_equal_prices_split_across_pages(self):
+        pages = self.pages(limit=1, price_min=7_000_000, price_max=7_000_000)
+        self.assertEqual(pages, [["p2"], ["p3"], ["p4"]])
+
+    def test_descending(self):
+        pages = self.pages(limit=2, sort="-price")
+        self.assertEqual(pages, [["p6", "p5"], ["p4", "p3"], ["p2", "p1"]])
+
+    def test_filters_hold_on_every_page(self):
+        pages = self.pages(limit=1, region="Ahmedabad", bhk="2")
+        self.assertEqual(pages, [["p1"], ["p4"]])
+
+    def test_last_page_has_no_next(self):
+        body = self.search(limit=10).json()
+        self.assertEqual(len(body["results"]), 6)
+        self.assertIsNone(body["next"])
+
+    def test_field_selection(self):
+        row = self.search(limit=1, fields="price_in_inr").json()["results"][0]
+        self.assertEqual(row, {"property_id": "p1", "price_in_inr": 5_000_000})
+
+    def test_invalid_cursor_is_rejected(self):
+        not_a_pair = base64.urlsafe_b64encode(json.dumps({"price": 1}).encode()).decode()
+        for cursor in ("not-a-cursor", not_a_pair, encode_cursor("cheap", "p1"),
+                       encode_cursor(float("nan"), "p1"), encode_cursor(float("inf"), "p1"), encode_cursor("-inf", "p1")):
+            response = self.search(cursor=cursor)
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.json(), {"error": "invalid cursor"})
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({"sort": "name"}, {"limit": "0"}, {"limit": "1000"}, {"bhk": "two"}, {"fields": "secret"},
+                       {"price_min": "nan"}, {"price_max": "inf"}, {"price_min": "-Infinity"}):
+            self.assertEqual(self.search(**params).status_code, 400, params)
+
+
+def record(property_id, locality="Thaltej", price=5_000_000, photos=()):
+    """A cleaned JSON record as clean_data.py writes it (only the fields these tests need)."""
+    return {
+        "property_id": property_id, "name": f"Flat {property_id}", "region": "Ahmedabad",
+        "locality": locality, "price_in_inr": price, "photos": list(photos),
+    }
+
+
+class UpsertChunkTests(TestCase):
+    def setUp(self):
+        load_chunk([record("a", photos=["a1.jpg", "a2.jpg"]), record("b", locality="Shela")])
+
+    def photos(self, property_id):
+        return list(PropertyPhoto.objects.filter(property_id=property_id).order_by("id").values_list("id", "image_url"))
+
+    def test_counts(self):
+        counts = upsert_chunk([
+            record("a", photos=["a1.jpg", "a2.jpg"]),
+            record("b", locality="Shela", price=6_000_000),
+            record("c"),
+        ])
+        self.assertEqual(counts, (1, 1, 1))
+        self.assertEqual(Property.objects.get(pk="b").price_in_inr, 6_000_000)
+        self.assertEqual(Property.objects.count(), 3)
+
+    def test_last_occurrence_in_a_chunk_wins(self):
+        counts = upsert_chunk([record("b", locality="Shela", price=1), record("b", locality="Shela", price=2)])
+        self.assertEqual(counts, (0, 1, 0))
+        self.assertEqual(Property.objects.get(pk="b").price_in_inr, 2)
+
+    def test_identical_photos_are_left_alone(self):
+        before = self.photos("a")
+        upsert_chunk([record("a", price=5_500_000, photos=["a1.jpg", "a2.jpg"])])
+        self.assertEqual(self.photos("a"), before)
+
+    def test_changed_photos_are_replaced(self):
+        before = self.photos("a")
+        counts = upsert_chunk([record("a", photos=["a2.jpg", "a3.jpg"])])
+        self.assertEqual(counts, (0, 1, 0))  # a photo change alone counts as an update
+        after = self.photos("a")
+        self.assertEqual([url for _, url in after], ["a2.jpg", "a3.jpg"])
+        self.assertFalse({pk for pk, _ in before} & {pk for pk, _ in after})
+
+    def test_unchanged_chunk_keeps_dataset_version(self):
+        version = DatasetVersion.current()
+        counts = upsert_chunk([record("a", photos=["a1.jpg", "a2.jpg"]), record("b", locality="Shela")])
+        self.assertEqual(counts, (0, 0, 2))
+        self.assertEqual(DatasetVersion.current(), version)
+        upsert_chunk([record("b", locality="Shela", price=1)])
+        self.assertEqual(DatasetVersion.current(), version + 1)
+
+    def test_touched_includes_the_locality_a_property_left(self):
+        thaltej = Locality.objects.get(name="Thaltej").pk
+        shela = Locality.objects.get(name="Shela").pk
+        touched = set()
+        upsert_chunk([record("a", locality="Shela", photos=["a1.jpg", "a2.jpg"])], touched=touched)
+        self.assertEqual(touched, {thaltej, shela})
+        self.assertEqual(Property.objects.get(pk="a").locality_ref_id, shela)
+
+
+class AdoptNameKeyedLocalityTests(TestCase):
+    def test_id_upgrades_the_name_keyed_locality(self):
+        load_chunk([dict(
+            record("a"),
+            locality_ratings={"connectivity": 4.0, "safety": 3.5},
+            locality_photos=["thaltej1.jpg", "thaltej2.jpg"],
+            historical_price_locality={"Aug'24": 8000, "Sep'24": 8100},
+        )])
+        locality = Locality.objects.get()
+        self.assertEqual(locality.key, "ahmedabad|name:thaltej")
+        self.assertIsNone(locality.magicbricks_id)
+
+        load_chunk([dict(record("b"), locality_id="77")])
+        adopted = Locality.objects.get()
+        self.assertEqual(adopted.pk, locality.pk)
+        self.assertEqual(adopted.key, "ahmedabad|id:77")
+        self.assertEqual(adopted.magicbricks_id, "77")
+        self.assertEqual(LocalityRating.objects.get(locality=adopted).connectivity, 4.0)
+        self.assertEqual(list(LocalityPhoto.objects.filter(locality=adopted).order_by("id").values_list("image_url", flat=True)),
+                         ["thaltej1.jpg", "thaltej2.jpg"])
+        self.assertEqual(HistoricalPrice.objects.filter(locality=adopted).count(), 2)
+        self.assertEqual(set(Property.objects.values_list("locality_ref_id", flat=True)), {adopted.pk})
+
+    def test_locality_with_an_id_is_not_adopted(self):
+        other = Locality.objects.create(key="ahmedabad|name:thaltej", magicbricks_id="55", name="Thaltej", region="Ahmedabad")
+        load_chunk([dict(record("b"), locality_id="77")])
+        self.assertEqual(Locality.objects.count(), 2)
+        other.refresh_from_db()
+        self.assertEqual((other.key, other.magicbricks_id), ("ahmedabad|name:thaltej", "55"))
+        self.assertEqual(Locality.objects.get(magicbricks_id="77").key, "ahmedabad|id:77")
+
+
+class PropertyNearbyTests(TestCase):
+    def test_invalid_coordinates_are_rejected(self):
+        for lat, lon in (("nan", "72.5"), ("23", "inf"), ("-inf", "72.5"), ("500", "72.5"), ("23", "-180.5")):
+            response = self.client.get(reverse("property-nearby"), {"lat": lat, "lon": lon})
+            self.assertEqual(response.status_code, 400, (lat, lon))
+
+    def test_valid_coordinates(self):
+        response = self.client.get(reverse("property-nearby"), {"lat": "23.03", "lon": "72.51", "radius_km": "2"})
+        self.assertEqual(response.status_code, 200)
+
+
+class AutocompleteTests(TestCase):
+    def test_out_of_range_limit_is_rejected(self):
+        for limit in ("0", "-1", str(autocomplete.TOP_K + 1), "ten"):
+            response = self.client.get(reverse("autocomplete"), {"q": "ahm", "limit": limit})
+            self.assertEqual(response.status_code, 400, limit)
+
+    def test_missing_limit_uses_the_default(self):
+        self.assertEqual(self.client.get(reverse("autocomplete"), {"q": "ahm"}).status_code, 200)
+
+
+class PriceEstimateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # price per sq ft: Shela 5000, Thaltej 8000, with some spread so the ranges are not empty
+        Property.objects.bulk_create([
+            Property(property_id=f"{locality}-{i}", name=f"{locality} {i}", region="Ahmedabad", locality=locality,
+                     bhk=1 + i % 3, total_area=area, price_in_inr=area * rate * (0.9 + 0.05 * (i % 5)))
+            for locality, rate in (("Shela", 5000), ("Thaltej", 8000))
+            for i, area in enumerate(range(800, 2300, 100))
+        ])
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.model_path = os.path.join(directory.name, "price_model.npz")
+        settings = override_settings(PRICE_MODEL_PATH=self.model_path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def train(self):
+        pricing.train(*pricing.training_rows(), folds=3, min_count=1).save(self.model_path)
+
+    def estimate(self, **params):
+        return self.client.get(reverse("price-estimate"), params)
+
+    def batch(self, items):
+        return self.client.post(reverse("price-estimate-batch"), json.dumps({"items": items}), content_type="application/json")
+
+    def assertRange(self, result):
+        self.assertLessEqual(result["low"], result["estimate"])
+        self.assertLessEqual(result["estimate"], result["high"])
+        self.assertTrue(0 <= result["confidence"] <= 100)
+
+    def test_untrained_model_is_unavailable(self):
+        self.assertEqual(self.estimate(region="Ahmedabad", area=1200).status_code, 503)
+        self.assertEqual(self.batch([{"region": "Ahmedabad", "area": 1200}]).status_code, 503)
+
+    def test_estimate(self):
+        self.train()
+        response = self.estimate(region="Ahmedabad", locality="Thaltej", bhk=2, area=1200)
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertRange(result)
+        self.assertLess(abs(result["estimate"] / (1200 * 8000) - 1), 0.2)
+        self.assertIn("locality", [factor["feature"] for factor in result["factors"]])
+        shela = self.estimate(region="Ahmedabad", locality="Shela", bhk=2, area=1200).json()
+        self.assertLess(shela["estimate"], result["estimate"])
+
+    def test_batch(self):
+        self.train()
+        response = self.batch([
+            {"region": "Ahmedabad", "locality": "Shela", "area": 1500},
+            {"property_id": "Thaltej-3"},
+            {"property_id": "missing"},
+        ])
+        self.assertEqual(response.status_code, 200)
+        features, listing, missing = response.json()["results"]
+        self.assertRange(features)
+        self.assertRange(listing)
+        self.assertEqual(listing["property_id"], "Thaltej-3")
+        self.assertIn(listing["position"], ("below", "within", "above"))
+        self.assertIn("error", missing)
+
+    def test_non_finite_or_huge_area_is_rejected(self):
+        self.train()
+        for area in ("inf", "nan", "1e308", "-5", ""):
+            self.assertEqual(self.estimate(region="Ahmedabad", area=area).status_code, 400, area)
+
+    def test_invalid_batch_item_is_rejected(self):
+        self.train()
+        response = self.batch([{"region": "Ahmedabad", "area": 1200}, {"region": "Ahmedabad", "area": "big"}])
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()["error"].startswith("items[1]:"))
+
+    def test_features_are_not_coerced(self):
+        self.train()
+        for item in ({"region": ["Ahmedabad"]}, {"locality": {"name": "Shela"}}, {"status": 1},
+                     {"bhk": True}, {"bhk": 2.7}, {"area": True}):
+            response = self.batch([dict({"region": "Ahmedabad", "area": 1200}, **item)])
+            self.assertEqual(response.status_code, 400, item)
+        self.assertEqual(self.batch([{"region": "Ahmedabad", "area": 1200, "bhk": 3.0}]).status_code, 200)
+
+
+class IterJsonValuesTests(SimpleTestCase):
+    values = [{"property_id": "1", "price": 5e6, "tags": ["a", "b]"]}, {"property_id": "2", "name": "{x}"}, 12345, "s", None]
+
+    def read(self, text, chunk_size=1 << 16):
+        return list(iter_json_values(io.StringIO(text), chunk_size))
+
+    def test_array_and_streams_give_the_same_values(self):
+        texts = {
+            "array": json.dumps(self.values, indent=2),
+            "jsonl": "\n".join(json.dumps(v) for v in self.values) + "\n",
+            "concatenated": "".join(json.dumps(v) for v in self.values[:2]) + " " + " ".join(json.dumps(v) for v in self.values[2:]),
+        }
+        for layout, text in texts.items():
+            for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+                self.assertEqual(self.read(text, chunk_size), self.values, (layout, chunk_size))
+
+    def test_number_split_at_a_chunk_edge(self):
+        self.assertEqual(self.read("[1234567, 89]", chunk_size=4), [1234567, 89])
+        self.assertEqual(self.read("1234567\n89", chunk_size=4), [1234567, 89])
+
+    def test_empty_input(self):
+        for text in ("", "  \n", "[]", " [ ] "):
+            self.assertEqual(self.read(text, chunk_size=2), [], repr(text))
+
+    def test_truncated_input_raises(self):
+        with self.assertRaises(json.JSONDecodeError):
+            self.read('[{"property_id": "1"}, {"property_', chunk_size=5)
+
+
+class PropertyRecordTests(SimpleTestCase):
+    def test_round_trip(self):
+        data = dict(record("a", photos=["a1.jpg"]), bhk=2, latitude=23.0, locality_ratings={"safety": 4},
+                    historical_price_locality={"Aug'24": 8000})
+        rec = PropertyRecord.from_dict(data)
+        self.assertEqual(rec.bhk, 2)
+        self.assertEqual(rec.locality_ratings["safety"], 4.0)
+        self.assertIsNone(rec.locality_ratings["traffic"])
+        self.assertEqual(PropertyRecord.from_dict(rec.to_dict()), rec)
+
+    def test_old_key_names(self):
+        rec = PropertyRecord.from_dict({
+            "property_id": 79060217, "total_area": 1200, "carpet_area": 950.5,
+            "locality_rating": {"connectivity": 4.2},
+            "historical_prices": [{"month": "Aug'24", "price": 8000}, {"month": "Sep'24", "price": None}],
+        })
+        self.assertEqual(rec.property_id, "79060217")
+        self.assertEqual((rec.total_area_sqft, rec.carpet_area_sqft), (1200.0, 950.5))
+        self.assertEqual(rec.locality_ratings["connectivity"], 4.2)
+        self.assertEqual(rec.historical_price_locality, {"Aug'24": 8000.0, "Sep'24": None})
+
+    def test_current_name_wins_over_the_old_one(self):
+        rec = PropertyRecord.from_dict({"property_id": "a", "total_area_sqft": 1000, "total_area": 2000})
+        self.assertEqual(rec.total_area_sqft, 1000.0)
+
+    def test_invalid_records_raise_schema_error(self):
+        invalid = [
+            ["not", "an", "object"],
+            {"name": "no id"},
+            {"property_id": "a", "bhk": 2.5},
+            {"property_id": "a", "bhk": True},
+            {"property_id": "a", "price_in_inr": "5 Cr"},
+            {"property_id": "a", "name": ["x"]},
+            {"property_id": "a", "photos": "a1.jpg"},
+            {"property_id": "a", "locality_ratings": [4.0]},
+            {"property_id": "a", "historical_price_locality": [{"month": "Aug'24"}]},
+        ]
+        for data in invalid:
+            with self.assertRaises(SchemaError, msg=data):
+                PropertyRecord.from_dict(data)
+
+
+class ParseMonthTests(SimpleTestCase):
+    def test_labels(self):
+        labels = {
+            "Aug'24": datetime.date(2024, 8, 1),
+            "Sept 2024": datetime.date(2024, 9, 1),
+            "August 2024": datetime.date(2024, 8, 1),
+            "jan-25": datetime.date(2025, 1, 1),
+            " DEC'23 ": datetime.date(2023, 12, 1),
+        }
+        for label, month in labels.items():
+            self.assertEqual(parse_month(label), month, label)
+
+    def test_unreadable_labels(self):
+        for label in (None, "", "Aug", "Foo'24", "2024-08", "Aug'2024x", "Aug 123"):
+            self.assertIsNone(parse_month(label), label)
+
+
+class SpatialIndexTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = np.random.default_rng(7)
+        n = 3000
+        cls.lat = 23.0 + rng.normal(0, 0.15, n)
+        cls.lon = 72.55 + rng.normal(0, 0.15, n)
+        cls.ids = [f"p{i}" for i in range(n)]
+        cls.bhk = [None if i % 10 == 0 else 1 + i % 4 for i in range(n)]
+        cls.types = ["Villa" if i % 3 == 0 else "Apartment" for i in range(n)]
+        cls.index = geo.SpatialIndex(cls.ids, cls.lat, cls.lon, cls.bhk, cls.types)
+        cls.queries = [(23.0, 72.55), (23.21, 72.4), (22.5, 73.2)]
+
+    def brute_force(self, lat, lon, radius_km, bhk=None, property_type=None, exclude=None):
+        dist = geo.haversine_km(lat, lon, self.lat, self.lon)
+        rows = [
+            (dist[i], pid) for i, pid in enumerate(self.ids)
+            if dist[i] <= radius_km
+            and (bhk is None or self.bhk[i] in bhk)
+            and (property_type is None or self.types[i] in property_type)
+            and pid != exclude
+        ]
+        return [pid for _, pid in sorted(rows)]
+
+    def test_within_matches_brute_force(self):
+        for lat, lon in self.queries:
+            for radius in (0.5, 2.0, 15.0, 80.0):
+                found = self.index.within(lat, lon, radius)
+                self.assertEqual([pid for pid, _ in found], self.brute_force(lat, lon, radius), (lat, lon, radius))
+                self.assertTrue(all(d <= radius for _, d in found))
+
+    def test_within_filters(self):
+        lat, lon = self.queries[0]
+        found = self.index.within(lat, lon, 10.0, bhk=[2, 3], property_type=["Apartment"], exclude="p1")
+        self.assertEqual([pid for pid, _ in found],
+                         self.brute_force(lat, lon, 10.0, bhk=[2, 3], property_type=["Apartment"], exclude="p1"))
+
+    def test_nearest_matches_brute_force(self):
+        for lat, lon in self.queries:
+            for k in (1, 5, 50):
+                found = self.index.nearest(lat, lon, k)
+                self.assertEqual([pid for pid, _ in found], self.brute_force(lat, lon, geo.MAX_RADIUS_KM)[:k], (lat, lon, k))
+
+    def test_nearest_stops_at_max_km(self):
+        found = self.index.nearest(23.0, 72.55, 10, max_km=0.2)
+        self.assertEqual([pid for pid, _ in found], self.brute_force(23.0, 72.55, 0.2)[:10])
+
+    def test_empty_index(self):
+        self.assertEqual(geo.SpatialIndex([], [], []).nearest(23.0, 72.55, 5), [])
+
+
+def osa_distance(a, b):
+    """Optimal string alignment distance, the plain O(len(a) * len(b)) table."""
+    d = [[i + j if i * j == 0 else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[-1][-1]
+
+
+class AutocompleteIndexTests(SimpleTestCase):
+    localities = [
+        ("Gota", "Ahmedabad", 40), ("Shela", "Ahmedabad", 30), ("Ambli Bopal Road", "Ahmedabad", 25),
+        ("Bopal", "Ahmedabad", 20), ("South Bopal", "Ahmedabad", 12), ("Thaltej", "Ahmedabad", 8),
+        ("Gotri", "Vadodara", 15), ("Vesu", "Surat", 50), ("Adajan", "Surat", 35), ("Pal Gam", "Surat", 5),
+    ]
+
+    def setUp(self):
+        self.index = autocomplete.AutocompleteIndex([("Ahmedabad", 135), ("Surat", 90), ("Vadodara", 15)], self.localities)
+
+    def names(self, kind, query, region=None, limit=autocomplete.TOP_K):
+        return [name for name, _, _ in self.index.search(kind, query, region, limit)]
+
+    def test_prefix_of_any_word_by_count(self):
+        self.assertEqual(self.names("locality", "bopal"), ["Ambli Bopal Road", "Bopal", "South Bopal"])
+        self.assertEqual(self.names("locality", "BOP", limit=2), ["Ambli Bopal Road", "Bopal"])
+        self.assertEqual(self.names("city", "a"), ["Ahmedabad"])
+
+    def test_typos(self):
+        self.assertEqual(self.names("locality", "gotta", region="Ahmedabad"), ["Gota"])
+        self.assertEqual(self.names("locality", "shlea"), ["Shela"])  # a transposition is one edit
+        self.assertEqual(self.names("locality", "gto"), [])  # too short for typos
+        self.assertEqual(self.names("city", "surta"), ["Surat"])
+
+    def test_prefix_matches_come_before_typos(self):
+        self.assertEqual(self.names("locality", "gotr"), ["Gotri", "Gota"])
+
+    def test_fuzzy_matches_brute_force(self):
+        trie = self.index.localities
+        keys = [autocomplete.normalize(name) for name, _, _ in trie.entries]
+        for query in ("gotta", "shlea", "bpoal", "adjaan", "vsu", "tahltej", "ambli bopla", "xyzzy", "pla gam"):
+            edits = autocomplete.max_edits(query)
+            expected = {
+                i for i, key in enumerate(keys)
+                if any(osa_distance(query, key[start:end]) <= edits
+                       for start in [0] + [m + 1 for m in range(len(key)) if key[m] == " "]
+                       for end in range(start, len(key) + 1))
+            }
+            self.assertEqual(set(trie.fuzzy(query, edits)), expected, query)
+
+    def test_localities_rank_within_their_region(self):
+        self.assertEqual(self.names("locality", "", region="surat"), ["Vesu", "Adajan", "Pal Gam"])
+        self.assertEqual(self.names("locality", "got", region="Vadodara"), ["Gotri"])
+        self.assertEqual(self.names("locality", "got"), ["Gota", "Gotri"])
+        self.assertEqual(self.names("locality", "vesu", region="Ahmedabad"), [])
+        self.assertEqual(self.names("locality", "vesu", region="Mumbai"), [])
+
+
+class LocalityStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = np.random.default_rng(3)
+        cls.shela, cls.gota, cls.empty = [
+            Locality.objects.create(key=f"ahmedabad|name:{name}", name=name, region="Ahmedabad") for name in ("shela", "gota", "bopal")
+        ]
+        LocalityRating.objects.create(locality=cls.shela, connectivity=4.0, safety=3.0, traffic=None, environment=5.0, market=4.0)
+        properties = []
+        for locality, n in ((cls.shela, 37), (cls.gota, 4)):
+            for i in range(n):
+                properties.append(Property(
+                    property_id=f"{locality.name}-{i}", name=locality.name, locality_ref=locality,
+                    price_per_sqft=None if i % 9 == 0 else float(rng.uniform(3000, 9000)),
+                    price_in_inr=float(rng.uniform(3e6, 2e7)),
+                    property_yield=None if i % 2 else float(rng.uniform(2, 5)),
+                ))
+        Property.objects.bulk_create(properties)
+
+    def test_percentile_matches_numpy(self):
+        rng = np.random.default_rng(5)
+        for n in (1, 2, 3, 10, 101):
+            values = sorted(rng.normal(size=n).tolist())
+            for q in (0, 25, 50, 75, 100):
+                self.assertAlmostEqual(stats.percentile(values, q), np.percentile(values, q), msg=(n, q))
+        self.assertIsNone(stats.percentile([], 50))
+
+    def test_refresh_matches_numpy(self):
+        refreshed = stats.refresh_locality_stats([self.shela.pk, self.gota.pk, self.empty.pk], batch_size=2)
+        self.assertEqual(refreshed, 2)
+        self.assertFalse(LocalityStats.objects.filter(locality=self.empty).exists())
+        for locality in (self.shela, self.gota):
+            rows = Property.objects.filter(locality_ref=locality)
+            ppsf = [v for v in rows.values_list("price_per_sqft", flat=True) if v is not None]
+            prices = list(rows.values_list("price_in_inr", flat=True))
+            yields = [v for v in rows.values_list("property_yield", flat=True) if v is not None]
+            row = LocalityStats.objects.get(locality=locality)
+            self.assertEqual(row.listing_count, rows.count())
+            self.assertAlmostEqual(row.avg_price_per_sqft, np.mean(ppsf))
+            for field, q in (("p25_price_per_sqft", 25), ("p50_price_per_sqft", 50), ("p75_price_per_sqft", 75)):
+                self.assertAlmostEqual(getattr(row, field), np.percentile(ppsf, q), msg=field)
+            self.assertAlmostEqual(row.median_price, np.median(prices))
+            self.assertAlmostEqual(row.avg_yield, np.mean(yields))
+        self.assertAlmostEqual(LocalityStats.objects.get(locality=self.shela).rating_mean, 4.0)
+        self.assertIsNone(LocalityStats.objects.get(locality=self.gota).rating_mean)
+
+    def test_emptied_locality_loses_its_row(self):
+        stats.refresh_locality_stats([self.shela.pk, self.gota.pk])
+        Property.objects.filter(locality_ref=self.gota).update(locality_ref=self.shela)
+        stats.refresh_locality_stats([self.gota.pk])
+        self.assertFalse(LocalityStats.objects.filter(locality=self.gota).exists())
+        # only the localities asked for are refreshed
+        self.assertEqual(LocalityStats.objects.get(locality=self.shela).listing_count, 37)
+        stats.refresh_locality_stats([self.shela.pk])
+        self.assertEqual(LocalityStats.objects.get(locality=self.shela).listing_count, 41)
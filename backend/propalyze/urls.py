@@ -0,0 +1,12 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path("properties", views.property_search, name="property-search"),
+    path("properties/nearby", views.property_nearby, name="property-nearby"),
+    path("autocomplete", views.autocomplete_view, name="autocomplete"),
+    path("localities/stats", views.locality_stats, name="locality-stats"),
+    path("estimate", views.price_estimate, name="price-estimate"),
+    path("estimate/batch", views.price_estimate_batch, name="price-estimate-batch"),
+]
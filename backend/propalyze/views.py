@@ -1,3 +1,377 @@
-from django.shortcuts import render
+import base64
+import json
+import math
 
-# Create your views here.
+from django.db.models import F, Prefetch, Q
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from . import autocomplete, geo, pricing
+from .models import LocalityStats, Property, PropertyPhoto
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+DEFAULT_NEIGHBOURS = 10
+MAX_NEIGHBOURS = 500
+MAX_ESTIMATES = 200  # keeps a full batch well under 10ms
+
+# what a PropertyCard shows; description and photo lists only when asked for with ?fields=
+LIST_FIELDS = (
+    "property_id", "name", "bhk", "property_type", "locality", "region", "price_in_inr", "price_per_sqft",
+    "total_area", "carpet_area", "furnished_status", "status",
+)
+PROPERTY_FIELDS = {f.attname for f in Property._meta.concrete_fields}
+RELATED_FIELDS = {"photos"}
+STATS_ORDERING = {"listing_count", "avg_price_per_sqft", "p50_price_per_sqft", "median_price", "avg_yield", "rating_mean"}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _bad_request(e):
+    return JsonResponse({"error": str(e)}, status=400)
+
+
+def _csv(params, name):
+    return [v.strip() for v in params.get(name, "").split(",") if v.strip()]
+
+
+def _number(params, name, kind=float):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        value = kind(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be a number") from None
+    if not math.isfinite(value):  # float() takes "nan" and "inf"
+        raise BadRequest(f"{name} must be a finite number")
+    return value
+
+
+def _page_size(params):
+    limit = _number(params, "limit", int)
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise BadRequest(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def encode_cursor(price, property_id):
+    return base64.urlsafe_b64encode(json.dumps([price, property_id]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        price, property_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        price = float(price)
+    except (ValueError, TypeError):
+        raise BadRequest("invalid cursor") from None
+    if not math.isfinite(price):  # json.loads reads NaN and Infinity
+        raise BadRequest("invalid cursor")
+    return price, str(property_id)
+
+
+def search_filters(params):
+    """Q for the search filters: region, locality, bhk and property_type / furnished_status (comma lists), price range."""
+    q = Q(price_in_inr__isnull=False)  # keyset pagination needs a price to order on
+    for param, field in (("region", "region"), ("locality", "locality"), ("property_type", "property_type"),
+                         ("furnished_status", "furnished_status")):
+        values = _csv(params, param)
+        if values:
+            q &= Q(**{field: values[0]}) if len(values) == 1 else Q(**{f"{field}__in": values})
+    try:
+        bhks = [int(b) for b in _csv(params, "bhk")]
+    except ValueError:
+        raise BadRequest("bhk must be a comma-separated list of integers") from None
+    if bhks:
+        q &= Q(bhk=bhks[0]) if len(bhks) == 1 else Q(bhk__in=bhks)
+    price_min, price_max = _number(params, "price_min"), _number(params, "price_max")
+    if price_min is not None:
+        q &= Q(price_in_inr__gte=price_min)
+    if price_max is not None:
+        q &= Q(price_in_inr__lte=price_max)
+    return q
+
+
+def _projection(params):
+    fields = _csv(params, "fields") or list(LIST_FIELDS)
+    unknown = set(fields) - PROPERTY_FIELDS - RELATED_FIELDS
+    if unknown:
+        raise BadRequest(f"unknown fields: {', '.join(sorted(unknown))}")
+    if "property_id" not in fields:
+        fields.insert(0, "property_id")
+    return fields
+
+
+@require_GET
+def property_search(request):
+    """
+    GET /api/properties?region=Ahmedabad&bhk=2,3&price_min=5000000&price_max=9000000&fields=name,price_in_inr
+
+    Results are ordered by price (sort=-price for descending) then property_id,
+    and paginated with an opaque keyset cursor: pass the returned "next" as
+    ?cursor= to get the following page. Every page is an index range scan from
+    the previous page's last key, so deep pages cost the same as the first.
+    """
+    params = request.GET
+    try:
+        fields = _projection(params)
+        limit = _page_size(params)
+        q = search_filters(params)
+        sort = params.get("sort", "price")
+        if sort not in ("price", "-price"):
+            raise BadRequest("sort must be price or -price")
+        descending = sort == "-price"
+        if params.get("cursor"):
+            # (price, property_id) after the cursor, with a plain range on price the index can seek to
+            price, property_id = decode_cursor(params["cursor"])
+            if descending:
+                q &= Q(price_in_inr__lte=price) & (Q(price_in_inr__lt=price) | Q(property_id__lt=property_id))
+            else:
+                q &= Q(price_in_inr__gte=price) & (Q(price_in_inr__gt=price) | Q(property_id__gt=property_id))
+    except BadRequest as e:
+        return _bad_request(e)
+
+    columns = [f for f in fields if f in PROPERTY_FIELDS]
+    order = ("-price_in_inr", "-property_id") if descending else ("price_in_inr", "property_id")
+    qs = Property.objects.filter(q).order_by(*order).only(*columns, "price_in_inr")
+    if "photos" in fields:
+        qs = qs.prefetch_related(Prefetch("photos", queryset=PropertyPhoto.objects.only("property_id", "image_url").order_by("id")))
+
+    # one extra row tells whether there is a next page
+    page = list(qs[:limit + 1])
+    more = len(page) > limit
+    page = page[:limit]
+    results = []
+    for prop in page:
+        row = {f: getattr(prop, f) for f in columns}
+        if "photos" in fields:
+            row["photos"] = [photo.image_url for photo in prop.photos.all()]
+        results.append(row)
+    last = page[-1] if page else None
+    return JsonResponse({
+        "results": results,
+        "next": encode_cursor(last.price_in_inr, last.property_id) if more else None,
+    })
+
+
+def _rows_by_id(ids, fields):
+    """Projected rows for the given property ids, in that order (one query, plus one for photos)."""
+    columns = [f for f in fields if f in PROPERTY_FIELDS]
+    qs = Property.objects.filter(pk__in=ids).only(*columns)
+    if "photos" in fields:
+        qs = qs.prefetch_related(Prefetch("photos", queryset=PropertyPhoto.objects.only("property_id", "image_url").order_by("id")))
+    rows = {}
+    for prop in qs:
+        row = {f: getattr(prop, f) for f in columns}
+        if "photos" in fields:
+            row["photos"] = [photo.image_url for photo in prop.photos.all()]
+        rows[prop.pk] = row
+    return [rows[pid] for pid in ids if pid in rows]
+
+
+@require_GET
+def property_nearby(request):
+    """
+    GET /api/properties/nearby?lat=23.03&lon=72.51&radius_km=2
+    GET /api/properties/nearby?property_id=79060217&k=10&bhk=3
+
+    Properties within radius_km of a point, or the k nearest when no radius is
+    given. The origin is lat/lon or an existing property (which is left out of
+    its own results). bhk and property_type narrow the matches to comparables.
+    """
+    params = request.GET
+    try:
+        fields = _projection(params)
+        lat, lon = _number(params, "lat"), _number(params, "lon")
+        exclude = params.get("property_id")
+        if exclude:
+            origin = Property.objects.filter(pk=exclude).values_list("latitude", "longitude").first()
+            if origin is None or None in origin:
+                raise BadRequest("property_id is unknown or has no coordinates")
+            lat, lon = origin
+        elif lat is None or lon is None:
+            raise BadRequest("give lat and lon, or property_id")
+        elif not (math.isfinite(lat) and -90 <= lat <= 90):
+            raise BadRequest("lat must be between -90 and 90")
+        elif not (math.isfinite(lon) and -180 <= lon <= 180):
+            raise BadRequest("lon must be between -180 and 180")
+        try:
+            bhk = [int(b) for b in _csv(params, "bhk")] or None
+        except ValueError:
+            raise BadRequest("bhk must be a comma-separated list of integers") from None
+        filters = dict(bhk=bhk, property_type=_csv(params, "property_type") or None, exclude=exclude)
+        radius = _number(params, "radius_km")
+        k = _number(params, "k", int)
+        if radius is not None and not 0 < radius <= geo.MAX_RADIUS_KM:
+            raise BadRequest(f"radius_km must be between 0 and {geo.MAX_RADIUS_KM:g}")
+        if k is not None and not 1 <= k <= MAX_NEIGHBOURS:
+            raise BadRequest(f"k must be between 1 and {MAX_NEIGHBOURS}")
+    except BadRequest as e:
+        return _bad_request(e)
+
+    index = geo.get_index()
+    if radius is not None:
+        matches = index.within(lat, lon, radius, limit=k or MAX_NEIGHBOURS, **filters)
+    else:
+        matches = index.nearest(lat, lon, k or DEFAULT_NEIGHBOURS, **filters)
+    rows = _rows_by_id([pid for pid, _ in matches], fields)
+    distances = dict(matches)
+    for row in rows:
+        row["distance_km"] = round(distances[row["property_id"]], 3)
+    return JsonResponse({"results": rows})
+
+
+@require_GET
+def autocomplete_view(request):
+    """
+    GET /api/autocomplete?kind=city&q=ahm
+    GET /api/autocomplete?kind=locality&region=Ahmedabad&q=gotta
+
+    Cities or localities whose name (or a word in it) starts with q, most
+    listings first, followed by close misspellings.
+    """
+    params = request.GET
+    kind = params.get("kind", "locality")
+    try:
+        if kind not in ("city", "locality"):
+            raise BadRequest("kind must be city or locality")
+        limit = _number(params, "limit", int)
+        if limit is None:
+            limit = autocomplete.TOP_K
+        elif not 1 <= limit <= autocomplete.TOP_K:
+            raise BadRequest(f"limit must be between 1 and {autocomplete.TOP_K}")
+    except BadRequest as e:
+        return _bad_request(e)
+    matches = autocomplete.get_index().search(kind, params.get("q", ""), params.get("region"), limit)
+    return JsonResponse({"results": [
+        {"name": name, "region": region, "count": count} if kind == "locality" else {"name": name, "count": count}
+        for name, region, count in matches
+    ]})
+
+
+@require_GET
+def locality_stats(request):
+    """
+    GET /api/localities/stats?region=Ahmedabad&order=-listing_count&limit=10
+
+    Precomputed LocalityStats rows (listing count, price/sqft mean and
+    p25/p50/p75, median price, mean yield, rating mean); order by any of those
+    fields, "-" for descending. min_listings drops thinly listed localities.
+    """
+    params = request.GET
+    try:
+        order = params.get("order", "-listing_count")
+        if order.lstrip("-") not in STATS_ORDERING:
+            raise BadRequest(f"order must be one of {', '.join(sorted(STATS_ORDERING))} (optionally prefixed with -)")
+        limit = _page_size(params)
+        min_listings = _number(params, "min_listings", int)
+    except BadRequest as e:
+        return _bad_request(e)
+
+    qs = LocalityStats.objects.all()
+    regions = _csv(params, "region")
+    if regions:
+        qs = qs.filter(locality__region__in=regions)
+    if min_listings:
+        qs = qs.filter(listing_count__gte=min_listings)
+    # nulls (e.g. no yield data) sort last either way
+    field = order.lstrip("-")
+    ordering = F(field).desc(nulls_last=True) if order.startswith("-") else F(field).asc(nulls_last=True)
+    rows = qs.order_by(ordering, "locality_id").values(
+        "locality_id", "locality__name", "locality__region", *sorted(STATS_ORDERING),
+        "p25_price_per_sqft", "p75_price_per_sqft", "updated_at",
+    )[:limit]
+    results = []
+    for row in rows:
+        row["name"] = row.pop("locality__name")
+        row["region"] = row.pop("locality__region")
+        results.append(row)
+    return JsonResponse({"results": results})
+
+
+def _unavailable(e):
+    return JsonResponse({"error": str(e)}, status=503)
+
+
+@require_GET
+def price_estimate(request):
+    """
+    GET /api/estimate?region=Ahmedabad&locality=Shela&property_type=Apartment&bhk=3&area=1650&furnished_status=Unfurnished
+
+    Estimated price with an 80% range and a confidence (how tight the range
+    is), plus the effect of each known feature on the price ("factors").
+    area (sq ft) is required; floor and status are optional like the rest.
+    """
+    params = request.GET
+    try:
+        model = pricing.get_model()
+        row = pricing.features(**{name: params.get(name) for name in pricing.CATEGORIES + pricing.NUMERIC})
+    except pricing.ModelNotTrained as e:
+        return _unavailable(e)
+    except pricing.FeatureError as e:
+        return _bad_request(e)
+    result = model.estimate([row])[0]
+    result["factors"] = [{"feature": name, "effect": round(effect, 4)} for name, effect in model.factors(row)]
+    return JsonResponse(result)
+
+
+@csrf_exempt
+@require_POST
+def price_estimate_batch(request):
+    """
+    POST /api/estimate/batch  {"items": [{"property_id": "79060217"}, {"region": "Ahmedabad", "area": 1200, ...}]}
+
+    Estimates for up to MAX_ESTIMATES items in one call, in request order. An
+    item is either the features of /api/estimate or a property_id, whose
+    estimate is precomputed per process (pricing.ListingScores) and returned
+    with its asking price and where that falls against the range ("below",
+    "within", "above"). Invalid features fail the whole call with a 400; a
+    property_id that cannot be scored gets an "error" instead.
+    """
+    try:
+        try:
+            body = json.loads(request.body)
+        except ValueError:
+            raise BadRequest("body must be JSON") from None
+        items = body.get("items") if isinstance(body, dict) else None
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise BadRequest('body must be {"items": [...]} with an object per item')
+        if len(items) > MAX_ESTIMATES:
+            raise BadRequest(f"at most {MAX_ESTIMATES} items per call")
+        model = pricing.get_model()
+    except BadRequest as e:
+        return _bad_request(e)
+    except pricing.ModelNotTrained as e:
+        return _unavailable(e)
+
+    # stored listings are looked up in the per-process scores, not queried
+    listings = pricing.get_listing_scores() if any("property_id" in item for item in items) else None
+    rows, positions, results = [], [], []
+    for i, item in enumerate(items):
+        if "property_id" not in item:
+            try:
+                rows.append(pricing.features(**{name: item.get(name) for name in pricing.CATEGORIES + pricing.NUMERIC}))
+            except pricing.FeatureError as e:
+                return _bad_request(f"items[{i}]: {e}")
+            positions.append(i)
+            results.append(None)
+            continue
+        property_id = str(item["property_id"])
+        scored = listings.get(property_id)
+        if scored is None:
+            results.append({"property_id": property_id, "error": "unknown property, or no area to price it from"})
+            continue
+        result, price = scored
+        result["property_id"] = property_id
+        if price is not None:
+            result["price_in_inr"] = price
+            result["position"] = "below" if price < result["low"] else "above" if price > result["high"] else "within"
+        results.append(result)
+    for i, result in zip(positions, model.estimate(rows)):
+        results[i] = result
+    return JsonResponse({"results": results})
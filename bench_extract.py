@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+bench_extract.py
+
+Benchmark fast_extract.parse_property_page against the BeautifulSoup
+implementation on saved detail pages, and check that both return the same
+result.
+
+Usage:
+    python bench_extract.py --save 20                 # download the first 20 links.txt pages to ./bench_pages
+    python bench_extract.py bench_pages/*.html        # time both parsers on saved pages
+    python bench_extract.py --repeat 20 page.html
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import sys
+import time
+
+import fast_extract
+import http_session
+from scrap_static_details import parse_property_page_soup
+
+PAGES_DIR = "bench_pages"
+
+
+def save_pages(links_file, count, pages_dir):
+    os.makedirs(pages_dir, exist_ok=True)
+    with open(links_file, "r") as f:
+        links = [line.strip() for line in f if line.strip()][:count]
+    for link in links:
+        response = http_session.get(link)
+        name = hashlib.sha1(link.encode("utf-8")).hexdigest()[:16] + ".html"
+        with open(os.path.join(pages_dir, name), "w", encoding="utf-8") as out:
+            # keep the URL with the page; parse_property_page needs it
+            out.write(f"<!-- {link} -->\n")
+            out.write(response.text)
+        print(f"Saved {link} -> {name}")
+
+
+def load_page(path):
+    with open(path, "r", encoding="utf-8") as f:
+        html = f.read()
+    url = ""
+    if html.startswith("<!-- "):
+        first, _, rest = html.partition("\n")
+        url, html = first[5:-4].strip(), rest
+    return html, url
+
+
+def time_parser(parse, html, url, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = parse(html, url)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fast-path HTML extractor")
+    parser.add_argument('pages', nargs='*', help=f'Saved detail pages (default: {PAGES_DIR}/*.html)')
+    parser.add_argument('--repeat', type=int, default=5, help='Parses per page per parser (default: 5)')
+    parser.add_argument('--save', type=int, default=0, help='Download the first N pages from --links and exit')
+    parser.add_argument('--links', default='links.txt', help='Links file used by --save (default: links.txt)')
+    args = parser.parse_args()
+
+    if args.save:
+        save_pages(args.links, args.save, PAGES_DIR)
+        return
+
+    paths = args.pages or sorted(glob.glob(os.path.join(PAGES_DIR, "*.html")))
+    if not paths:
+        print("No pages to benchmark; run with --save N first", file=sys.stderr)
+        sys.exit(2)
+
+    total_soup = total_fast = 0.0
+    mismatches = 0
+    print(f"{'page':<40} {'KB':>7} {'bs4 ms':>9} {'fast ms':>9} {'speedup':>8}")
+    for path in paths:
+        html, url = load_page(path)
+        soup_t, soup_result = time_parser(parse_property_page_soup, html, url, args.repeat)
+        fast_t, fast_result = time_parser(fast_extract.parse_property_page, html, url, args.repeat)
+        total_soup += soup_t
+        total_fast += fast_t
+        same = soup_result == fast_result
+        mismatches += not same
+        print(f"{os.path.basename(path)[:40]:<40} {len(html) / 1024:7.1f} {soup_t * 1000:9.2f} "
+              f"{fast_t * 1000:9.2f} {soup_t / fast_t:7.1f}x{'' if same else '  MISMATCH'}")
+
+    print(f"\n{len(paths)} pages: bs4 {total_soup * 1000:.1f} ms, fast {total_fast * 1000:.1f} ms, "
+          f"speedup {total_soup / total_fast:.1f}x, mismatches {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
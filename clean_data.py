@@ -7,13 +7,27 @@ Improved cleaning script for property_details.json.
 Usage:
     python clean_property_data.py                 # reads ./property_details.json -> ./property_details_cleaned.json
     python clean_property_data.py input.json out.json
+    python clean_property_data.py --stream input.jsonl out.jsonl   # constant memory, JSONL output
+    python clean_property_data.py --workers 32 in.json out.json        # shards cleaned on 32 processes, merged in order
+    python clean_property_data.py --workers 32 --shard-dir parts/ in.json  # one JSONL file per shard
+    python clean_property_data.py --raw-mode sidecar in.json out.json  # '_raw' goes to out.raw.sqlite3 (see raw_store.py)
 """
 
 import re
 import json
 import sys
 import argparse
-from typing import Union, List, Dict, Any
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Union, List, Dict, Any, Iterable, Iterator, Optional
+
+from raw_store import RawStore, sidecar_path
+
+# the record schema is shared with the Django loader
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from propalyze.schema import PropertyRecord, iter_json_values  # noqa: E402
 
 # ---------- Helpers ----------
 NUMBER_RE = re.compile(r'([0-9]+(?:[.,][0-9]+)?)')
@@ -135,28 +149,19 @@ def _extract_area_and_ppsq(super_built_raw: str):
                 area = None
     return area, ppsq
 
-def _get_first_key(record: Dict[str, Any], candidates: List[str]):
-    """Return first found value for any key in candidates (case-insensitive)."""
-    if not isinstance(record, dict):
-        return None
-    lower_map = {k.lower(): v for k, v in record.items()}
-    for cand in candidates:
-        if cand is None:
-            continue
-        if cand.lower() in lower_map:
-            return lower_map[cand.lower()]
-    return None
-
-def _collect_photos(record: Dict[str, Any]) -> (List[str], List[str]): # type: ignore
+PHOTO_KEYS = [
+    "Project Photos", "ProjectPhotos", "project_photos", "project photos",
+    "property photos", "property_photos", "Property Photos", "PropertyPhotos"
+]
+LOCALITY_PHOTO_KEYS = ["Locality Photos", "LocalityPhotos", "locality_photos", "locality photos"]
+
+def _collect_photos(record: Dict[str, Any], fields: Optional[Dict[str, Any]] = None) -> (List[str], List[str]): # type: ignore
     """Collect property photos and locality photos from all possible source keys and dedupe."""
-    photo_keys = [
-        "Project Photos", "ProjectPhotos", "project_photos", "project photos",
-        "property photos", "property_photos", "Property Photos", "PropertyPhotos"
-    ]
-    locality_keys = ["Locality Photos", "LocalityPhotos", "locality_photos", "locality photos"]
+    if fields is None:
+        fields = CLEAN_PLAN.resolve(record)
     photos = []
-    for k in photo_keys:
-        v = _get_first_key(record, [k])
+    for k in PHOTO_KEYS:
+        v = fields.get('photos:' + k)
         if v:
             if isinstance(v, list):
                 photos.extend(v)
@@ -164,8 +169,8 @@ def _collect_photos(record: Dict[str, Any]) -> (List[str], List[str]): # type: i
                 photos.append(v)
     # also check for lower-cased variants used earlier like 'property photos' etc.
     locality_photos = []
-    for k in locality_keys:
-        v = _get_first_key(record, [k])
+    for k in LOCALITY_PHOTO_KEYS:
+        v = fields.get('locality_photos:' + k)
         if v:
             if isinstance(v, list):
                 locality_photos.extend(v)
@@ -183,8 +188,265 @@ def _collect_photos(record: Dict[str, Any]) -> (List[str], List[str]): # type: i
         return out
     return dedupe(photos), dedupe(locality_photos)
 
+# ---------- Field resolution plan ----------
+class FieldPlan:
+    """
+    Resolves a fixed set of fields, each known under several alias keys, from
+    raw records.
+
+    Aliases are case-insensitive, the first alias present in a record wins, and
+    when two keys of a record differ only by case the later one wins. Every
+    field's alias list is lowercased once. For each distinct record key layout,
+    the plan works out which original key (if any) answers each field and
+    caches that, so records with the same keys from the same source resolve
+    with plain dict lookups.
+    """
+
+    MAX_LAYOUTS = 1024
+
+    def __init__(self, fields: Dict[str, List[str]]):
+        self.fields = {name: tuple(dict.fromkeys(a.lower() for a in aliases)) for name, aliases in fields.items()}
+        self._layouts: Dict[tuple, List[tuple]] = {}
+
+    def layout(self, record: Dict[str, Any]) -> List[tuple]:
+        """(field, original key) pairs for every field present in a record with this key layout."""
+        keys = tuple(record)
+        layout = self._layouts.get(keys)
+        if layout is None:
+            lower = {k.lower(): k for k in keys if isinstance(k, str)}
+            layout = []
+            for name, aliases in self.fields.items():
+                for alias in aliases:
+                    if alias in lower:
+                        layout.append((name, lower[alias]))
+                        break
+            if len(self._layouts) >= self.MAX_LAYOUTS:
+                self._layouts.clear()
+            self._layouts[keys] = layout
+        return layout
+
+    def resolve(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Map field name -> value for the fields present in record (missing fields are absent)."""
+        return {name: record[key] for name, key in self.layout(record)}
+
+FIELD_ALIASES = {
+    'property_id': ["Property ID", "PropertyId", "property_id", "property id", "id"],
+    'name_fallback': ["Name", "name"],
+    'latitude': ["Latitude", "latitude", "lat"],
+    'longitude': ["Longitude", "longitude", "lon"],
+    'name': ["Name", "name", "Name "],
+    'bhk': ["BHK", "bhk", "Rooms", "rooms"],
+    'property_type': ["type", "property_type", "Property Type", "Type"],
+    'developer': ["Developer", "developer"],
+    'project': ["Project", "project"],
+    'floor_current': ["Floor (current)", "Floor_current", "floor_current", "Floor (current)"],
+    'floor_total': ["Floor (total)", "Floor_total", "floor_total", "Floor (total)"],
+    'floor': ["Floor", "Floor Size", "FloorSize"],
+    'transaction_type': ["Transaction type", "transaction_type", "Transaction Type"],
+    'facing': ["Facing", "facing"],
+    'furnished_status': ["Furnishing", "Furnished Status", "FurnishedStatus", "Furnished Status", "Furnished"],
+    'ownership_type': ["Type of Ownership", "ownership_type", "Type Of Ownership"],
+    'description': ["Description", "description"],
+    'locality': ["Locality", "locality", "Locality "],
+    'locality_id': ["Locality ID", "locality_id", "localityId"],
+    'region': ["Region", "region"],
+    'property_url': ["Property URL", "property_url", "Property Url", "PropertyUrl"],
+    'super_built_up_area': ["Super Built-up Area", "super_built_up_area", "Super Builtup Area", "Super Built-up"],
+    'total_area': ["Total Area (sqft)", "Total Area", "total_area", "Floor Size", "FloorSize"],
+    'carpet_area': ["Carpet Area (sqft)", "Carpet Area", "carpet_area"],
+    'price_per_sqft': ["Price Per Sqft", "PricePerSqft", "price_per_sqft"],
+    'price': ["Price (INR)", "Price", "price_in_inr", "price"],
+    'property_yield': ["Property Yield (%)", "Property Yield", "property_yield"],
+    'status': ["Status", "status"],
+    'parking_count': ["parking_count", "Car parking", "Car Parking", "parkingCount"],
+    'car_parking': ["Car parking", "Car Parking"],
+    'parking_type': ["parking_type", "Parking Type", "parking_type"],
+    'locality_ratings': ["Locality Ratings", "Locality_Ratings", "locality_ratings", "locality ratings"],
+    'historical_price': ["Historical Price (Locality)", "Historical Price", "historical_prices"],
+    'lifts': ["Lifts", "lifts"],
+}
+FIELD_ALIASES.update({'photos:' + k: [k] for k in PHOTO_KEYS})
+FIELD_ALIASES.update({'locality_photos:' + k: [k] for k in LOCALITY_PHOTO_KEYS})
+CLEAN_PLAN = FieldPlan(FIELD_ALIASES)
+
 # ---------- Main cleaning function ----------
-def clean_property_data(data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+def _clean_record(rec: Any) -> Dict[str, Any]:
+    """Clean a single raw record into the canonical schema."""
+    r = dict(rec) if isinstance(rec, dict) else {}
+    f = CLEAN_PLAN.resolve(r)
+    cleaned = {}
+
+    # canonical property id (try many variants)
+    property_id = f.get('property_id')
+    if property_id is None:
+        # fallback to Name + lat + lon if available
+        name_f = f.get('name_fallback')
+        lat_f = f.get('latitude')
+        lon_f = f.get('longitude')
+        if name_f and lat_f is not None and lon_f is not None:
+            property_id = f"{name_f}__{lat_f}__{lon_f}"
+        else:
+            # create a fallback unique id from index (not ideal, but avoids skipping)
+            # we'll still include original raw data so you can inspect
+            property_id = None
+
+    # basic fields
+    cleaned['property_id'] = str(property_id) if property_id is not None else None
+    cleaned['name'] = f.get('name') or None
+    cleaned['bhk'] = None
+    bhk_val = f.get('bhk')
+    if bhk_val is None and cleaned['name']:
+        # try to extract from name like '3 BHK'
+        m = re.search(r'(\d+)\s*bhk', str(cleaned['name']), re.IGNORECASE)
+        if m:
+            bhk_val = m.group(1)
+    if bhk_val is not None:
+        cleaned['bhk'] = int(_to_float_safe(bhk_val)) if _to_float_safe(bhk_val) is not None else None
+
+    cleaned['property_type'] = f.get('property_type') or None
+    cleaned['developer'] = f.get('developer') or None
+    cleaned['project'] = f.get('project') or None
+
+    # Floor info: try several keys and parse if needed
+    floor_current = f.get('floor_current')
+    floor_total = f.get('floor_total')
+    floor_field = f.get('floor')
+    if (floor_current is None or floor_total is None) and floor_field:
+        cur, tot = _parse_floor_info(floor_field)
+        if floor_current is None:
+            floor_current = cur
+        if floor_total is None:
+            floor_total = tot
+    cleaned['floor_current'] = int(_to_float_safe(floor_current)) if _to_float_safe(floor_current) is not None else None
+    cleaned['floor_total'] = int(_to_float_safe(floor_total)) if _to_float_safe(floor_total) is not None else None
+
+    cleaned['transaction_type'] = f.get('transaction_type') or None
+    cleaned['facing'] = f.get('facing') or None
+    cleaned['furnished_status'] = f.get('furnished_status') or None
+    cleaned['ownership_type'] = f.get('ownership_type') or None
+    cleaned['description'] = f.get('description') or None
+
+    # location
+    cleaned['latitude'] = _to_float_safe(f.get('latitude'))
+    cleaned['longitude'] = _to_float_safe(f.get('longitude'))
+    cleaned['locality'] = f.get('locality') or None
+    cleaned['locality_id'] = str(f['locality_id']) if f.get('locality_id') else None
+    cleaned['region'] = f.get('region') or None
+    cleaned['property_url'] = f.get('property_url') or None
+
+    # Areas & prices
+    # Super built-up area may contain both area and ppsq
+    super_built_raw = f.get('super_built_up_area')
+    sb_area, sb_ppsq = _extract_area_and_ppsq(super_built_raw)
+    cleaned['super_built_up_area'] = _to_float_safe(sb_area)
+
+    # Total area, floor size
+    total_area = f.get('total_area')
+    if total_area is None and sb_area is not None:
+        total_area = sb_area
+    cleaned['total_area_sqft'] = _to_float_safe(total_area)
+
+    # Carpet area
+    carpet_area = f.get('carpet_area')
+    cleaned['carpet_area_sqft'] = _to_float_safe(carpet_area)
+
+    # Price Per Sqft (prefer explicit; else use sb_ppsq extracted)
+    ppsq_raw = f.get('price_per_sqft')
+    cleaned['price_per_sqft'] = _to_float_safe(ppsq_raw) or _to_float_safe(sb_ppsq)
+
+    # Price (INR)
+    price_in = f.get('price')
+    cleaned['price_in_inr'] = _to_float_safe(_parse_price_str(price_in) if isinstance(price_in, str) else price_in) if price_in is not None else (_to_float_safe(price_in) if price_in is not None else None)
+
+    # If price_per_sqft still missing and we have price and total_area, compute it
+    if cleaned.get('price_per_sqft') is None and cleaned.get('price_in_inr') is not None and cleaned.get('total_area_sqft') is not None:
+        try:
+            if cleaned['total_area_sqft'] > 0:
+                cleaned['price_per_sqft'] = float(cleaned['price_in_inr']) / float(cleaned['total_area_sqft'])
+        except Exception:
+            cleaned['price_per_sqft'] = None
+
+    # Property yield
+    property_yield = f.get('property_yield')
+    cleaned['property_yield'] = _to_float_safe(property_yield)
+
+    # Status
+    cleaned['status'] = f.get('status') or None
+
+    # Parking
+    parking_count_val = f.get('parking_count')
+    parking_type_val = None
+    # sometimes "4 Covered"
+    if parking_count_val is None:
+        combined_parking = f.get('car_parking')
+        if combined_parking:
+            parking_count_val, parking_type_val = _parse_parking(combined_parking)
+    else:
+        # if parking count present as number string, try to parse count and type
+        if isinstance(parking_count_val, str) and re.search(r'[a-zA-Z]', parking_count_val):
+            parking_count_val, parking_type_val = _parse_parking(parking_count_val)
+    if parking_type_val is None:
+        parking_type_val = f.get('parking_type') or None
+    cleaned['parking_count'] = int(_to_float_safe(parking_count_val)) if _to_float_safe(parking_count_val) is not None else None
+    cleaned['parking_type'] = parking_type_val
+
+    # Photos (merged & deduped)
+    photos, locality_photos = _collect_photos(r, f)
+    cleaned['photos'] = photos
+    cleaned['locality_photos'] = locality_photos
+
+    # Locality Ratings normalize
+    lr_raw = f.get('locality_ratings')
+    if isinstance(lr_raw, dict):
+        cleaned['locality_ratings'] = {
+            'connectivity': _to_float_safe(lr_raw.get('connectivity')),
+            'safety': _to_float_safe(lr_raw.get('safety')),
+            'traffic': _to_float_safe(lr_raw.get('traffic')),
+            'environment': _to_float_safe(lr_raw.get('environment')),
+            'market': _to_float_safe(lr_raw.get('market')),
+            'area_description': lr_raw.get('area_description') or lr_raw.get('area description') or None
+        }
+    else:
+        cleaned['locality_ratings'] = {
+            'connectivity': None, 'safety': None, 'traffic': None,
+            'environment': None, 'market': None, 'area_description': None
+        }
+
+    # Historical Price (Locality) normalize (keep as dict month->float)
+    hist_raw = f.get('historical_price')
+    if isinstance(hist_raw, dict):
+        new_hist = {}
+        for k, v in hist_raw.items():
+            new_hist[str(k)] = _to_float_safe(v)
+        cleaned['historical_price_locality'] = new_hist
+    else:
+        cleaned['historical_price_locality'] = {}
+
+    # Lifts normalized to int (if present)
+    lifts = f.get('lifts')
+    cleaned['lifts'] = int(_to_float_safe(lifts)) if _to_float_safe(lifts) is not None else None
+
+    # Normalize textual fields capitalization where appropriate
+    if cleaned.get('furnished_status'):
+        cleaned['furnished_status'] = str(cleaned['furnished_status']).strip().title()
+    if cleaned.get('status'):
+        cleaned['status'] = str(cleaned['status']).strip().title()
+
+    # final housekeeping: ensure canonical numeric types
+    for k in ['super_built_up_area', 'total_area_sqft', 'carpet_area_sqft', 'price_per_sqft', 'price_in_inr', 'property_yield', 'latitude', 'longitude']:
+        if cleaned.get(k) is not None:
+            cleaned[k] = _to_float_safe(cleaned[k])
+
+    # field names come from the shared schema (a typo here fails instead of writing a key the loader never reads)
+    cleaned = PropertyRecord(**cleaned).to_dict()
+
+    # Keep original raw for inspection if needed (optional)
+    cleaned['_raw'] = r
+
+    return cleaned
+
+def _record_list(data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> (List[Any], bool): # type: ignore
+    """Normalize the accepted input shapes to (list of records, whether the input was a single record)."""
     single_input = False
     if isinstance(data, dict):
         # handle possibility of nested list: { "somekey": [ ... ] } -> treat as list if top val is list of dicts
@@ -199,186 +461,204 @@ def clean_property_data(data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Un
             data_list = data
     else:
         raise ValueError("Input must be a dict or list of dicts.")
+    return data_list, single_input
 
-    cleaned_list = []
-    for rec in data_list:
-        r = dict(rec) if isinstance(rec, dict) else {}
-        cleaned = {}
-
-        # canonical property id (try many variants)
-        property_id = _get_first_key(r, ["Property ID", "PropertyId", "property_id", "property id", "id"])
-        if property_id is None:
-            # fallback to Name + lat + lon if available
-            name_f = _get_first_key(r, ["Name", "name"])
-            lat_f = _get_first_key(r, ["Latitude", "latitude", "lat"])
-            lon_f = _get_first_key(r, ["Longitude", "longitude", "lon"])
-            if name_f and lat_f is not None and lon_f is not None:
-                property_id = f"{name_f}__{lat_f}__{lon_f}"
-            else:
-                # create a fallback unique id from index (not ideal, but avoids skipping)
-                # we'll still include original raw data so you can inspect
-                property_id = None
-
-        # basic fields
-        cleaned['property_id'] = str(property_id) if property_id is not None else None
-        cleaned['name'] = _get_first_key(r, ["Name", "name", "Name "]) or None
-        cleaned['bhk'] = None
-        bhk_val = _get_first_key(r, ["BHK", "bhk", "Rooms", "rooms"])
-        if bhk_val is None and cleaned['name']:
-            # try to extract from name like '3 BHK'
-            m = re.search(r'(\d+)\s*bhk', str(cleaned['name']), re.IGNORECASE)
-            if m:
-                bhk_val = m.group(1)
-        if bhk_val is not None:
-            cleaned['bhk'] = int(_to_float_safe(bhk_val)) if _to_float_safe(bhk_val) is not None else None
-
-        cleaned['property_type'] = _get_first_key(r, ["type", "property_type", "Property Type", "Type"]) or None
-        cleaned['developer'] = _get_first_key(r, ["Developer", "developer"]) or None
-        cleaned['project'] = _get_first_key(r, ["Project", "project"]) or None
-
-        # Floor info: try several keys and parse if needed
-        floor_current = _get_first_key(r, ["Floor (current)", "Floor_current", "floor_current", "Floor (current)"])
-        floor_total = _get_first_key(r, ["Floor (total)", "Floor_total", "floor_total", "Floor (total)"])
-        floor_field = _get_first_key(r, ["Floor", "Floor Size", "FloorSize"])
-        if (floor_current is None or floor_total is None) and floor_field:
-            cur, tot = _parse_floor_info(floor_field)
-            if floor_current is None:
-                floor_current = cur
-            if floor_total is None:
-                floor_total = tot
-        cleaned['floor_current'] = int(_to_float_safe(floor_current)) if _to_float_safe(floor_current) is not None else None
-        cleaned['floor_total'] = int(_to_float_safe(floor_total)) if _to_float_safe(floor_total) is not None else None
-
-        cleaned['transaction_type'] = _get_first_key(r, ["Transaction type", "transaction_type", "Transaction Type"]) or None
-        cleaned['facing'] = _get_first_key(r, ["Facing", "facing"]) or None
-        cleaned['furnished_status'] = _get_first_key(r, ["Furnishing", "Furnished Status", "FurnishedStatus", "Furnished Status", "Furnished"]) or None
-        cleaned['ownership_type'] = _get_first_key(r, ["Type of Ownership", "ownership_type", "Type Of Ownership"]) or None
-        cleaned['description'] = _get_first_key(r, ["Description", "description"]) or None
-
-        # location
-        cleaned['latitude'] = _to_float_safe(_get_first_key(r, ["Latitude", "latitude", "lat"]))
-        cleaned['longitude'] = _to_float_safe(_get_first_key(r, ["Longitude", "longitude", "lon"]))
-        cleaned['locality'] = _get_first_key(r, ["Locality", "locality", "Locality "]) or None
-        cleaned['region'] = _get_first_key(r, ["Region", "region"]) or None
-        cleaned['property_url'] = _get_first_key(r, ["Property URL", "property_url", "Property Url", "PropertyUrl"]) or None
-
-        # Areas & prices
-        # Super built-up area may contain both area and ppsq
-        super_built_raw = _get_first_key(r, ["Super Built-up Area", "super_built_up_area", "Super Builtup Area", "Super Built-up"])
-        sb_area, sb_ppsq = _extract_area_and_ppsq(super_built_raw)
-        cleaned['super_built_up_area'] = _to_float_safe(sb_area)
-
-        # Total area, floor size
-        total_area = _get_first_key(r, ["Total Area (sqft)", "Total Area", "total_area", "Floor Size", "FloorSize"])
-        if total_area is None and sb_area is not None:
-            total_area = sb_area
-        cleaned['total_area_sqft'] = _to_float_safe(total_area)
-
-        # Carpet area
-        carpet_area = _get_first_key(r, ["Carpet Area (sqft)", "Carpet Area", "carpet_area"])
-        cleaned['carpet_area_sqft'] = _to_float_safe(carpet_area)
-
-        # Price Per Sqft (prefer explicit; else use sb_ppsq extracted)
-        ppsq_raw = _get_first_key(r, ["Price Per Sqft", "PricePerSqft", "price_per_sqft"])
-        cleaned['price_per_sqft'] = _to_float_safe(ppsq_raw) or _to_float_safe(sb_ppsq)
-
-        # Price (INR)
-        price_in = _get_first_key(r, ["Price (INR)", "Price", "price_in_inr", "price"])
-        cleaned['price_in_inr'] = _to_float_safe(_parse_price_str(price_in) if isinstance(price_in, str) else price_in) if price_in is not None else (_to_float_safe(price_in) if price_in is not None else None)
-
-        # If price_per_sqft still missing and we have price and total_area, compute it
-        if cleaned.get('price_per_sqft') is None and cleaned.get('price_in_inr') is not None and cleaned.get('total_area_sqft') is not None:
-            try:
-                if cleaned['total_area_sqft'] > 0:
-                    cleaned['price_per_sqft'] = float(cleaned['price_in_inr']) / float(cleaned['total_area_sqft'])
-            except Exception:
-                cleaned['price_per_sqft'] = None
-
-        # Property yield
-        property_yield = _get_first_key(r, ["Property Yield (%)", "Property Yield", "property_yield"])
-        cleaned['property_yield'] = _to_float_safe(property_yield)
-
-        # Status
-        cleaned['status'] = _get_first_key(r, ["Status", "status"]) or None
-
-        # Parking
-        parking_count_val = _get_first_key(r, ["parking_count", "Car parking", "Car Parking", "parkingCount"])
-        parking_type_val = None
-        # sometimes "4 Covered"
-        if parking_count_val is None:
-            combined_parking = _get_first_key(r, ["Car parking", "Car Parking"])
-            if combined_parking:
-                parking_count_val, parking_type_val = _parse_parking(combined_parking)
-        else:
-            # if parking count present as number string, try to parse count and type
-            if isinstance(parking_count_val, str) and re.search(r'[a-zA-Z]', parking_count_val):
-                parking_count_val, parking_type_val = _parse_parking(parking_count_val)
-        if parking_type_val is None:
-            parking_type_val = _get_first_key(r, ["parking_type", "Parking Type", "parking_type"]) or None
-        cleaned['parking_count'] = int(_to_float_safe(parking_count_val)) if _to_float_safe(parking_count_val) is not None else None
-        cleaned['parking_type'] = parking_type_val
-
-        # Photos (merged & deduped)
-        photos, locality_photos = _collect_photos(r)
-        cleaned['photos'] = photos
-        cleaned['locality_photos'] = locality_photos
-
-        # Locality Ratings normalize
-        lr_raw = _get_first_key(r, ["Locality Ratings", "Locality_Ratings", "locality_ratings", "locality ratings"])
-        if isinstance(lr_raw, dict):
-            cleaned['locality_ratings'] = {
-                'connectivity': _to_float_safe(lr_raw.get('connectivity')),
-                'safety': _to_float_safe(lr_raw.get('safety')),
-                'traffic': _to_float_safe(lr_raw.get('traffic')),
-                'environment': _to_float_safe(lr_raw.get('environment')),
-                'market': _to_float_safe(lr_raw.get('market')),
-                'area_description': lr_raw.get('area_description') or lr_raw.get('area description') or None
-            }
-        else:
-            cleaned['locality_ratings'] = {
-                'connectivity': None, 'safety': None, 'traffic': None,
-                'environment': None, 'market': None, 'area_description': None
-            }
-
-        # Historical Price (Locality) normalize (keep as dict month->float)
-        hist_raw = _get_first_key(r, ["Historical Price (Locality)", "Historical Price", "historical_prices"])
-        if isinstance(hist_raw, dict):
-            new_hist = {}
-            for k, v in hist_raw.items():
-                new_hist[str(k)] = _to_float_safe(v)
-            cleaned['historical_price_locality'] = new_hist
-        else:
-            cleaned['historical_price_locality'] = {}
-
-        # Lifts normalized to int (if present)
-        lifts = _get_first_key(r, ["Lifts", "lifts"])
-        cleaned['lifts'] = int(_to_float_safe(lifts)) if _to_float_safe(lifts) is not None else None
-
-        # Normalize textual fields capitalization where appropriate
-        if cleaned.get('furnished_status'):
-            cleaned['furnished_status'] = str(cleaned['furnished_status']).strip().title()
-        if cleaned.get('status'):
-            cleaned['status'] = str(cleaned['status']).strip().title()
-
-        # Keep original raw for inspection if needed (optional)
-        cleaned['_raw'] = r
+def clean_property_data(data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+    data_list, single_input = _record_list(data)
+    cleaned_list = [_clean_record(rec) for rec in data_list]
 
-        # final housekeeping: ensure canonical numeric types
-        for k in ['super_built_up_area', 'total_area_sqft', 'carpet_area_sqft', 'price_per_sqft', 'price_in_inr', 'property_yield', 'latitude', 'longitude']:
-            if cleaned.get(k) is not None:
-                cleaned[k] = _to_float_safe(cleaned[k])
+    return cleaned_list[0] if single_input else cleaned_list
 
-        cleaned_list.append(cleaned)
+# ---------- Streaming ----------
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield raw records from a JSON array, a single JSON object or a JSONL file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for value in iter_json_values(f):
+            # sometimes input is [[...]] (double bracket); flatten one level
+            if isinstance(value, list):
+                yield from value
+            else:
+                yield value
+
+def iter_clean_records(records: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+    for rec in records:
+        yield _clean_record(rec)
+
+def write_jsonl(records: Iterable[Dict[str, Any]], path: str) -> int:
+    """Write records as compact JSON lines; returns the number written."""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as fo:
+        for rec in records:
+            fo.write(json.dumps(rec, ensure_ascii=False, separators=(',', ':')))
+            fo.write('\n')
+            count += 1
+    return count
+
+# ---------- Raw payload ----------
+RAW_MODES = ('inline', 'sidecar', 'drop')
+
+def detach_raw(records: Iterable[Dict[str, Any]], mode: str, store: Optional[RawStore] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Apply a raw mode to cleaned records: 'inline' keeps '_raw', 'drop' removes
+    it and 'sidecar' moves it into store keyed by property_id (records without
+    a property_id keep it inline so nothing is lost).
+    """
+    for rec in records:
+        if mode != 'inline':
+            raw = rec.pop('_raw', None)
+            if mode == 'sidecar':
+                if rec.get('property_id') is None:
+                    rec['_raw'] = raw
+                else:
+                    store.put(rec['property_id'], raw)
+        yield rec
+
+# ---------- Parallel shards ----------
+SHARD_SIZE = 2000
+
+def clean_shard(records: List[Any], start: int = 0) -> (List[Dict[str, Any]], List[tuple]): # type: ignore
+    """
+    Clean records one by one; a record that raises is left out and reported as
+    (input index, error) instead of failing the whole shard.
+    """
+    cleaned, errors = [], []
+    for i, rec in enumerate(records):
+        try:
+            cleaned.append(_clean_record(rec))
+        except Exception as e:
+            errors.append((start + i, f"{type(e).__name__}: {e}"))
+    return cleaned, errors
+
+def _shard_job(job: tuple) -> tuple:
+    shard, start, records, path, raw_mode = job
+    cleaned, errors = clean_shard(records, start)
+    if path is None:
+        # sidecar payloads travel back to the parent, which owns the store
+        if raw_mode == 'drop':
+            cleaned = list(detach_raw(cleaned, raw_mode))
+        return shard, cleaned, len(cleaned), errors
+    store = RawStore(sidecar_path(path)) if raw_mode == 'sidecar' else None
+    count = write_jsonl(detach_raw(cleaned, raw_mode, store), path)
+    if store is not None:
+        store.close()
+    return shard, None, count, errors
+
+def iter_shards(records: Iterable[Any], size: int = SHARD_SIZE) -> Iterator[tuple]:
+    """Yield (index of the first record, list of up to size records)."""
+    records = iter(records)
+    start = 0
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+def clean_parallel(records: Iterable[Any], workers: int, shard_size: int = SHARD_SIZE,
+                   shard_dir: Optional[str] = None, raw_mode: str = 'inline') -> Iterator[tuple]:
+    """
+    Clean records shard by shard on a pool of worker processes, yielding
+    (shard number, cleaned records, count, errors) in input order. With
+    shard_dir each worker writes its shard to shard_dir/part-NNNNN.jsonl (and
+    in sidecar raw mode part-NNNNN.raw.sqlite3) and cleaned is None. Without
+    it, sidecar payloads are left on the records for the caller. At most
+    2 * workers shards are in flight, so a streamed input is never fully loaded.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for shard, (start, chunk) in enumerate(iter_shards(records, shard_size)):
+            path = os.path.join(shard_dir, f"part-{shard:05d}.jsonl") if shard_dir else None
+            pending.append(pool.submit(_shard_job, (shard, start, chunk, path, raw_mode)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def _run_parallel(args) -> int:
+    """--workers / --shard-dir entry; returns the process exit code."""
+    single_input = False
+    if args.stream:
+        records = iter_records(args.input)
+    else:
+        try:
+            with open(args.input, 'r', encoding='utf-8') as f:
+                records, single_input = _record_list(json.load(f))
+        except Exception as e:
+            print(f"[ERROR] Could not open/parse input file {args.input}: {e}", file=sys.stderr)
+            return 2
+    if args.shard_dir:
+        os.makedirs(args.shard_dir, exist_ok=True)
+
+    errors = []
+    results = clean_parallel(records, args.workers, args.shard_size, args.shard_dir, args.raw_mode)
+    store = RawStore(args.raw_path or sidecar_path(args.output)) if args.raw_mode == 'sidecar' and not args.shard_dir else None
+
+    def merged():
+        for _, cleaned, _, shard_errors in results:
+            errors.extend(shard_errors)
+            if store is not None:
+                cleaned = detach_raw(cleaned, 'sidecar', store)
+            yield from cleaned
 
-    return cleaned_list[0] if single_input else cleaned_list
+    try:
+        if args.shard_dir:
+            count = 0
+            for _, _, shard_count, shard_errors in results:
+                count += shard_count
+                errors.extend(shard_errors)
+            target = args.shard_dir
+        elif args.stream:
+            count = write_jsonl(merged(), args.output)
+            target = args.output
+        else:
+            cleaned = list(merged())
+            count = len(cleaned)
+            with open(args.output, 'w', encoding='utf-8') as fo:
+                json.dump(cleaned[0] if single_input and cleaned else cleaned, fo, ensure_ascii=False, indent=4)
+            target = args.output
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Parallel clean of {args.input} failed: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if store is not None:
+            store.close()
+
+    for index, message in errors:
+        print(f"[ERROR] record {index}: {message}", file=sys.stderr)
+    failed = f", failed: {len(errors)}" if errors else ""
+    print(f"[OK] Cleaned data written to {target} (records: {count}{failed})")
+    return 0
 
 # ---------- Command-line entry ----------
 def main():
     parser = argparse.ArgumentParser(description="Clean property JSON file")
     parser.add_argument('input', nargs='?', default='./property_details.json', help='Input JSON file (default: ./property_details.json)')
     parser.add_argument('output', nargs='?', default='./property_details_cleaned.json', help='Output cleaned JSON file (default: ./property_details_cleaned.json)')
+    parser.add_argument('--stream', action='store_true', help='Clean record by record with flat memory and write compact JSONL (input may be a JSON array or JSONL)')
+    parser.add_argument('--workers', type=int, default=1, help='Clean shards of the input on this many processes, merged back in input order (default: 1)')
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE, help=f'Records per shard with --workers (default: {SHARD_SIZE})')
+    parser.add_argument('--shard-dir', default=None, help='Write each shard to DIR/part-NNNNN.jsonl from its worker instead of merging into output')
+    parser.add_argument('--raw-mode', choices=RAW_MODES, default='inline', help="Raw scraped payload: inline as '_raw' (default), sidecar (separate store keyed by property_id, see raw_store.py) or drop")
+    parser.add_argument('--raw-path', default=None, help='Side-car store for --raw-mode sidecar (default: <output>.raw.sqlite3)')
     args = parser.parse_args()
 
+    if args.workers > 1 or args.shard_dir:
+        sys.exit(_run_parallel(args))
+
+    store = RawStore(args.raw_path or sidecar_path(args.output)) if args.raw_mode == 'sidecar' else None
+
+    if args.stream:
+        try:
+            count = write_jsonl(detach_raw(iter_clean_records(iter_records(args.input)), args.raw_mode, store), args.output)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Streaming clean of {args.input} -> {args.output} failed: {e}", file=sys.stderr)
+            sys.exit(2)
+        finally:
+            if store is not None:
+                store.close()
+        print(f"[OK] Cleaned data written to {args.output} (records: {count})")
+        return
+
     try:
         with open(args.input, 'r', encoding='utf-8') as f:
             payload = json.load(f)
@@ -387,6 +667,10 @@ def main():
         sys.exit(2)
 
     cleaned = clean_property_data(payload)
+    for _ in detach_raw(cleaned if isinstance(cleaned, list) else [cleaned], args.raw_mode, store):
+        pass
+    if store is not None:
+        store.close()
 
     try:
         with open(args.output, 'w', encoding='utf-8') as fo:
@@ -396,6 +680,8 @@ def main():
         sys.exit(3)
 
     print(f"[OK] Cleaned data written to {args.output} (records: {len(cleaned) if isinstance(cleaned, list) else 1})")
+    if store is not None:
+        print(f"[OK] Raw payloads written to {store.path}")
 
 if __name__ == '__main__':
     main()
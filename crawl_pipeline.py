@@ -0,0 +1,154 @@
+"""
+crawl_pipeline.py
+
+Staged crawl: network fetching on threads, parsing and cleaning on a process pool.
+
+Even with async fetching, parse_property_page and clean_property_data hold the
+GIL, so a single process tops out at one core. The pipeline runs four stages
+connected by bounded asyncio queues:
+
+    fetch   (threads)   detail page HTML            -> pages
+    parse   (processes) parse_property_page + hash  -> parsed
+    enrich  (threads)   gallery / trend / ratings   -> enriched
+    clean   (processes) build_property_details + clean_property_data
+
+A full queue blocks the stage feeding it, so a slow parse stage throttles
+fetching instead of letting raw pages pile up in memory.
+
+Usage:
+    python scrap_static_details.py --pipeline --parse-workers 8 --concurrency 32
+"""
+
+import asyncio
+import multiprocessing
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from async_crawler import API_HOST, AsyncCrawler
+from crawl_state import content_hash
+from scrap_static_details import (
+    build_property_details,
+    clean_property_data,
+    fetch_locality_ratings,
+    fetch_property_page,
+    parse_property_page,
+)
+
+DEFAULT_QUEUE_SIZE = 64
+_DONE = object()
+# workers are started while fetch threads already run; forking then can copy a
+# held lock (logging, a connection pool) into a child that never releases it
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def parse_job(html, url):
+    details, page = parse_property_page(html, url)
+    return details, page, content_hash([details, page])
+
+
+def clean_job(details, page, photos, investment, locality_ratings):
+    details = build_property_details(details, page, photos, investment, locality_ratings)
+    details = clean_property_data(details)
+    details["Property URL"] = page["url"]
+    return details
+
+
+class CrawlPipeline(AsyncCrawler):
+    def __init__(self, concurrency=16, rate_per_host=4.0, state=None, parse_workers=None, queue_size=DEFAULT_QUEUE_SIZE, failed=None):
+        super().__init__(concurrency=concurrency, rate_per_host=rate_per_host, state=state, failed=failed)
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.pool = None
+
+    async def _fetch(self, item):
+        index, url = item
+        html = await self._call(urlsplit(url).netloc, fetch_property_page, url, self.state)
+        if html is None:
+            print(f"Unchanged: {url}")
+            return None
+        return index, url, html
+
+    async def _parse(self, item):
+        index, url, html = item
+        loop = asyncio.get_running_loop()
+        details, page, digest = await loop.run_in_executor(self.pool, parse_job, html, url)
+        if self.state is not None and self.state.unchanged(url, digest):
+            print(f"Unchanged: {url}")
+            return None
+        return index, url, details, page
+
+    async def _enrich(self, item):
+        index, url, details, page = item
+        (photos, investment), locality_ratings = await asyncio.gather(
+            self._photos_and_investment(page),
+            self._call(API_HOST, fetch_locality_ratings, page["locality_id"]),
+        )
+        return index, url, details, page, photos, investment, locality_ratings
+
+    async def _clean(self, item):
+        index, url = item[0], item[1]
+        loop = asyncio.get_running_loop()
+        self._results[index] = await loop.run_in_executor(self.pool, clean_job, *item[2:])
+        print(f"Scraped details for {url}")
+        return None
+
+    async def _stage(self, handler, workers, inbox, outbox, next_workers):
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    return
+                try:
+                    result = await handler(item)
+                except Exception as e:
+                    url = item[1]
+                    print(f"Failed to scrape {url}: {e}")
+                    traceback.print_exc()
+                    if self.state is not None:
+                        self.state.discard(url)
+                    self.failed.add(url)
+                    continue
+                if result is not None and outbox is not None:
+                    await outbox.put(result)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        if outbox is not None:
+            for _ in range(next_workers):
+                await outbox.put(_DONE)
+
+    async def crawl(self, links):
+        """Crawl every link and return the scraped records in input order (failures and unchanged pages are dropped)."""
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=self.concurrency * 2)
+        )
+        self._results = [None] * len(links)
+        links_q = asyncio.Queue()
+        for item in enumerate(links):
+            links_q.put_nowait(item)
+        for _ in range(self.concurrency):
+            links_q.put_nowait(_DONE)
+        pages_q = asyncio.Queue(maxsize=self.queue_size)
+        parsed_q = asyncio.Queue(maxsize=self.queue_size)
+        enriched_q = asyncio.Queue(maxsize=self.queue_size)
+
+        with ProcessPoolExecutor(max_workers=self.parse_workers,
+                                 mp_context=multiprocessing.get_context(POOL_START_METHOD)) as pool:
+            self.pool = pool
+            await asyncio.gather(
+                self._stage(self._fetch, self.concurrency, links_q, pages_q, self.parse_workers),
+                self._stage(self._parse, self.parse_workers, pages_q, parsed_q, self.concurrency),
+                self._stage(self._enrich, self.concurrency, parsed_q, enriched_q, self.parse_workers),
+                self._stage(self._clean, self.parse_workers, enriched_q, None, 0),
+            )
+            self.pool = None
+        return [r for r in self._results if r is not None]
+
+
+def run_pipeline(links, concurrency=16, rate_per_host=4.0, state=None, parse_workers=None, queue_size=DEFAULT_QUEUE_SIZE, failed=None):
+    pipeline = CrawlPipeline(
+        concurrency=concurrency, rate_per_host=rate_per_host, state=state,
+        parse_workers=parse_workers, queue_size=queue_size, failed=failed,
+    )
+    return asyncio.run(pipeline.crawl(links))
@@ -0,0 +1,112 @@
+"""
+crawl_state.py
+
+Per-URL crawl state for incremental recrawls.
+
+For every property URL we remember when it was last fetched, a hash of the
+parsed page content and the ETag / Last-Modified validators the server sent.
+On the next run the detail page is requested conditionally; a 304, or a 200
+whose parsed content hashes the same as last time, means the listing has not
+changed and its follow-up API calls and output record are skipped.
+
+Updates are staged in memory and only written by save(), which the scraper
+calls after the output file is on disk, so a crash never marks a listing as
+crawled without its record having been emitted.
+
+Usage:
+    python scrap_static_details.py --incremental --output property_details.delta.json
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = ".cache/crawl_state.sqlite3"
+
+
+def content_hash(obj):
+    payload = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class CrawlState:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS crawl_state ("
+            " url TEXT PRIMARY KEY,"
+            " fetched_at REAL NOT NULL,"
+            " content_hash TEXT,"
+            " etag TEXT,"
+            " last_modified TEXT)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._known = {
+            url: {"fetched_at": fetched_at, "content_hash": digest, "etag": etag, "last_modified": last_modified}
+            for url, fetched_at, digest, etag, last_modified in self._conn.execute("SELECT * FROM crawl_state")
+        }
+        self._pending = {}
+
+    def get(self, url):
+        return self._known.get(url)
+
+    def is_fresh(self, url, max_age):
+        """True if the URL was fetched less than max_age seconds ago."""
+        entry = self._known.get(url)
+        return bool(max_age) and entry is not None and time.time() - entry["fetched_at"] < max_age
+
+    def conditional_headers(self, url):
+        entry = self._known.get(url)
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def observe_response(self, url, response):
+        """Stage the fetch time and validators of a response; a 304 keeps the stored hash."""
+        entry = dict(self._known.get(url) or {"content_hash": None, "etag": None, "last_modified": None})
+        entry["fetched_at"] = time.time()
+        if response.status_code != 304:
+            entry["etag"] = response.headers.get("ETag")
+            entry["last_modified"] = response.headers.get("Last-Modified")
+        with self._lock:
+            self._pending[url] = entry
+
+    def unchanged(self, url, digest):
+        """Stage the content hash and report whether it matches the last crawl."""
+        known = self._known.get(url)
+        with self._lock:
+            entry = self._pending.setdefault(url, {"fetched_at": time.time(), "etag": None, "last_modified": None})
+            entry["content_hash"] = digest
+        return known is not None and known["content_hash"] == digest
+
+    def discard(self, url):
+        """Forget staged updates for a URL whose scrape failed, so it is retried next run."""
+        with self._lock:
+            self._pending.pop(url, None)
+
+    def save(self):
+        with self._lock:
+            rows = [
+                (url, e["fetched_at"], e["content_hash"], e["etag"], e["last_modified"])
+                for url, e in self._pending.items()
+            ]
+            self._conn.executemany("INSERT OR REPLACE INTO crawl_state VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._known.update(self._pending)
+            self._pending = {}
+        return len(rows)
+
+    def close(self):
+        self._conn.close()
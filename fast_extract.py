@@ -0,0 +1,181 @@
+"""
+fast_extract.py
+
+Fast-path extraction of a magicbricks detail page without building a
+BeautifulSoup tree.
+
+Building a full tree of a multi-hundred-KB page is the expensive part of
+parse_property_page, yet we only need a handful of things from it: the
+ld+json block, the window.SERVER_PRELOADED_STATE_DETAILS object, the property
+id and price tags and the mb-ldp__dtls__body__list items. This module walks
+the <script> tags once, collecting both JSON blobs in the same pass, and finds
+the remaining tags by scanning for their class names with str.find and
+matching only the surrounding tags.
+
+Text is extracted the same way BeautifulSoup's get_text(strip=True) does it
+(entities decoded, each text node stripped, nodes joined with ""), so the
+output matches scrap_static_details.parse_property_page_soup. The one
+deliberate difference: the preloaded state is decoded with raw_decode, so a
+later "};" in the same <script> no longer makes the greedy regex fail.
+bench_extract.py checks the outputs against each other and times both on
+saved pages.
+"""
+
+import json
+import re
+from html import unescape
+
+SCRIPT_RE = re.compile(r'<script\b([^>]*)>(.*?)</script\s*>', re.S | re.I)
+LD_JSON_TYPE_RE = re.compile(r'\btype\s*=\s*["\']?application/ld\+json["\'\s>]', re.I)
+PRELOADED_STATE = "window.SERVER_PRELOADED_STATE_DETAILS"
+ASSIGN_RE = re.compile(r'\s*=\s*')
+OPEN_TAG_RE = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)\b([^>]*)>')
+CLASS_ATTR_RE = re.compile(r'\bclass\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.I)
+TEXT_SPLIT_RE = re.compile(r'<!--.*?-->|<script\b.*?</script\s*>|<style\b.*?</style\s*>|<[^>]*>', re.S | re.I)
+
+_decoder = json.JSONDecoder()
+_close_tag_res = {}
+
+
+def _has_class(attrs, cls):
+    m = CLASS_ATTR_RE.search(attrs)
+    if not m:
+        return False
+    value = m.group(1) if m.group(1) is not None else (m.group(2) if m.group(2) is not None else m.group(3))
+    return cls in value.split()
+
+
+def find_element(html, cls, start=0, end=None, tag=None):
+    """
+    Find the first element in html[start:end] whose class list contains cls.
+    Returns (tag_name, content_start, content_end, element_end) or None.
+    """
+    if end is None:
+        end = len(html)
+    pos = start
+    while True:
+        hit = html.find(cls, pos, end)
+        if hit == -1:
+            return None
+        pos = hit + len(cls)
+        lt = html.rfind("<", start, hit)
+        m = OPEN_TAG_RE.match(html, lt) if lt != -1 else None
+        if not m or m.end() <= hit:
+            continue
+        name = m.group(1).lower()
+        if (tag is None or name == tag) and _has_class(m.group(2), cls):
+            content_end, element_end = _element_end(html, name, m.end(), end)
+            return name, m.end(), content_end, element_end
+
+
+def _element_end(html, name, content_start, end):
+    """Return (content_end, element_end) of the element whose content starts at content_start."""
+    tag_re = _close_tag_res.get(name)
+    if tag_re is None:
+        tag_re = _close_tag_res[name] = re.compile(r'<(/?)%s\b[^>]*>' % re.escape(name), re.I)
+    depth = 1
+    for m in tag_re.finditer(html, content_start, end):
+        if m.group(1):
+            depth -= 1
+            if depth == 0:
+                return m.start(), m.end()
+        elif not m.group(0).endswith("/>"):
+            depth += 1
+    return end, end
+
+
+def get_text(fragment):
+    """Equivalent of BeautifulSoup's get_text(strip=True) for an HTML fragment."""
+    parts = (unescape(piece).strip() for piece in TEXT_SPLIT_RE.split(fragment))
+    return "".join(p for p in parts if p)
+
+
+def _element_text(html, cls, start=0, end=None, tag=None):
+    found = find_element(html, cls, start, end, tag)
+    if found is None:
+        return None
+    return get_text(html[found[1]:found[2]])
+
+
+def _scan_scripts(html):
+    """Single pass over <script> tags returning (ld+json property data, preloaded state dict or None)."""
+    property_data = None
+    preloaded = None
+    preloaded_seen = False
+    for m in SCRIPT_RE.finditer(html):
+        attrs, body = m.group(1), m.group(2)
+        if property_data is None and LD_JSON_TYPE_RE.search(attrs + ">"):
+            try:
+                data = json.loads(body)
+                if isinstance(data, dict) and data.get("@type") != "Organization":
+                    property_data = data
+            except ValueError:
+                pass
+        elif not preloaded_seen and PRELOADED_STATE in body:
+            preloaded_seen = True
+            idx = body.index(PRELOADED_STATE) + len(PRELOADED_STATE)
+            assign = ASSIGN_RE.match(body, idx)
+            if assign and body.startswith("{", assign.end()):
+                try:
+                    preloaded, _ = _decoder.raw_decode(body, assign.end())
+                except ValueError:
+                    preloaded = None
+        if property_data is not None and preloaded_seen:
+            break
+    return property_data or {}, preloaded
+
+
+def _scan_details(html):
+    details = {}
+    pos = 0
+    while True:
+        ul = find_element(html, "mb-ldp__dtls__body__list", pos, tag="ul")
+        if ul is None:
+            return details
+        _, ul_start, ul_end, pos = ul
+        item_pos = ul_start
+        while True:
+            li = find_element(html, "mb-ldp__dtls__body__list--item", item_pos, ul_end, tag="li")
+            if li is None:
+                break
+            _, li_start, li_end, item_pos = li
+            label = find_element(html, "mb-ldp__dtls__body__list--label", li_start, li_end)
+            value = find_element(html, "mb-ldp__dtls__body__list--value", li_start, li_end)
+            if label is None or value is None:
+                continue
+            label_text = get_text(html[label[1]:label[2]])
+            if label_text == "Carpet Area":
+                details["Carpet Area"] = _element_text(html, "mb-ldp__dtls__body__list", value[1], value[2])
+                details["Price Per Sqft"] = _element_text(html, "mb-ldp__dtls__body__list--size", value[1], value[2])
+            else:
+                details[label_text] = get_text(html[value[1]:value[2]])
+
+
+def parse_property_page(html, url):
+    """Drop-in replacement for scrap_static_details.parse_property_page_soup."""
+    property_data, preloaded = _scan_scripts(html)
+
+    property_id = _element_text(html, "mb-ldp__posted--propid", tag="span")
+    if property_id is not None:
+        property_id = property_id.split(":")[-1].strip()
+    price = _element_text(html, "mb-ldp__dtls__price", tag="div")
+
+    details = _scan_details(html)
+
+    property_type_code = None
+    locality_id = None
+    if isinstance(preloaded, dict):
+        info = preloaded.get("propertyDetailInfoBeanData", {})
+        property_type_code = info.get("propertyDetail", {}).get("detailBean", {}).get("propertyTypeCode")
+        locality_id = info.get("localityId")
+
+    page = {
+        "url": url,
+        "property_data": property_data,
+        "property_id": property_id,
+        "price": price,
+        "property_type_code": property_type_code,
+        "locality_id": locality_id,
+        "locality": property_data.get("address", {}).get("addressLocality", ""),
+    }
+    return details, page
@@ -0,0 +1,119 @@
+"""
+http_session.py
+
+One pooled requests.Session shared by every scraper fetcher.
+
+Keeping a single session means the TCP+TLS connection to magicbricks.com is
+reused across calls instead of being re-established for every request. The
+session retries 429/5xx responses with exponential backoff (honouring
+Retry-After) and every call gets a timeout so a hung socket cannot stall the
+whole run.
+
+Usage:
+    import http_session
+    http_session.configure(pool_maxsize=32, timeout=20)
+    response = http_session.get(url, headers=headers)
+
+When a page archive is attached with use_archive(), responses are recorded in
+it; in offline mode they are replayed from it and the network is never used.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_settings = {
+    "pool_connections": 4,
+    "pool_maxsize": 16,
+    "timeout": (5, 30),
+    "retries": 4,
+    "backoff_factor": 0.5,
+}
+_session = None
+_lock = threading.Lock()
+_archive = None
+_offline = False
+
+
+def _build_session():
+    retry = Retry(
+        total=_settings["retries"],
+        backoff_factor=_settings["backoff_factor"],
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=_settings["pool_connections"],
+        pool_maxsize=_settings["pool_maxsize"],
+        max_retries=retry,
+        pool_block=True,
+    )
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure(pool_connections=None, pool_maxsize=None, timeout=None, retries=None, backoff_factor=None):
+    """Change pool/timeout/retry settings; the shared session is rebuilt on next use."""
+    global _session
+    updates = {
+        "pool_connections": pool_connections,
+        "pool_maxsize": pool_maxsize,
+        "timeout": timeout,
+        "retries": retries,
+        "backoff_factor": backoff_factor,
+    }
+    with _lock:
+        _settings.update({k: v for k, v in updates.items() if v is not None})
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def use_archive(archive, offline=False):
+    """Record every response into a page_archive.PageArchive, or with offline=True serve requests from it."""
+    global _archive, _offline
+    _archive = archive
+    _offline = offline
+
+
+def get(url, **kwargs):
+    if _archive is not None and _offline:
+        return _archive.replay(url)
+    kwargs.setdefault("timeout", _settings["timeout"])
+    response = get_session().get(url, **kwargs)
+    if _archive is not None:
+        _archive.store(url, response)
+    return response
+
+
+def record(url, body, content_type=None):
+    """Archive body (text) as the response to url, for a cache hit that stood in for get(url)."""
+    if _archive is not None and not _offline:
+        _archive.store_content(url, body.encode("utf-8"), content_type, "utf-8")
+
+
+def close():
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
@@ -0,0 +1,137 @@
+"""
+link_frontier.py
+
+Persistent crawl frontier of property detail links, deduplicated on the
+canonical magicbricks property id.
+
+The same listing shows up under many URLs (different slugs, repeated runs of
+scrap_dynemic_links.py), but they all carry the same hex id in "&id=...". The
+frontier keys every link on that id, keeps an in-memory set of known ids for
+O(1) dedup and stores priority and fetch status per listing in SQLite so the
+detail crawler can pull pending work directly.
+
+Usage:
+    python link_frontier.py --import links.txt          # seed from an existing links file
+    python link_frontier.py --stats
+    python scrap_dynemic_links.py --frontier .cache/frontier.sqlite3
+    python scrap_static_details.py --frontier .cache/frontier.sqlite3 --limit 500
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = ".cache/frontier.sqlite3"
+PROPERTY_ID_RE = re.compile(r'[&?]id=([0-9a-fA-F]+)')
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+def property_key(url):
+    """Canonical key of a listing URL: its hex property id, or the URL itself if it has none."""
+    m = PROPERTY_ID_RE.search(url)
+    return m.group(1).lower() if m else url.strip()
+
+
+class LinkFrontier:
+    def __init__(self, path=DEFAULT_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            " key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " priority INTEGER NOT NULL DEFAULT 0,"
+            " status TEXT NOT NULL DEFAULT 'pending',"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " discovered_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS frontier_queue ON frontier (status, priority DESC, discovered_at)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.seen = {key for (key,) in self._conn.execute("SELECT key FROM frontier")}
+
+    def add(self, links, priority=0):
+        """Add unseen links as pending; returns how many were new."""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for link in links:
+                link = link.strip()
+                if not link:
+                    continue
+                key = property_key(link)
+                if key in self.seen:
+                    continue
+                self.seen.add(key)
+                rows.append((key, link, priority, PENDING, 0, now, now))
+            if rows:
+                self._conn.executemany("INSERT OR IGNORE INTO frontier VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self._conn.commit()
+        return len(rows)
+
+    def next_batch(self, limit=None, statuses=(PENDING,), max_attempts=None):
+        """URLs to crawl next, highest priority first."""
+        sql = "SELECT url FROM frontier WHERE status IN (%s)" % ",".join("?" * len(statuses))
+        params = list(statuses)
+        if max_attempts is not None:
+            sql += " AND attempts < ?"
+            params.append(max_attempts)
+        sql += " ORDER BY priority DESC, discovered_at"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [url for (url,) in self._conn.execute(sql, params)]
+
+    def mark(self, urls, status, attempt=True):
+        """Set the status of urls; attempt=True counts this as a fetch attempt."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE frontier SET status = ?, attempts = attempts + ?, updated_at = ? WHERE key = ?",
+                [(status, int(attempt), now, property_key(url)) for url in urls],
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the property link frontier")
+    parser.add_argument('--path', default=DEFAULT_PATH, help=f'Frontier database (default: {DEFAULT_PATH})')
+    parser.add_argument('--import', dest='import_file', default=None, help='Add every link in this file as pending')
+    parser.add_argument('--priority', type=int, default=0, help='Priority for imported links (default: 0)')
+    parser.add_argument('--retry-failed', action='store_true', help='Move failed links back to pending')
+    parser.add_argument('--stats', action='store_true', help='Print link counts per status')
+    args = parser.parse_args()
+
+    frontier = LinkFrontier(args.path)
+    if args.import_file:
+        with open(args.import_file, "r") as f:
+            added = frontier.add(f, priority=args.priority)
+        print(f"Imported {added} new links from {args.import_file}")
+    if args.retry_failed:
+        frontier.mark(frontier.next_batch(statuses=(FAILED,)), PENDING, attempt=False)
+    if args.stats or not (args.import_file or args.retry_failed):
+        for status, count in sorted(frontier.stats().items()):
+            print(f"{status:<10} {count}")
+    frontier.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+locality_cache.py
+
+Persistent on-disk cache for the locality-level magicbricks APIs.
+
+Locality ratings depend only on the locality id and the price trend only on
+(locality id, propType), but the scraper used to fetch both again for every
+listing. Entries live in a small SQLite file, expire after a TTL and the least
+recently used entries are evicted once the cache holds more than max_entries.
+
+Concurrent crawlers asking for the same key wait on a per-key lock, so even a
+cold crawl makes one call per locality.
+
+Usage:
+    import locality_cache
+    locality_cache.configure(".cache/locality.sqlite3", ttl=7 * 24 * 3600)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+DEFAULT_PATH = ".cache/locality.sqlite3"
+DEFAULT_TTL = 7 * 24 * 3600  # locality stats move slowly; a week is fresh enough
+DEFAULT_MAX_ENTRIES = 50000
+
+
+class LocalityCache:
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+        self._conn.commit()
+        self._db_lock = threading.Lock()
+        self._key_locks = defaultdict(threading.Lock)
+        self._key_locks_guard = threading.Lock()
+
+    @staticmethod
+    def _key(parts):
+        return json.dumps([str(p) for p in parts])
+
+    def get(self, *parts):
+        """Return the cached value for the key, or None if missing or expired."""
+        key = self._key(parts)
+        now = time.time()
+        with self._db_lock:
+            row = self._conn.execute("SELECT value, stored_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, stored_at = row
+            if self.ttl and stored_at + self.ttl < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(value)
+
+    def put(self, value, *parts):
+        key = self._key(parts)
+        now = time.time()
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+            if self.max_entries and count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    @contextmanager
+    def lock(self, *parts):
+        """Serialize fetches of the same key so concurrent misses trigger a single request."""
+        key = self._key(parts)
+        with self._key_locks_guard:
+            key_lock = self._key_locks[key]
+        with key_lock:
+            yield
+
+    def close(self):
+        with self._db_lock:
+            self._conn.close()
+
+
+_cache = None
+
+
+def configure(path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+    global _cache
+    disable()
+    _cache = LocalityCache(path, ttl=ttl, max_entries=max_entries)
+    return _cache
+
+
+def disable():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = None
+
+
+def get_cache():
+    return _cache
@@ -0,0 +1,143 @@
+"""
+page_archive.py
+
+Compressed, content-addressed archive of every page and API response the
+scraper fetches, so records can be rebuilt offline when the extraction or
+cleaning logic changes.
+
+Layout:
+    <archive>/objects/ab/abcdef....zst   response body, named by its sha256 (gzip if zstandard is missing)
+    <archive>/index.sqlite3              url -> digest, status, content type, encoding, fetch time
+
+Identical bodies are stored once. http_session records into the archive when
+one is attached, and in offline mode answers every request from it instead of
+the network.
+
+Usage:
+    python scrap_static_details.py --archive archive/             # crawl and archive
+    python scrap_static_details.py --archive archive/ --reparse   # rebuild records without network access
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+DEFAULT_PATH = "archive"
+PROPERTY_PAGE_MARKER = "/propertyDetails/"
+
+
+class PageArchive:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.objects_dir = os.path.join(path, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(path, "index.sqlite3"), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY,"
+            " digest TEXT NOT NULL,"
+            " codec TEXT NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " content_type TEXT,"
+            " encoding TEXT,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        # zstandard compressor / decompressor objects are not thread-safe, and
+        # --async / --pipeline runs store from several fetch threads: one pair per thread
+        self._local = threading.local()
+        self.codec = "zst" if zstandard is not None else "gz"
+
+    def _blob_path(self, digest, codec):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.{codec}")
+
+    def _compress(self, data):
+        if self.codec == "zst":
+            compressor = getattr(self._local, "compressor", None)
+            if compressor is None:
+                compressor = self._local.compressor = zstandard.ZstdCompressor(level=10)
+            return compressor.compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def _decompress(self, data, codec):
+        if codec == "zst":
+            if zstandard is None:
+                raise RuntimeError("archive blob is zstd-compressed but the zstandard package is not installed")
+            decompressor = getattr(self._local, "decompressor", None)
+            if decompressor is None:
+                decompressor = self._local.decompressor = zstandard.ZstdDecompressor()
+            return decompressor.decompress(data)
+        return gzip.decompress(data)
+
+    def _write_blob(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest, self.codec)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(self._compress(data))
+            os.replace(tmp, path)
+        return digest
+
+    def store(self, url, response):
+        """Archive a successful response; anything but a 200 is ignored."""
+        if response.status_code != 200:
+            return None
+        return self.store_content(url, response.content, response.headers.get("Content-Type"), response.encoding)
+
+    def store_content(self, url, content, content_type=None, encoding=None):
+        """Archive content as the 200 response to url (used when a cache answered instead of the network)."""
+        digest = self._write_blob(content)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, self.codec, 200, content_type, encoding, time.time()),
+            )
+            self._conn.commit()
+        return digest
+
+    def replay(self, url):
+        """Build a requests.Response for url from the archive (status 404 if it was never archived)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, codec, status, content_type, encoding FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        response = requests.Response()
+        response.url = url
+        if row is None:
+            response.status_code = 404
+            response._content = b""
+            return response
+        digest, codec, status, content_type, encoding = row
+        with open(self._blob_path(digest, codec), "rb") as f:
+            response._content = self._decompress(f.read(), codec)
+        response.status_code = status
+        if content_type:
+            response.headers["Content-Type"] = content_type
+        response.encoding = encoding
+        return response
+
+    def page_urls(self):
+        """Archived property detail page URLs, oldest fetch first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM responses WHERE instr(url, ?) > 0 ORDER BY fetched_at",
+                (PROPERTY_PAGE_MARKER,),
+            ).fetchall()
+        return [url for (url,) in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
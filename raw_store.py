@@ -0,0 +1,101 @@
+"""
+raw_store.py
+
+Side-car store for the raw scraped payload of cleaned records.
+
+clean_data.py used to copy every raw record into its cleaned record under
+"_raw", roughly doubling the cleaned JSON and everything that loads it. With
+--raw-mode sidecar the payload goes here instead: one zlib-compressed JSON blob
+per property_id in SQLite, so the cleaned file stays lean and a single raw
+record can still be pulled up when debugging without reading the rest.
+
+Usage:
+    python clean_data.py --raw-mode sidecar property_details.json cleaned_properties.json
+    python raw_store.py cleaned_properties.raw.sqlite3 79060217    # print one raw record
+    python raw_store.py cleaned_properties.raw.sqlite3 --list      # list stored property ids
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import zlib
+
+FLUSH_EVERY = 500
+
+
+def sidecar_path(output_path):
+    """Default side-car location next to a cleaned output file."""
+    root, _ = os.path.splitext(output_path.rstrip("/"))
+    return f"{root}.raw.sqlite3"
+
+
+class RawStore:
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS raw ("
+            " property_id TEXT PRIMARY KEY,"
+            " payload BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        self._pending = []
+
+    def put(self, property_id, raw):
+        """Stage the raw payload of one record; written in batches."""
+        payload = json.dumps(raw, ensure_ascii=False, separators=(",", ":"), default=str)
+        self._pending.append((str(property_id), zlib.compress(payload.encode("utf-8"))))
+        if len(self._pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._conn.executemany("INSERT OR REPLACE INTO raw VALUES (?, ?)", self._pending)
+            self._conn.commit()
+            self._pending = []
+
+    def get(self, property_id):
+        """Raw payload stored for property_id, or None."""
+        self.flush()
+        row = self._conn.execute("SELECT payload FROM raw WHERE property_id = ?", (str(property_id),)).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def ids(self):
+        self.flush()
+        return [pid for (pid,) in self._conn.execute("SELECT property_id FROM raw ORDER BY property_id")]
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up raw payloads in a clean_data side-car store")
+    parser.add_argument('path', help='Side-car database written by clean_data.py --raw-mode sidecar')
+    parser.add_argument('property_id', nargs='?', help='Print the raw payload of this property')
+    parser.add_argument('--list', action='store_true', help='List the stored property ids')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        parser.error(f"{args.path} does not exist")
+    store = RawStore(args.path)
+    if args.list or not args.property_id:
+        for pid in store.ids():
+            print(pid)
+    else:
+        raw = store.get(args.property_id)
+        if raw is None:
+            print(f"No raw payload for {args.property_id}")
+        else:
+            print(json.dumps(raw, ensure_ascii=False, indent=4))
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
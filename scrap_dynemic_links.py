@@ -1,64 +1,213 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from bs4 import BeautifulSoup
-import time
+"""
+scrap_dynemic_links.py
+
+Discover property detail links from magicbricks search results and stream them to links.txt.
+
+Two modes:
+    http     (default) page through the server-rendered search results with
+             &page=N over the shared pooled session; no browser needed.
+    browser  drive headless Chrome, scroll the infinite list and wait for new
+             results to arrive instead of sleeping a fixed time per scroll.
+
+Every (city, BHK, property type) combination is searched separately and the
+searches run concurrently. Links are deduplicated against the output file and
+appended as soon as they are found, or added to a link_frontier database with
+--frontier.
+
+Usage:
+    python scrap_dynemic_links.py --cities Ahmedabad,Surat --bhk 2,3,4
+    python scrap_dynemic_links.py --mode browser --scrolls 20 --chrome-binary /usr/bin/google-chrome
+"""
+
+import argparse
+import itertools
 import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def scrape_all_links(property_type, bhk, city, scroll_count):
-    url = f"https://www.magicbricks.com/property-for-sale/residential-real-estate?bedroom={bhk}&proptype={property_type}&cityName={city}"
-    print("Scraping links from:", url)
-    service = Service('chromedriver.exe')
-    options = webdriver.ChromeOptions()
-    options.binary_location = r"C:/Users/moham/OneDrive/Desktop/chrome-win64/chrome-win64/chrome.exe"
-    options.add_argument("--window-size=1920,1080")
-    driver = webdriver.Chrome(service=service, options=options)
+import http_session
+from fast_extract import LD_JSON_TYPE_RE, SCRIPT_RE
+from link_frontier import LinkFrontier
 
-    driver.get(url)
-    time.sleep(4)
+SEARCH_URL = "https://www.magicbricks.com/property-for-sale/residential-real-estate?bedroom={bhk}&proptype={property_type}&cityName={city}"
+PROPERTY_TYPES = "Multistorey-Apartment,Builder-Floor-Apartment,Penthouse,Studio-Apartment,Residential-House,Villa"
+LISTING_TYPES = ["Apartment", "SingleFamilyResidence", "Land"]
 
-    for i in range(scroll_count):
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        print(f"Scrolled {i+1} times...")
-        time.sleep(4)
 
-    # Get full page source
-    page_source = driver.page_source
-    driver.quit()
+def links_from_ld_json(data):
+    links = set()
+    # Case 1: Single listing
+    if isinstance(data, dict) and data.get("@type") in LISTING_TYPES:
+        link = data.get("url")
+        if link and "magicbricks.com/propertyDetails/" in link:
+            links.add(link)
 
-    soup = BeautifulSoup(page_source, "html.parser")
-    script_tags = soup.find_all("script", {"type": "application/ld+json"})
+    # Case 2: List of items
+    elif isinstance(data, dict) and data.get("@type") == "ItemList":
+        for item in data.get("itemListElement", []):
+            link = item.get("url")
+            if link and "magicbricks.com/propertyDetails/" in link:
+                links.add(link)
+    return links
 
-    property_links = set()
 
-    for script in script_tags:
+def links_from_scripts(contents):
+    links = set()
+    for content in contents:
+        if not content:
+            continue
         try:
-            content = script.string
-            if not content:
-                continue
-            data = json.loads(content)
-
-            # Case 1: Single listing
-            if isinstance(data, dict) and data.get("@type") in ["Apartment", "SingleFamilyResidence", "Land"]:
-                link = data.get("url")
-                if link and "magicbricks.com/propertyDetails/" in link:
-                    property_links.add(link)
-
-            # Case 2: List of items
-            elif isinstance(data, dict) and data.get("@type") == "ItemList":
-                for item in data.get("itemListElement", []):
-                    link = item.get("url")
-                    if link and "magicbricks.com/propertyDetails/" in link:
-                        property_links.add(link)
-
-        except Exception as e:
+            links |= links_from_ld_json(json.loads(content))
+        except Exception:
             continue
+    return links
+
+
+def links_from_html(html):
+    return links_from_scripts(body for attrs, body in SCRIPT_RE.findall(html) if LD_JSON_TYPE_RE.search(attrs + ">"))
+
+
+class LinkWriter:
+    """Appends unseen links to the output file as they are discovered (thread-safe)."""
+
+    def __init__(self, path):
+        self.seen = set()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.seen = {line.strip() for line in f if line.strip()}
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def add(self, links):
+        with self._lock:
+            new = [link for link in links if link not in self.seen]
+            for link in new:
+                self.seen.add(link)
+                self._file.write(link + "\n")
+            self._file.flush()
+        return len(new)
+
+    def close(self):
+        self._file.close()
+
+
+def scrape_search_pages(property_type, bhk, city, max_pages, on_links):
+    """Walk &page=1..max_pages of a search, stopping once a page yields nothing new."""
+    url = SEARCH_URL.format(bhk=bhk, property_type=property_type, city=city)
+    found = set()
+    for page in range(1, max_pages + 1):
+        response = http_session.get(f"{url}&page={page}")
+        if response.status_code != 200:
+            print(f"Search page {page} returned {response.status_code}: {url}")
+            break
+        links = links_from_html(response.text) - found
+        if not links:
+            break
+        found |= links
+        on_links(links)
+    print(f"{city} / {bhk} BHK / {property_type}: {len(found)} links")
+    return found
+
+
+def scrape_all_links(property_type, bhk, city, scroll_count, on_links=None, chrome_binary=None, wait_timeout=10.0):
+    """Scroll the search results in headless Chrome, collecting links after each batch of results loads."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    url = SEARCH_URL.format(bhk=bhk, property_type=property_type, city=city)
+    print("Scraping links from:", url)
+    options = webdriver.ChromeOptions()
+    chrome_binary = chrome_binary or os.environ.get("CHROME_BINARY")
+    if chrome_binary:
+        options.binary_location = chrome_binary
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1920,1080")
+    driver = webdriver.Chrome(service=Service(), options=options)
+
+    ld_json_js = (
+        "return Array.from(document.querySelectorAll('script[type=\"application/ld+json\"]'))"
+        ".map(s => s.textContent);"
+    )
+    property_links = set()
+    try:
+        driver.get(url)
+        wait = WebDriverWait(driver, wait_timeout, poll_frequency=0.25)
+        wait.until(lambda d: d.execute_script("return document.readyState") == "complete")
+
+        for i in range(scroll_count + 1):
+            new = links_from_scripts(driver.execute_script(ld_json_js)) - property_links
+            property_links |= new
+            if new and on_links:
+                on_links(new)
+            if i == scroll_count:
+                break
+            height = driver.execute_script("return document.body.scrollHeight")
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            try:
+                # the next batch of results has loaded once the page grows
+                wait.until(lambda d: d.execute_script("return document.body.scrollHeight") > height)
+            except TimeoutException:
+                print(f"No more results after {i + 1} scrolls")
+                break
+    finally:
+        driver.quit()
 
     return list(property_links)
 
-links = scrape_all_links(  "Multistorey-Apartment,Builder-Floor-Apartment,Penthouse,Studio-Apartment,Residential-House,Villa" , "2,3,4" , "Ahmedabad", 5)
 
-print( 'total ',len(links), ' links found')
-for link in links:
-    with open("links.txt", "a") as file:
-        file.write(link + "\n")
\ No newline at end of file
+def main():
+    parser = argparse.ArgumentParser(description="Discover magicbricks property links")
+    parser.add_argument('--cities', default='Ahmedabad', help='Comma-separated cities (default: Ahmedabad)')
+    parser.add_argument('--bhk', default='2,3,4', help='Comma-separated BHK values (default: 2,3,4)')
+    parser.add_argument('--types', default=PROPERTY_TYPES, help='Comma-separated property types (default: all residential)')
+    parser.add_argument('--mode', choices=['http', 'browser'], default='http', help='Discovery mode (default: http)')
+    parser.add_argument('--max-pages', type=int, default=50, help='Search result pages per combination in http mode (default: 50)')
+    parser.add_argument('--scrolls', type=int, default=5, help='Max scrolls per combination in browser mode (default: 5)')
+    parser.add_argument('--workers', type=int, default=8, help='Combinations searched concurrently (default: 8)')
+    parser.add_argument('--chrome-binary', default=None, help='Chrome binary for browser mode (default: $CHROME_BINARY or system Chrome)')
+    parser.add_argument('--output', default='links.txt', help='Links file to append to (default: links.txt)')
+    parser.add_argument('--frontier', default=None, help='Add links to this link_frontier database instead of --output')
+    args = parser.parse_args()
+
+    cities = [c.strip() for c in args.cities.split(",") if c.strip()]
+    bhks = [b.strip() for b in args.bhk.split(",") if b.strip()]
+    types = [t.strip() for t in args.types.split(",") if t.strip()]
+    combos = list(itertools.product(types, bhks, cities))
+
+    http_session.configure(pool_maxsize=max(args.workers, 4))
+    writer = LinkFrontier(args.frontier) if args.frontier else LinkWriter(args.output)
+    added = 0
+    start = time.time()
+    count_lock = threading.Lock()
+
+    def on_links(links):
+        nonlocal added
+        new = writer.add(links)
+        with count_lock:
+            added += new
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        if args.mode == 'http':
+            futures = [pool.submit(scrape_search_pages, t, b, c, args.max_pages, on_links) for t, b, c in combos]
+        else:
+            futures = [
+                pool.submit(scrape_all_links, t, b, c, args.scrolls, on_links, args.chrome_binary)
+                for t, b, c in combos
+            ]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Search failed: {e}")
+    writer.close()
+    http_session.close()
+
+    print(f"total {added} new links found ({len(combos)} searches, {time.time() - start:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
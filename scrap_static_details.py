@@ -1,8 +1,15 @@
 from bs4 import BeautifulSoup
 import json
-import requests
+import os
 import re
 import traceback
+import argparse
+import fast_extract
+import http_session
+import locality_cache
+import page_archive
+from link_frontier import DONE, FAILED, LinkFrontier, property_key
+from crawl_state import CrawlState, DEFAULT_PATH as CRAWL_STATE_PATH, content_hash
 # property_id : <span class="mb-ldp__posted--propid">Property ID: 80819655</span>
 # price : <div class="mb-ldp__dtls__price"><span class="rupees">₹</span>1.55 Cr </div>
 # bhk : from url (no need to scrape)
@@ -40,12 +47,46 @@ import traceback
 #                 }		
 #         }
 # </script>
+def _through_locality_cache(url, fetch, *key):
+    """
+    fetch() -> (value, response or None) for a locality API url, answered from
+    the locality cache when possible. The cache keeps the response body next to
+    the parsed value, so a hit is still written to the page archive under url
+    and --reparse can replay it.
+    """
+    cache = locality_cache.get_cache()
+    if cache is None:
+        return fetch()[0]
+    with cache.lock(*key):
+        cached = cache.get(*key)
+        # entries cached before bodies were kept have nothing to archive: fetch those again
+        if isinstance(cached, dict) and "body" in cached:
+            http_session.record(url, cached["body"], cached["content_type"])
+            return cached["value"]
+        value, response = fetch()
+        if response is not None:
+            cache.put({"value": value, "body": response.text, "content_type": response.headers.get("Content-Type")}, *key)
+        return value
+
+
 def fetch_locality_ratings(locality_id):
-    url = f"https://www.magicbricks.com/mbldp/localityDetailInfo?localityId={locality_id}"
+    if locality_id is None:
+        return _fetch_locality_ratings(locality_id)[0]
+    return _through_locality_cache(locality_ratings_url(locality_id), lambda: _fetch_locality_ratings(locality_id),
+                                   "ratings", locality_id)
+
+
+def locality_ratings_url(locality_id):
+    return f"https://www.magicbricks.com/mbldp/localityDetailInfo?localityId={locality_id}"
+
+
+def _fetch_locality_ratings(locality_id):
+    """(ratings, response), or ({}, None) when the API gave nothing usable."""
+    url = locality_ratings_url(locality_id)
     headers = {"User-Agent": "Mozilla/5.0"}
 
     try:
-        response = requests.get(url, headers=headers)
+        response = http_session.get(url, headers=headers)
         if response.status_code == 200:
             data = response.json()
             ratings = {
@@ -56,13 +97,13 @@ def fetch_locality_ratings(locality_id):
                 "market": data.get("marketRating"),
                 "area_description": data.get("areaDescription", "")
             }
-            return ratings
+            return ratings, response
         else:
             print("Locality rating API returned non-200 status:", response.status_code)
     except Exception as e:
         print("Error fetching locality ratings:", e)
 
-    return {}
+    return {}, None
 def fetch_gallery_photos(prop_id):
     url = f"https://www.magicbricks.com/photoapi/property/photos?propId={prop_id}&type=large"
     headers = {"User-Agent": "Mozilla/5.0"}
@@ -70,7 +111,7 @@ def fetch_gallery_photos(prop_id):
     project_photos = []
     locality_photos = []
     try:
-        response = requests.get(url, headers=headers)
+        response = http_session.get(url, headers=headers)
         data = response.json()
         # Property Photos
         if "propPhotos" in data:
@@ -95,25 +136,41 @@ def fetch_gallery_photos(prop_id):
     return prop_photos, project_photos, locality_photos
 
 
-import requests
-import json
-
 def fetch_investment_data(psmid, property_type_code, locality_id, locality_name):
-    headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
+    # the locality trend only depends on the locality and the property type, not on psmid
+    def fetch():
+        historical_price, property_yield, response = _fetch_investment_data(psmid, property_type_code, locality_id, locality_name)
+        return [historical_price, property_yield], response
+    if locality_id is None:
+        historical_price, property_yield = fetch()[0]
+    else:
+        historical_price, property_yield = _through_locality_cache(
+            investment_data_url(psmid, property_type_code, locality_id, locality_name), fetch,
+            "trend", locality_id, property_type_code)
+    return historical_price, property_yield
 
-    url = (
+
+def investment_data_url(psmid, property_type_code, locality_id, locality_name):
+    return (
         "https://www.magicbricks.com/mbldp/Project-Rates-Trends-Month?"
         f"&psmid={psmid}&propType={property_type_code}&localityid={locality_id}&localityName={locality_name}"
     )
 
+
+def _fetch_investment_data(psmid, property_type_code, locality_id, locality_name):
+    headers = {
+        "User-Agent": "Mozilla/5.0"
+    }
+
+    url = investment_data_url(psmid, property_type_code, locality_id, locality_name)
+
     property_yield = None
     months = []
     prices = []
+    fetched = None  # the response, once it parsed
 
     try:
-        response = requests.get(url, headers=headers)
+        response = http_session.get(url, headers=headers)
 
         if response.status_code == 200:
             try:
@@ -121,8 +178,9 @@ def fetch_investment_data(psmid, property_type_code, locality_id, locality_name)
             except json.JSONDecodeError:
                 print("Response is not valid JSON:")
                 print(response.text[:500])  # print first 500 characters for inspection
-                return {}
-            
+                return {}, "N/A", None
+            fetched = response
+
             # Extract property yield if available
             nearby = data.get("currentPricesNearbyMap", [])
             for item in nearby:
@@ -156,15 +214,47 @@ def fetch_investment_data(psmid, property_type_code, locality_id, locality_name)
     
     historical_price = {month: price for month, price in zip(months, prices)}
     property_yield = property_yield if property_yield is not None else "N/A"
-    return historical_price, property_yield
+    return historical_price, property_yield, fetched
 
 
 
-def scrape_property_details(url):
+def fetch_property_page(url, state=None):
+    """Return the page HTML, or None if the crawl state shows it is unchanged (HTTP 304)."""
     headers = {"User-Agent": "Mozilla/5.0"}
+    if state is not None:
+        headers.update(state.conditional_headers(url))
+    response = http_session.get(url, headers=headers)
+    if state is not None:
+        state.observe_response(url, response)
+        if response.status_code == 304:
+            return None
+    return response.text
+
+
+def extract_psmid(project_photos, property_photos):
+    # extract historical data from this api : https://www.magicbricks.com/mbldp/Project-Rates-Trends-Month?&psmid=<psmid>&propType=<propertyTypeCode>&localityid=<localityId>&localityName=<localityName>
+    # psmid : in url of project union property photoes : https://img.staticmb.com/mbimages/project/Photo_h470_w1080/2025/01/23/Project-Photo-11-Unique-Luxuria-Ahmedabad-5418089_410_1440_470_1080.jpg"
+    # "5418089" is psmid extract it using regex
+    all_photos = (project_photos or []) + (property_photos or [])
+    for photo_url in all_photos:
+        match = re.search(r'-([0-9]{6,})_[0-9]+(?:_[0-9]+)*\.jpg$', photo_url)
+        if match:
+            return match.group(1)
+    return None
 
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.text, "html.parser")
+
+def parse_property_page(html, url):
+    """Parse a detail page into (details, page), where page holds the ids the follow-up APIs need."""
+    try:
+        return fast_extract.parse_property_page(html, url)
+    except Exception as e:
+        print(f"Fast extraction failed for {url}, falling back to BeautifulSoup: {e}")
+        return parse_property_page_soup(html, url)
+
+
+def parse_property_page_soup(html, url):
+    """Reference BeautifulSoup implementation of parse_property_page (slower, builds the full tree)."""
+    soup = BeautifulSoup(html, "html.parser")
 
     scripts = soup.find_all("script", type="application/ld+json")
     property_data = {}
@@ -177,15 +267,6 @@ def scrape_property_details(url):
                 break
         except:
             continue
-    name = property_data.get("name", "").strip()    
-    property_type = property_data.get("type", "").strip()
-    description = property_data.get("description", "").strip()
-    rooms = property_data.get("numberOfRooms", "")
-    floor_size = property_data.get("floorSize", {}).get("name", "")
-    latitude = property_data.get("geo", {}).get("latitude")
-    longitude = property_data.get("geo", {}).get("longitude")
-    locality = property_data.get("address", {}).get("addressLocality", "")
-    region = property_data.get("address", {}).get("addressRegion", "")
 
     # Extract property ID from the tag
     property_id = soup.find("span", class_="mb-ldp__posted--propid")
@@ -196,10 +277,6 @@ def scrape_property_details(url):
 
     price = soup.find("div", class_="mb-ldp__dtls__price")
     price = price.get_text(strip=True) if price else None
-    bhk = url.split("/")[4].split("-")[0] if len(url.split("/")) > 4 else None
-    total_area = url.split("/")[4].split("-")[2] if len(url.split("/")) > 4 else None
-    
-    property_photos,project_photos,locality_photos = fetch_gallery_photos(property_id) if property_id else ([], [])
 
     details = {}
     list_items = soup.select("ul.mb-ldp__dtls__body__list > li.mb-ldp__dtls__body__list--item")
@@ -224,25 +301,14 @@ def scrape_property_details(url):
             value = value_tag.get_text(strip=True)
             details[label] = value
 
-    # extract historical data from this api : https://www.magicbricks.com/mbldp/Project-Rates-Trends-Month?&psmid=<psmid>&propType=<propertyTypeCode>&localityid=<localityId>&localityName=<localityName>
-    # psmid : in url of project union property photoes : https://img.staticmb.com/mbimages/project/Photo_h470_w1080/2025/01/23/Project-Photo-11-Unique-Luxuria-Ahmedabad-5418089_410_1440_470_1080.jpg"
-    # "5418089" is psmid extract it using regex
-    psmid = None
-    all_photos = (project_photos or []) + (property_photos or [])
-
-    for url in all_photos:
-        match = re.search(r'-([0-9]{6,})_[0-9]+(?:_[0-9]+)*\.jpg$', url)
-        if match:
-            psmid = match.group(1)
-            break
-
-
     target_script = None
     for script in soup.find_all("script"):
         if script.string and "window.SERVER_PRELOADED_STATE_DETAILS" in script.string:
             target_script = script.string
             break
-    match = re.search(r'window\.SERVER_PRELOADED_STATE_DETAILS\s*=\s*({.*});', target_script, re.DOTALL)
+    match = re.search(r'window\.SERVER_PRELOADED_STATE_DETAILS\s*=\s*({.*});', target_script, re.DOTALL) if target_script else None
+    property_type_code = None
+    locality_id = None
     if match:
         json_text = match.group(1)
         try:
@@ -255,25 +321,45 @@ def scrape_property_details(url):
             )
             locality_id = data.get("propertyDetailInfoBeanData", {}).get("localityId")
         except json.JSONDecodeError:
-            property_type_code = None
-            locality_id = None
-    else:
-        property_type_code = None
-        locality_id = None
+            pass
+
+    page = {
+        "url": url,
+        "property_data": property_data,
+        "property_id": property_id,
+        "price": price,
+        "property_type_code": property_type_code,
+        "locality_id": locality_id,
+        "locality": property_data.get("address", {}).get("addressLocality", ""),
+    }
+    return details, page
 
-    historical_price,property_yeald = fetch_investment_data(psmid, property_type_code, locality_id, locality)
 
-    # fetch locality ratings
-    locality_ratings = fetch_locality_ratings(locality_id)
+def build_property_details(details, page, photos, investment, locality_ratings):
+    """Merge the parsed page with the gallery, price-trend and locality-rating API results."""
+    url = page["url"]
+    property_data = page["property_data"]
+    property_photos, project_photos, locality_photos = photos
+    historical_price, property_yeald = investment
 
+    name = property_data.get("name", "").strip()
+    property_type = property_data.get("type", "").strip()
+    description = property_data.get("description", "").strip()
+    rooms = property_data.get("numberOfRooms", "")
+    floor_size = property_data.get("floorSize", {}).get("name", "")
+    latitude = property_data.get("geo", {}).get("latitude")
+    longitude = property_data.get("geo", {}).get("longitude")
+    region = property_data.get("address", {}).get("addressRegion", "")
+    bhk = url.split("/")[4].split("-")[0] if len(url.split("/")) > 4 else None
+    total_area = url.split("/")[4].split("-")[2] if len(url.split("/")) > 4 else None
 
     details["Locality Ratings"] = locality_ratings
     details["Historical Price (Locality)"] = historical_price
     details["Property Yield"] = property_yeald
     details["Property URL"] = url
-    details["Property ID"] = property_id
+    details["Property ID"] = page["property_id"]
     details["type"] = property_type
-    details["Price"] = price
+    details["Price"] = page["price"]
     details["BHK"] = bhk
     details["Total Area"] = total_area
     details["Name"] = name
@@ -282,7 +368,8 @@ def scrape_property_details(url):
     details["Floor Size"] = floor_size
     details["Latitude"] = latitude
     details["Longitude"] = longitude
-    details["Locality"] = locality
+    details["Locality"] = page["locality"]
+    details["Locality ID"] = page["locality_id"]
     details["Region"] = region
     details["Project Photos"] = project_photos
     details["Locality Photos"] = locality_photos
@@ -293,6 +380,26 @@ def scrape_property_details(url):
     return details
 
 
+def scrape_property_details(url, state=None):
+    """Scrape one listing; with a crawl state, returns None when the page has not changed."""
+    html = fetch_property_page(url, state)
+    if html is None:
+        return None
+    details, page = parse_property_page(html, url)
+    if state is not None and state.unchanged(url, content_hash([details, page])):
+        return None
+
+    property_id = page["property_id"]
+    photos = fetch_gallery_photos(property_id) if property_id else ([], [], [])
+    psmid = extract_psmid(photos[1], photos[0])
+    investment = fetch_investment_data(psmid, page["property_type_code"], page["locality_id"], page["locality"])
+
+    # fetch locality ratings
+    locality_ratings = fetch_locality_ratings(page["locality_id"])
+
+    return build_property_details(details, page, photos, investment, locality_ratings)
+
+
 def clean_property_data(data):
     def parse_price(price_str):
         if not price_str:
@@ -345,23 +452,14 @@ def clean_property_data(data):
     return cleaned_data
 
 
-url = "https://www.magicbricks.com/propertyDetails/3-BHK-2520-Sq-ft-Multistorey-Apartment-FOR-Sale-Gota-in-Ahmedabad&id=4d423737323832383437"
-property_data = scrape_property_details(url)
-with open("property_details.json", "w") as outfile:
-    property_data = clean_property_data(property_data)
-    property_data["Property URL"] = url
-    json.dump(property_data, outfile, indent=4)
-
-
-links = []
-with open("links.txt", "r") as file:
-    links = file.readlines()
-all_properties = []
-for link in links[:10]:
-    link = link.strip()
-    if link:
+def scrape_links(links, state=None, failed=None):
+    all_properties = []
+    for link in links:
         try:
-            details = scrape_property_details(link)
+            details = scrape_property_details(link, state)
+            if details is None:
+                print(f"Unchanged: {link}")
+                continue
             details = clean_property_data(details)
             details["Property URL"] = link
             all_properties.append(details)
@@ -369,6 +467,135 @@ for link in links[:10]:
         except Exception as e:
             print(f"Failed to scrape {link}: {e}")
             traceback.print_exc()
+            if state is not None:
+                state.discard(link)
+            if failed is not None:
+                failed.add(link)
+    return all_properties
+
 
-with open("property_details.json", "w") as outfile:
-    json.dump(all_properties, outfile, indent=4)
+def merge_into_output(path, records):
+    """Fold freshly scraped records into the JSON list already at path, keyed by listing.
+
+    A record replaces the earlier one for the same listing in place; new listings
+    are appended. Returns (merged records, number of replaced records).
+    """
+    try:
+        with open(path, "r") as infile:
+            existing = json.load(infile)
+    except FileNotFoundError:
+        existing = []
+    position = {property_key(rec.get("Property URL", "")): i for i, rec in enumerate(existing)}
+    replaced = 0
+    for rec in records:
+        key = property_key(rec.get("Property URL", ""))
+        if key in position:
+            existing[position[key]] = rec
+            replaced += 1
+        else:
+            position[key] = len(existing)
+            existing.append(rec)
+    return existing, replaced
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape magicbricks property detail pages listed in links.txt")
+    parser.add_argument('--links', default='links.txt', help='File with one property URL per line (default: links.txt)')
+    parser.add_argument('--frontier', default=None, help='Crawl pending links from this link_frontier database instead of --links')
+    parser.add_argument('--frontier-status', default='pending', help='Comma-separated frontier statuses to crawl (default: pending)')
+    parser.add_argument('--output', default='property_details.json', help='Output JSON file (default: property_details.json)')
+    parser.add_argument('--limit', type=int, default=None, help='Only scrape the first N links')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='Crawl concurrently with asyncio')
+    parser.add_argument('--pipeline', action='store_true', help='Like --async, but parse and clean pages on a process pool')
+    parser.add_argument('--parse-workers', type=int, default=None, help='Processes for the --pipeline parse/clean stages (default: CPU count)')
+    parser.add_argument('--queue-size', type=int, default=64, help='Max items waiting between --pipeline stages (default: 64)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Listings in flight at once in --async/--pipeline mode (default: 16)')
+    parser.add_argument('--rate', type=float, default=4.0, help='Max requests per second per host in --async/--pipeline mode (default: 4)')
+    parser.add_argument('--pool-size', type=int, default=None, help='Max pooled connections per host (default: 2x concurrency in --async/--pipeline mode, else 4)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request read timeout in seconds (default: 30)')
+    parser.add_argument('--retries', type=int, default=4, help='Retries with exponential backoff on 429/5xx (default: 4)')
+    parser.add_argument('--cache-path', default=locality_cache.DEFAULT_PATH, help=f'Locality ratings/trend cache file (default: {locality_cache.DEFAULT_PATH})')
+    parser.add_argument('--cache-ttl', type=float, default=locality_cache.DEFAULT_TTL, help='Seconds before a cached locality response expires (default: one week)')
+    parser.add_argument('--cache-size', type=int, default=locality_cache.DEFAULT_MAX_ENTRIES, help='Max cached locality responses before LRU eviction')
+    parser.add_argument('--no-cache', action='store_true', help='Always fetch locality ratings/trends from the API')
+    parser.add_argument('--incremental', action='store_true', help='Skip unchanged listings and merge new or changed records into --output')
+    parser.add_argument('--state-path', default=CRAWL_STATE_PATH, help=f'Crawl state file used by --incremental (default: {CRAWL_STATE_PATH})')
+    parser.add_argument('--refresh-after', type=float, default=0, help='With --incremental, do not re-request listings fetched less than N seconds ago')
+    parser.add_argument('--archive', default=None, help='Store every fetched page and API response in this archive directory')
+    parser.add_argument('--reparse', action='store_true', help='Rebuild records from the --archive pages without network access')
+    args = parser.parse_args()
+
+    if args.reparse and not args.archive:
+        parser.error("--reparse needs --archive")
+    archive = page_archive.PageArchive(args.archive) if args.archive else None
+
+    frontier = None
+    if args.reparse:
+        links = archive.page_urls()
+    elif args.frontier:
+        frontier = LinkFrontier(args.frontier)
+        links = frontier.next_batch(args.limit, statuses=tuple(args.frontier_status.split(",")))
+    else:
+        with open(args.links, "r") as file:
+            links = [line.strip() for line in file if line.strip()]
+        # links.txt is append-only; fetch each listing once even if it was discovered under several URLs
+        seen = set()
+        links = [link for link in links if not (property_key(link) in seen or seen.add(property_key(link)))]
+    if args.limit is not None:
+        links = links[:args.limit]
+
+    state = CrawlState(args.state_path) if args.incremental and not args.reparse else None
+    if state is not None and args.refresh_after:
+        links = [link for link in links if not state.is_fresh(link, args.refresh_after)]
+
+    concurrent = args.use_async or args.pipeline
+    pool_size = args.pool_size or (args.concurrency * 2 if concurrent else 4)
+    http_session.configure(pool_maxsize=pool_size, timeout=(5, args.timeout), retries=args.retries)
+    if archive is not None:
+        http_session.use_archive(archive, offline=args.reparse)
+    if args.reparse:
+        # everything comes from local disk; no need to be polite to the site
+        args.rate = 0
+    elif not args.no_cache:
+        locality_cache.configure(args.cache_path, ttl=args.cache_ttl, max_entries=args.cache_size)
+
+    failed = set()
+    if args.pipeline:
+        from crawl_pipeline import run_pipeline
+        all_properties = run_pipeline(
+            links, concurrency=args.concurrency, rate_per_host=args.rate, state=state,
+            parse_workers=args.parse_workers, queue_size=args.queue_size, failed=failed,
+        )
+    elif args.use_async:
+        from async_crawler import run_crawl
+        all_properties = run_crawl(links, concurrency=args.concurrency, rate_per_host=args.rate, state=state, failed=failed)
+    else:
+        all_properties = scrape_links(links, state, failed)
+
+    if state is not None:
+        # an incremental run only sees the delta; keep the unchanged listings from the last run
+        scraped = len(all_properties)
+        all_properties, replaced = merge_into_output(args.output, all_properties)
+        print(f"Merged {scraped} new or changed properties ({replaced} replaced)")
+
+    tmp = f"{args.output}.tmp"
+    with open(tmp, "w") as outfile:
+        json.dump(all_properties, outfile, indent=4)
+    os.replace(tmp, args.output)
+    print(f"Wrote {len(all_properties)} properties to {args.output}")
+    if state is not None:
+        print(f"Crawl state updated for {state.save()} URLs")
+        state.close()
+    if frontier is not None:
+        frontier.mark([link for link in links if link not in failed], DONE)
+        frontier.mark(failed, FAILED)
+        print(f"Frontier: {frontier.stats()}")
+        frontier.close()
+    http_session.close()
+    locality_cache.disable()
+    if archive is not None:
+        archive.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+
+import http_session
+import locality_cache
+import page_archive
+import scrap_static_details
+
+LOCALITY_ID = "77"
+PAGE_URL = "https://www.magicbricks.com/propertyDetails/2-BHK-1200-Sq-ft-Multistorey-Apartment-FOR-Sale-Shela-in-Ahmedabad&id={}"
+
+
+def property_page(property_id):
+    ld_json = {
+        "@type": "Apartment", "name": "2 BHK Apartment", "numberOfRooms": "2",
+        "address": {"addressLocality": "Shela", "addressRegion": "Ahmedabad"},
+        "geo": {"latitude": "23.0", "longitude": "72.4"},
+    }
+    preloaded = {"propertyDetailInfoBeanData": {"localityId": LOCALITY_ID,
+                                                "propertyDetail": {"detailBean": {"propertyTypeCode": "10002"}}}}
+    return (
+        f'<script type="application/ld+json">{json.dumps(ld_json)}</script>'
+        f"<script>window.SERVER_PRELOADED_STATE_DETAILS = {json.dumps(preloaded)};</script>"
+        f'<span class="mb-ldp__posted--propid">Property ID: {property_id}</span>'
+        '<div class="mb-ldp__dtls__price">₹55 Lac</div>'
+    )
+
+
+def api_body(url):
+    """The page or API JSON the site would serve for url; trends and ratings depend only on the locality."""
+    if "/propertyDetails/" in url:
+        return property_page(url.rsplit("=", 1)[1]), "text/html"
+    if "photoapi" in url:
+        psmid = 5_000_000 + int(url.split("propId=")[1].split("&")[0])
+        photo = f"https://img.staticmb.com/mbimages/project/Project-Photo-1-Shela-{psmid}_410_1440.jpg"
+        return json.dumps({"projectPhotos": [{"photos": [{"url": photo}]}]}), "application/json"
+    if "Project-Rates-Trends-Month" in url:
+        return json.dumps({
+            "currentPricesNearbyMap": [{"loc": "Locality Average", "Yield": 3.1}],
+            "monthYrAvgPriceStr": '"Aug\'24","Sep\'24"',
+            "localitiesDataMap": {LOCALITY_ID: json.dumps({"data": [{"y": 5000}, {"y": 5100}]})},
+        }), "application/json"
+    if "localityDetailInfo" in url:
+        return json.dumps({"connectivityRating": 4.2, "safetyRating": 3.9, "areaDescription": "Quiet"}), "application/json"
+    raise AssertionError(f"unexpected request for {url}")
+
+
+class FakeSession:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        body, content_type = api_body(url)
+        response = requests.Response()
+        response.url = url
+        response.status_code = 200
+        response._content = body.encode("utf-8")
+        response.headers["Content-Type"] = content_type
+        response.encoding = "utf-8"
+        return response
+
+
+class WarmCacheArchiveTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.session = FakeSession()
+        patcher = mock.patch.object(http_session, "get_session", return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(locality_cache.disable)
+        self.addCleanup(http_session.use_archive, None)
+        self.links = [PAGE_URL.format(pid) for pid in (11, 12)]
+
+    def locality_calls(self):
+        return [url for url in self.session.urls if "mbldp" in url]
+
+    def test_reparse_matches_a_crawl_answered_from_the_cache(self):
+        locality_cache.configure(os.path.join(self.directory, "locality.sqlite3"))
+        scrap_static_details.scrape_links(self.links)  # warms the cache, no archive yet
+
+        archive = page_archive.PageArchive(os.path.join(self.directory, "archive"))
+        self.addCleanup(archive.close)
+        http_session.use_archive(archive)
+        self.session.urls.clear()
+        crawled = scrap_static_details.scrape_links(self.links)
+        self.assertEqual(self.locality_calls(), [])  # every trend and rating came from the cache
+
+        locality_cache.disable()
+        http_session.use_archive(archive, offline=True)
+        self.session.urls.clear()
+        reparsed = scrap_static_details.scrape_links(archive.page_urls())
+        self.assertEqual(self.session.urls, [])
+        self.assertEqual(reparsed, crawled)
+        self.assertEqual(crawled[0]["Locality Ratings"]["connectivity"], 4.2)
+        self.assertEqual(crawled[1]["Historical Price (Locality)"], {"Aug'24": 5000, "Sep'24": 5100})
+
+
+if __name__ == "__main__":
+    unittest.main()